@@ -1,91 +1,90 @@
 """
 Vercel Python Serverless Function — Natal Chart Calculator.
 POST /api/chart with JSON body: { name, year, month, day, hour, minute, lat, lon, tz }
-Returns structured chart data as JSON.
+Returns structured chart data as JSON. natal_chart.api_response does the work;
+the modules named below document each part.
+
+  Body field        Effect
+  city              replaces lat/lon/tz; echoed as "resolved_city" (geocoder.py)
+  tz                optional with a timezone index deployed (tz_index.py)
+  hsys              house system(s), "P" by default; "houses" lists each of "P,W"
+  fields            profile or field list, also ?fields= (natal_chart.RESULT_FIELDS)
+  window            "HH:MM-HH:MM" instead of hour/minute (birth_window.py)
+  return            "solar" or "lunar", with return_year, return_place (returns.py)
+  profile           cProfile report, also ?profile; needs CHART_PROFILE=1
+
+  Profile           Fields
+  full_text         formatted_output, sun..saturn_sign, planets (the default)
+  teaser            sun, moon and rising sign; runs no stage past the positions
+  structured        signs, planets, houses, aspects, configurations, analysis,
+                    fixed_stars (fixed_stars.py), ephemeris
+  also by name      rarity (rarity.py, data/rarity.bin)
+
+Batch mode: POST a JSON array of those objects, or NDJSON (Content-Type:
+application/x-ndjson). Returns { results: [...], count, errors }, one result
+per record in input order with its "index" and either the chart or an "error".
+
+GET /api/chart?metrics returns latency histograms with CHART_METRICS=1, which
+also adds Server-Timing to every response; any other GET is a 405.
 """
 
 import json
 import sys
 import os
+import time
 from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs
 
 # Add project root to path so natal_chart.py can be imported
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from natal_chart import compute_chart, compute_aspects, detect_configurations, analyze_chart, format_output
+from natal_chart import METRICS, api_response, prewarm
 
+# Pay first-chart setup during the cold start's init phase, not the first request
+if os.getenv("NATAL_CHART_PREWARM", "1") != "0":
+    prewarm()
 
-class handler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        content_length = int(self.headers.get("Content-Length", 0))
-        body = self.rfile.read(content_length)
 
-        try:
-            data = json.loads(body)
-        except json.JSONDecodeError:
-            self.send_response(400)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": "Invalid JSON"}).encode())
-            return
-
-        required = ["name", "year", "month", "day", "hour", "minute", "lat", "lon", "tz"]
-        missing = [k for k in required if k not in data]
-        if missing:
-            self.send_response(400)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": f"Missing fields: {', '.join(missing)}"}).encode())
-            return
-
-        try:
-            chart = compute_chart(
-                year=int(data["year"]),
-                month=int(data["month"]),
-                day=int(data["day"]),
-                hour=int(data["hour"]),
-                minute=int(data["minute"]),
-                lat=float(data["lat"]),
-                lon=float(data["lon"]),
-                tz_str=str(data["tz"]),
-            )
-
-            aspects = compute_aspects(chart["points"])
-            configs = detect_configurations(aspects, chart["points"])
-            analysis = analyze_chart(chart)
-            formatted = format_output(str(data["name"]), chart, analysis, aspects, configs)
+class handler(BaseHTTPRequestHandler):
+    def send_json(self, status: int, payload, headers: tuple = ()) -> None:
+        with METRICS.stage("serialize"):
+            body = json.dumps(payload).encode()
+        timings = METRICS.end_request()
+        if status >= 400:
+            METRICS.count("errors")
 
-            # Extract key placements
-            points = chart["points"]
-            result = {
-                "formatted_output": formatted,
-                "sun_sign": points.get("Sun", {}).get("sign", ""),
-                "moon_sign": points.get("Moon", {}).get("sign", ""),
-                "rising_sign": points.get("Ascendant", {}).get("sign", ""),
-                "mercury_sign": points.get("Mercury", {}).get("sign", ""),
-                "venus_sign": points.get("Venus", {}).get("sign", ""),
-                "mars_sign": points.get("Mars", {}).get("sign", ""),
-                "jupiter_sign": points.get("Jupiter", {}).get("sign", ""),
-                "saturn_sign": points.get("Saturn", {}).get("sign", ""),
-                "planets": {},
-            }
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if timings:
+            self.send_header("Server-Timing", METRICS.server_timing(timings))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
 
-            for pname, pdata in points.items():
-                if pdata.get("lon") is not None:
-                    result["planets"][pname] = {
-                        "sign": pdata.get("sign", ""),
-                        "house": pdata.get("house"),
-                        "deg_str": pdata.get("deg_str", ""),
-                        "retrograde": pdata.get("retrograde", False),
-                    }
+        if timings:
+            print(json.dumps({
+                "event": "chart_request",
+                "ts": round(time.time(), 3),
+                "status": status,
+                "bytes": len(body),
+                "stages_ms": {k: round(v / 1000, 3) for k, v in timings.items()},
+            }), file=sys.stderr)
 
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps(result).encode())
+    def do_GET(self):
+        if "metrics" not in self.path.partition("?")[2]:
+            self.send_json(405, {"error": "Use POST"}, [("Allow", "POST")])
+        elif not METRICS.enabled:
+            self.send_json(404, {"error": "Metrics disabled (set CHART_METRICS=1)"})
+        else:
+            self.send_json(200, METRICS.snapshot())
 
-        except Exception as e:
-            self.send_response(500)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": str(e)}).encode())
+    def do_POST(self):
+        METRICS.begin_request()
+        METRICS.count("requests")
+        content_length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(content_length)
+        query = self.path.partition("?")[2]
+        fields = parse_qs(query).get("fields", [None])[-1]
+        profile = "profile" in parse_qs(query, keep_blank_values=True)
+        self.send_json(*api_response(body, self.headers.get("Content-Type", ""), fields, profile))
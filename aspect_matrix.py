@@ -0,0 +1,135 @@
+"""
+Vectorized aspect engine — NumPy
+
+Computes aspects for many charts at once from a (charts x bodies) longitude
+matrix. Every pairwise separation, orb and aspect match is evaluated as one
+array operation per chunk of charts; only the matches are turned back into
+Python records. Results are the same records, in the same order, as
+natal_chart.compute_aspects.
+
+Usage:
+  from aspect_matrix import longitude_matrix, compute_aspects_many
+  lons = longitude_matrix([chart["points"] for chart in charts])
+  aspects_per_chart = compute_aspects_many(lons)
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from natal_chart import ASPECT_BODIES, ASPECT_DEFS, LUMINARIES, LUMINARY_BONUS
+
+# Charts per vectorized step; bounds the (charts x pairs x aspects) temporaries
+CHUNK = 8192
+
+ASPECT_NAMES = list(ASPECT_DEFS)
+ASPECT_ANGLES = np.array([angle for angle, _ in ASPECT_DEFS.values()], dtype=float)
+
+# Pair order matches compute_aspects' nested loop: (0,1), (0,2), ... (1,2), ...
+PAIR_I, PAIR_J = np.triu_indices(len(ASPECT_BODIES), k=1)
+
+# Allowed orb per (pair, aspect), luminary bonus included
+_BASE_ORBS = np.array([orb for _, orb in ASPECT_DEFS.values()], dtype=float)
+_IS_LUM = np.array([b in LUMINARIES for b in ASPECT_BODIES])
+PAIR_ORBS = _BASE_ORBS[None, :] + np.where(
+    _IS_LUM[PAIR_I] | _IS_LUM[PAIR_J], LUMINARY_BONUS, 0
+)[:, None]
+
+# With today's ASPECT_DEFS every orb is narrower than half the gap to the
+# neighbouring aspect angles, so a separation can only match the aspect whose
+# angle is nearest to it. That lets the engine test one aspect per pair
+# instead of broadcasting over all of them.
+_ORDER = np.argsort(ASPECT_ANGLES, kind="stable")
+_SORTED_ANGLES = ASPECT_ANGLES[_ORDER]
+_MIDPOINTS = (_SORTED_ANGLES[:-1] + _SORTED_ANGLES[1:]) / 2
+_HALF_GAPS = np.diff(_SORTED_ANGLES) / 2
+_MAX_ORBS = PAIR_ORBS.max(axis=0)[_ORDER]
+NEAREST_ONLY = bool(np.all(_MAX_ORBS[:-1] < _HALF_GAPS) and np.all(_MAX_ORBS[1:] < _HALF_GAPS))
+
+# Nearest aspect per whole degree of separation. With whole-degree midpoints
+# the nearest angle is constant across each cell, except at a midpoint
+# itself, which is too far from both angles to be an aspect either way.
+_CELL_NEAREST = _ORDER[np.searchsorted(_MIDPOINTS, np.arange(181) + 0.5)]
+_WHOLE_MIDPOINTS = bool(np.all(_MIDPOINTS == np.round(_MIDPOINTS)))
+
+
+def longitude_matrix(points_list: list[dict], bodies: list[str] = ASPECT_BODIES) -> np.ndarray:
+    """Stack chart points into a (charts x bodies) array; missing bodies are NaN."""
+    lons = np.full((len(points_list), len(bodies)), np.nan)
+    for row, points in enumerate(points_list):
+        for col, body in enumerate(bodies):
+            p = points.get(body)
+            if p is not None and p.get("lon") is not None:
+                lons[row, col] = p["lon"]
+    return lons
+
+
+def separations(lons: np.ndarray) -> np.ndarray:
+    """Absolute angular separation for every body pair: (charts x pairs)."""
+    # Normalize per body, not per pair; the difference of two values in
+    # [0, 360) only needs one wrap, which gives the same float as Python's %.
+    norm = np.mod(lons, 360.0)
+    d = norm[:, PAIR_I] - norm[:, PAIR_J]
+    d = np.where(d < 0.0, d + 360.0, d)
+    return np.abs(np.where(d > 180.0, d - 360.0, d))
+
+
+def nearest_aspects(sep: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Index of the aspect angle nearest each separation, and the orb from it."""
+    if _WHOLE_MIDPOINTS:
+        # fmin maps NaN to 180, so a missing body still indexes the table
+        nearest = _CELL_NEAREST[np.fmin(sep, 180.0).astype(np.intp)]
+    else:
+        nearest = _ORDER[np.searchsorted(_MIDPOINTS, sep)]
+    return nearest, np.abs(sep - ASPECT_ANGLES.astype(sep.dtype, copy=False)[nearest])
+
+
+def aspect_hits(lons: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find every aspect in a (charts x ASPECT_BODIES) longitude matrix.
+
+    Returns (chart, pair, aspect, orb) arrays, one entry per hit, ordered by
+    chart, then pair, then ASPECT_DEFS order. NaN longitudes never match.
+    """
+    lons = np.asarray(lons, dtype=float)
+    if lons.ndim != 2 or lons.shape[1] != len(ASPECT_BODIES):
+        raise ValueError(f"Expected a (charts x {len(ASPECT_BODIES)}) longitude matrix")
+
+    out: list[tuple] = []
+    for start in range(0, lons.shape[0], CHUNK):
+        sep = separations(lons[start:start + CHUNK])
+        if NEAREST_ONLY:
+            nearest, orbs = nearest_aspects(sep)
+            c, p = np.nonzero(orbs <= PAIR_ORBS[np.arange(len(PAIR_I)), nearest])
+            out.append((c + start, p, nearest[c, p], orbs[c, p]))
+        else:
+            orbs = np.abs(sep[:, :, None] - ASPECT_ANGLES[None, None, :])
+            c, p, a = np.nonzero(orbs <= PAIR_ORBS[None, :, :])
+            out.append((c + start, p, a, orbs[c, p, a]))
+
+    if not out:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, empty, np.empty(0)
+    return tuple(np.concatenate(parts) for parts in zip(*out))
+
+
+def compute_aspects_many(lons: np.ndarray) -> list[list[dict]]:
+    """Vectorized compute_aspects over every row of a longitude matrix."""
+    charts, pairs, asps, orbs = aspect_hits(lons)
+    results: list[list[dict]] = [[] for _ in range(len(lons))]
+
+    # Python's round() so orbs (and therefore the sort) match compute_aspects;
+    # lexsort is stable, like list.sort, so ties keep pair/aspect order.
+    rounded = [round(orb, 2) for orb in orbs.tolist()]
+    order = np.lexsort((np.array(rounded), charts))
+
+    labels = [(ASPECT_BODIES[i], ASPECT_BODIES[j]) for i, j in zip(PAIR_I.tolist(), PAIR_J.tolist())]
+    charts_l, pairs_l, asps_l = charts.tolist(), pairs.tolist(), asps.tolist()
+    for k in order.tolist():
+        p1, p2 = labels[pairs_l[k]]
+        results[charts_l[k]].append({
+            "p1": p1, "p2": p2,
+            "aspect": ASPECT_NAMES[asps_l[k]],
+            "orb": rounded[k],
+        })
+    return results
@@ -0,0 +1,77 @@
+"""
+Benchmark: scalar compute_aspects vs vectorized aspect_matrix engine.
+
+  python3 bench/bench_aspects.py                 # 1, 1k and 100k charts
+  python3 bench/bench_aspects.py --sizes 1 1000 --scalar-max 1000
+
+Longitudes are drawn uniformly at random (seeded), with ~20% of charts
+missing Ascendant/MC as for unknown birth times. Every size is checked for
+record-for-record equality against compute_aspects on up to --scalar-max charts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aspect_matrix import aspect_hits, compute_aspects_many, longitude_matrix
+from natal_chart import ASPECT_BODIES, compute_aspects
+
+
+def random_points(n: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    points_list = []
+    for _ in range(n):
+        time_known = rng.random() > 0.2
+        points_list.append({
+            b: {"lon": rng.uniform(0, 360)}
+            for b in ASPECT_BODIES
+            if time_known or b not in ("Ascendant", "MC")
+        })
+    return points_list
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1, 1000, 100_000])
+    ap.add_argument("--scalar-max", type=int, default=10_000,
+                    help="Largest size to also time (and verify) with compute_aspects")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    print(f"{'charts':>8s}  {'scalar charts/s':>16s}  {'vector charts/s':>16s}  "
+          f"{'speedup':>8s}  {'arrays only/s':>14s}  match")
+    for n in args.sizes:
+        points_list = random_points(n, args.seed)
+
+        t0 = time.perf_counter()
+        lons = longitude_matrix(points_list)
+        vec = compute_aspects_many(lons)
+        t_vec = time.perf_counter() - t0
+
+        # Engine alone (no record dicts), as analytics jobs consume it
+        t0 = time.perf_counter()
+        aspect_hits(lons)
+        t_hits = time.perf_counter() - t0
+
+        check = min(n, args.scalar_max)
+        t0 = time.perf_counter()
+        ref = [compute_aspects(p) for p in points_list[:check]]
+        t_scalar = (time.perf_counter() - t0) * (n / check) if check else float("nan")
+
+        match = "ok" if ref == vec[:check] else "MISMATCH"
+        note = "" if check == n else f" (scalar extrapolated from {check})"
+        print(f"{n:>8d}  {n / t_scalar:>16,.0f}  {n / t_vec:>16,.0f}  "
+              f"{t_scalar / t_vec:>7.1f}x  {n / t_hits:>14,.0f}  {match}{note}")
+        if match != "ok":
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+"""
+Benchmark: birth-time window latency and agreement with compute_chart.
+
+  python3 bench/bench_birth_window.py
+  python3 bench/bench_birth_window.py --days 100 --hsys K
+
+Runs birth_time_windows over whole days for records from the pipeline
+corpus, then recomputes the chart with compute_chart at the midpoint of
+every interval (rounded to the minute, skipping intervals shorter than two
+minutes) and checks that the rising, MC and Moon signs and every house
+match what the window reported.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_pipeline import build_corpus
+from birth_window import birth_time_windows
+from natal_chart import compute_chart
+
+
+def check_interval(rec: dict, iv: dict, hsys: str) -> list[str]:
+    t0, t1 = datetime.fromisoformat(iv["start"]), datetime.fromisoformat(iv["end"])
+    mid = t0 + (t1 - t0) / 2
+    chart = compute_chart(mid.year, mid.month, mid.day, mid.hour, mid.minute,
+                          rec["lat"], rec["lon"], rec["tz"], hsys)
+    points = chart["points"]
+    got = {"rising_sign": points["Ascendant"]["sign"], "mc_sign": points["MC"]["sign"],
+           "moon_sign": points["Moon"]["sign"]}
+    wrong = [f"{k} {iv[k]} != {v}" for k, v in got.items() if iv[k] != v]
+    for body, house in iv["houses"].items():
+        if points[body].get("house") != house:
+            wrong.append(f"{body} house {house} != {points[body].get('house')}")
+    return [f"{mid:%Y-%m-%d %H:%M} {rec['tz']}: {w}" for w in wrong]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Birth-time window benchmark")
+    ap.add_argument("--days", type=int, default=30, help="Whole-day windows to compute")
+    ap.add_argument("--hsys", default="P")
+    ap.add_argument("--seed", type=int, default=20240121)
+    args = ap.parse_args()
+
+    corpus = [r for r in build_corpus(args.days * 2, args.seed) if abs(r["lat"]) < 60][:args.days]
+    ms, counts, checked, problems = [], [], 0, []
+    for rec in corpus:
+        t0 = time.perf_counter()
+        result = birth_time_windows(rec["year"], rec["month"], rec["day"], rec["lat"], rec["lon"],
+                                    rec["tz"], hsys=args.hsys)
+        ms.append((time.perf_counter() - t0) * 1e3)
+        counts.append(len(result["intervals"]))
+        for iv in result["intervals"]:
+            if iv["minutes"] >= 2:
+                checked += 1
+                problems.extend(check_interval(rec, iv, args.hsys))
+
+    q = statistics.quantiles(ms, n=100) if len(ms) > 1 else ms * 99
+    print(f"windows {len(ms)} days, {statistics.mean(counts):.0f} intervals/day, "
+          f"p50 {q[49]:.1f} ms, max {max(ms):.1f} ms")
+    for p in problems[:20]:
+        print(f"  wrong at {p}")
+    print(f"verify  {checked} interval midpoints, {'OK' if not problems else f'{len(problems)} wrong'}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+"""
+Benchmark: memory and serialization cost of the Chart/Point model.
+
+  python3 bench/bench_chart_model.py
+  python3 bench/bench_chart_model.py --size 20000
+
+Computes a corpus of charts (the bench_pipeline corpus, cache disabled) and
+compares the slotted Chart/Point representation with the nested-dict layout
+compute_chart returned before, rebuilt field for field from each chart:
+  bytes/chart     tracemalloc size of N charts held in a list, per chart
+  result us       chart_result (the /api/chart payload) per chart
+  to_json us      full chart to JSON (Chart.to_dict vs json.dumps(default=str))
+Times are the best of five passes, in CPU time. Both layouts go through the
+same chart_result, and their payloads must match.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import natal_chart
+from bench_pipeline import build_corpus
+from natal_chart import ChartCache, chart_result, compute_chart
+
+
+def dict_chart(chart) -> dict:
+    """The pre-Chart layout: a dict of dicts with every string rendered."""
+    d = dict(chart)
+    d["points"] = {name: dict(p) for name, p in chart["points"].items()}
+    return d
+
+
+def compute_all(corpus: list[dict]) -> list:
+    return [
+        compute_chart(r["year"], r["month"], r["day"], r["hour"], r["minute"],
+                      r["lat"], r["lon"], r["tz"], r["hsys"], r["time_known"])
+        for r in corpus
+    ]
+
+
+def footprint(build) -> tuple[list, float]:
+    """Objects returned by build() and the bytes they allocated, per object."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objs, (after - before) / len(objs)
+
+
+def per_call_us(fn, items, repeat: int = 5) -> float:
+    """Best of `repeat` passes over items, per item: the least disturbed by other load."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.process_time()
+        for item in items:
+            fn(item)
+        best = min(best, time.process_time() - t0)
+    return best / len(items) * 1e6
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Chart model memory/serialization benchmark")
+    ap.add_argument("--size", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=20240121)
+    args = ap.parse_args()
+
+    natal_chart.CHART_CACHE = ChartCache(maxsize=0)
+    corpus = build_corpus(args.size, args.seed)
+    compute_all(corpus[:10])   # first-call costs out of the measurement
+
+    charts, chart_bytes = footprint(lambda: compute_all(corpus))
+    dicts, dict_bytes = footprint(lambda: [dict_chart(c) for c in charts])
+    # dict_chart shares the datetimes, cusp lists and cache keys with the
+    # Chart it was built from; add those back so both are whole charts
+    shared, shared_bytes = footprint(lambda: [
+        (c.dt_local.replace(), c.dt_utc.replace(), list(c.house_cusps), tuple(c.cache_key))
+        for c in charts
+    ])
+    dict_bytes += shared_bytes
+    del shared
+
+    mismatches = sum(
+        chart_result("x", c) != chart_result("x", d) for c, d in zip(charts, dicts)
+    )
+
+    rows = [
+        ("bytes/chart", dict_bytes, chart_bytes),
+        ("result us", per_call_us(lambda d: chart_result("x", d), dicts),
+         per_call_us(lambda c: chart_result("x", c), charts)),
+        ("to_json us", per_call_us(lambda d: json.dumps(d, default=str), dicts),
+         per_call_us(lambda c: json.dumps(c.to_dict()), charts)),
+    ]
+    print(f"{len(charts)} charts\n")
+    print(f"{'':<14s} {'dict':>10s} {'Chart':>10s} {'ratio':>7s}")
+    for label, before, after in rows:
+        print(f"{label:<14s} {before:>10,.1f} {after:>10,.1f} {after / before:>6.2f}x")
+    if mismatches:
+        print(f"\n{mismatches} chart_result payloads differ between layouts", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
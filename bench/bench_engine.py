@@ -0,0 +1,85 @@
+"""
+Benchmark: ChartEngine throughput and scaling across worker processes.
+
+  python3 bench/bench_engine.py                          # 100k charts, 1..cpu workers
+  python3 bench/bench_engine.py --size 20000 --workers 1 2 4 8 --chunksize 256
+
+Runs the bench_pipeline corpus (same seed) through ChartEngine.map for each
+worker count, with the chart cache disabled in every worker. Reports charts/s,
+speedup over one worker and parallel efficiency, and checks that every run
+returns the same results in input order as the single-worker run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+# Workers inherit this through the environment, whatever the start method
+os.environ["CHART_CACHE_SIZE"] = "0"
+
+from bench_pipeline import build_corpus
+from chart_engine import ChartEngine
+
+
+def default_workers() -> list[int]:
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cpus:
+        counts.append(counts[-1] * 2)
+    return counts + [cpus] if cpus > 1 else counts
+
+
+def run(corpus: list[dict], workers: int, chunksize: int) -> tuple[float, str]:
+    digest = hashlib.sha256()
+    with ChartEngine(workers=workers, chunksize=chunksize) as engine:
+        t0 = time.perf_counter()
+        for result in engine.map(corpus):
+            digest.update(json.dumps(result, sort_keys=True).encode())
+        elapsed = time.perf_counter() - t0
+    return len(corpus) / elapsed, digest.hexdigest()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="ChartEngine scaling benchmark")
+    ap.add_argument("--size", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=20240121)
+    ap.add_argument("--workers", type=int, nargs="+", default=None)
+    ap.add_argument("--chunksize", type=int, default=128)
+    ap.add_argument("--json", default=None, help="Write results to this file")
+    args = ap.parse_args()
+
+    corpus = build_corpus(args.size, args.seed)
+    counts = args.workers or default_workers()
+    print(f"{args.size} charts, chunksize {args.chunksize}, {os.cpu_count()} CPUs\n")
+    print(f"{'workers':>7s} {'charts/s':>10s} {'speedup':>8s} {'efficiency':>10s}")
+
+    rows, baseline, reference, status = [], None, None, 0
+    for n in counts:
+        rate, digest = run(corpus, n, args.chunksize)
+        baseline = baseline or rate
+        reference = reference or digest
+        speedup = rate / baseline
+        print(f"{n:>7d} {rate:>10,.0f} {speedup:>7.2f}x {speedup / n:>9.0%}"
+              + ("" if digest == reference else "   RESULTS DIFFER"))
+        if digest != reference:
+            status = 1
+        rows.append({"workers": n, "charts_per_sec": rate, "speedup": speedup})
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"size": args.size, "chunksize": args.chunksize,
+                       "cpus": os.cpu_count(), "runs": rows}, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
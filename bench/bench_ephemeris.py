@@ -0,0 +1,140 @@
+"""
+Benchmark: chart latency and positional accuracy per ephemeris backend.
+
+  python3 bench/bench_ephemeris.py --path /usr/share/sweph
+  python3 bench/bench_ephemeris.py --path ephe --jpl-file de440.eph --tolerance 0.1
+
+Computes the golden corpus (bench_pipeline's default size and seed, cache
+disabled) with every backend whose files are on --path: moshier always,
+swiss given SE files, jpl given --jpl-file. Reports compute_chart latency,
+the startup cost of each backend in a fresh process (with and without
+preloading SE files) and, for every body, the largest and RMS longitude
+difference in arcseconds from the most precise backend that ran (jpl, else
+swiss). Ends with the fastest backend whose worst body stays within
+--tolerance arcseconds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import natal_chart
+from bench_pipeline import build_corpus
+from natal_chart import ChartCache, abs_ang_diff, compute_chart, use_ephemeris_backend
+
+PRECISION_ORDER = ["jpl", "swiss", "moshier"]
+
+COLD_START = """
+import json, sys, time
+t0 = time.perf_counter()
+import natal_chart
+t1 = time.perf_counter()
+natal_chart.init_ephemeris()
+t2 = time.perf_counter()
+natal_chart.compute_chart(1990, 6, 2, 14, 5, 51.5, -0.12, "Europe/London")
+t3 = time.perf_counter()
+print(json.dumps({"init_ms": (t2 - t1) * 1e3, "first_chart_ms": (t3 - t2) * 1e3}))
+"""
+
+
+def cold_start(backend: str, path: str, jpl_file: str | None, preload: bool) -> dict:
+    env = dict(os.environ, EPHEMERIS_BACKEND=backend, SWEPHE_PATH=path,
+               EPHEMERIS_PRELOAD="1" if preload else "0")
+    if jpl_file:
+        env["SWEPHE_JPL_FILE"] = jpl_file
+    out = subprocess.run([sys.executable, "-c", COLD_START], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+
+def run_backend(corpus: list[dict]) -> tuple[list[float], list[dict]]:
+    us, positions = [], []
+    for r in corpus:
+        t0 = time.perf_counter()
+        chart = compute_chart(r["year"], r["month"], r["day"], r["hour"], r["minute"],
+                              r["lat"], r["lon"], r["tz"], r["hsys"], r["time_known"])
+        us.append((time.perf_counter() - t0) * 1e6)
+        positions.append({n: p.lon for n, p in chart["points"].items() if p.lon is not None})
+    return us, positions
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Ephemeris backend benchmark")
+    ap.add_argument("--path", default=os.getenv("SWEPHE_PATH", ""), help="SE/JPL file directory")
+    ap.add_argument("--jpl-file", default=None, help="JPL file name on --path (e.g. de440.eph)")
+    ap.add_argument("--size", type=int, default=3000, help="Corpus size")
+    ap.add_argument("--seed", type=int, default=20240121)
+    ap.add_argument("--tolerance", type=float, default=1.0, help="Largest acceptable error, arcsec")
+    args = ap.parse_args()
+
+    natal_chart.CHART_CACHE = ChartCache(maxsize=0)
+    corpus = build_corpus(args.size, args.seed)
+
+    results = {}
+    for backend in ("moshier", "swiss", "jpl"):
+        if backend == "jpl" and not args.jpl_file:
+            continue
+        try:
+            use_ephemeris_backend(backend, args.path, args.jpl_file)
+        except ValueError as e:
+            print(f"{backend:<8s} skipped: {e}")
+            continue
+        us, positions = run_backend(corpus)
+        results[backend] = {"us": sorted(us), "positions": positions,
+                            "cold": cold_start(backend, args.path, args.jpl_file, True),
+                            "cold_lazy": cold_start(backend, args.path, args.jpl_file, False)}
+    use_ephemeris_backend("auto")
+
+    print(f"\n{len(corpus)} charts")
+    print(f"{'backend':<8s} {'p50 us':>8s} {'p99 us':>8s} {'init ms':>8s} {'1st ms':>7s} "
+          f"{'init ms':>8s} {'1st ms':>7s}")
+    print(f"{'':<8s} {'':>8s} {'':>8s} {'preloaded':>16s} {'lazy':>16s}")
+    for backend, r in results.items():
+        us = r["us"]
+        print(f"{backend:<8s} {us[len(us) // 2]:>8.1f} {us[int(len(us) * 0.99)]:>8.1f} "
+              f"{r['cold']['init_ms']:>8.2f} {r['cold']['first_chart_ms']:>7.2f} "
+              f"{r['cold_lazy']['init_ms']:>8.2f} {r['cold_lazy']['first_chart_ms']:>7.2f}")
+
+    reference = next((b for b in PRECISION_ORDER if b in results and b != "moshier"), None)
+    if reference is None:
+        print("\nNo SE or JPL files on --path: nothing to measure Moshier's accuracy against")
+        return 0
+
+    print(f"\nLongitude difference from {reference}, arcsec (max / rms)")
+    bodies = list(natal_chart.PLANET_IDS)
+    print(f"{'body':<10s} " + " ".join(f"{b:>19s}" for b in results if b != reference))
+    worst = {b: 0.0 for b in results}
+    for body in bodies:
+        cells = []
+        for backend, r in results.items():
+            if backend == reference:
+                continue
+            errs = [abs_ang_diff(p[body], ref[body]) * 3600
+                    for p, ref in zip(r["positions"], results[reference]["positions"])
+                    if body in p and body in ref]
+            if not errs:
+                cells.append(f"{'n/a':>19s}")
+                continue
+            worst[backend] = max(worst[backend], max(errs))
+            rms = math.sqrt(sum(e * e for e in errs) / len(errs))
+            cells.append(f"{max(errs):>9.4f} / {rms:<7.4f}")
+        print(f"{body:<10s} " + " ".join(cells))
+
+    fits = [b for b in results if worst[b] <= args.tolerance]
+    best = min(fits, key=lambda b: results[b]["us"][len(results[b]["us"]) // 2])
+    print(f"\nFastest within {args.tolerance:g}\": EPHEMERIS_BACKEND={best}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
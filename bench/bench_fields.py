@@ -0,0 +1,77 @@
+"""
+Benchmark: /api/chart latency per output profile.
+
+  python3 bench/bench_fields.py
+  python3 bench/bench_fields.py --size 5000 --fields sun_sign,aspects
+
+Posts every record of the bench_pipeline corpus (cache disabled, so each
+request computes its chart) through api_response once per profile in
+RESULT_PROFILES, plus any --fields, and reports request latency and JSON
+size. Every profile's payload must equal the matching keys of a payload
+with every field for the same record.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import natal_chart
+from bench_pipeline import build_corpus
+from natal_chart import RESULT_FIELDS, RESULT_PROFILES, ChartCache, api_response
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="/api/chart output profile benchmark")
+    ap.add_argument("--size", type=int, default=2000, help="Corpus size")
+    ap.add_argument("--seed", type=int, default=20240121)
+    ap.add_argument("--fields", action="append", default=[], help="Extra field list to time")
+    args = ap.parse_args()
+
+    natal_chart.CHART_CACHE = ChartCache(maxsize=0)
+    natal_chart.init_ephemeris()
+    corpus = build_corpus(args.size, args.seed)
+    bodies = [json.dumps(rec).encode() for rec in corpus]
+
+    profiles = ["full_text", *(p for p in RESULT_PROFILES if p != "full_text"), *args.fields]
+    print(f"{'fields':<24s} {'p50 us':>8s} {'p99 us':>8s} {'mean us':>8s} {'bytes':>7s} {'vs full':>8s}")
+    baseline = None
+    for profile in profiles:
+        us, size = [], 0
+        for body in bodies:
+            t0 = time.perf_counter()
+            status, payload = api_response(body, "application/json", profile)
+            us.append((time.perf_counter() - t0) * 1e6)
+            size += len(json.dumps(payload))
+            if status != 200:
+                print(f"{profile}: {status} {payload}", file=sys.stderr)
+                return 1
+        mean = statistics.fmean(us)
+        baseline = baseline or mean
+        q = statistics.quantiles(us, n=100)
+        print(f"{profile:<24s} {q[49]:>8.1f} {q[98]:>8.1f} {mean:>8.1f} {size // len(bodies):>7d} "
+              f"{baseline / mean:>7.2f}x")
+
+    problems = 0
+    every = ",".join(RESULT_FIELDS)
+    for body in bodies[:200]:
+        _, full = api_response(body, "application/json", every)
+        full = json.loads(json.dumps(full))
+        for profile in profiles:
+            _, payload = api_response(body, "application/json", profile)
+            payload = json.loads(json.dumps(payload))
+            problems += any(full[k] != v for k, v in payload.items())
+    print(f"verify  {'OK' if not problems else f'{problems} payloads differ from the full result'}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
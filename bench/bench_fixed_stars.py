@@ -0,0 +1,186 @@
+"""
+Benchmark: fixed-star contacts from the sorted longitude index vs swe.fixstar.
+
+  python3 bench/bench_fixed_stars.py --catalog /path/to/sefstars.txt
+  python3 bench/bench_fixed_stars.py --synthetic 5000 --orb 2
+
+Loads the whole catalog (--catalog, else FIXSTARS_CATALOG or SWEPHE_PATH;
+--max-mag to cut it) or a random one of --synthetic stars, and finds the
+stars within --orb of every ASPECT_BODIES point of the bench_pipeline corpus
+charts. StarCatalog.contacts is timed with its epoch buckets warm and cold,
+and checked against a brute-force scan of every star against every point
+with positions carried to each chart's own instant: the same pairs, orbs
+within 0.01 degree (pairs within 0.001 of the orb limit, and stars within
+a degree of the ecliptic poles, whose longitudes swing, may differ). With a
+real sefstars.txt the index is also timed against swe.fixstar2_ut for every
+star on --fixstar charts (one call per star, compared with all the points),
+and every position must be within 21"/cos(latitude) + 5" of the Swiss
+Ephemeris one (aberration, which the index leaves out). Entries without a
+positive parallax are left out of that check: swe.fixstar2_ut puts the ones
+with a negative catalog parallax (Rasalgethi, Trapezium) about 180 degrees
+away.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+import swisseph as swe
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import natal_chart
+from bench_pipeline import build_corpus
+from fixed_stars import J2000, StarCatalog, _nutation, find_catalog, load_catalog
+from natal_chart import ASPECT_BODIES, ChartCache, compute_chart
+
+
+def synthetic_catalog(n: int, seed: int) -> StarCatalog:
+    """n stars spread uniformly over the sky, with Hipparcos-like proper motions and magnitudes."""
+    rng = random.Random(seed)
+    stars = []
+    for i in range(n):
+        pm = math.radians(rng.gauss(0, 0.1) / 3600)
+        stars.append((f"S{i}", f"S{i}", rng.uniform(0, 2 * math.pi), math.asin(rng.uniform(-1, 1)),
+                      pm, pm * rng.uniform(-1, 1), round(rng.uniform(-1, 6.5), 2)))
+    return StarCatalog(stars)
+
+
+def brute_force(catalog: StarCatalog, points: dict, jd: float, orb: float) -> dict:
+    """{(star index, point): orb} by scanning every star at jd itself (None near the poles)."""
+    lons, lats = catalog.positions(jd)
+    lons = lons + _nutation((jd - J2000) / 36525)
+    found = {}
+    for pname, lon in points.items():
+        d = np.abs((lons - lon + 180.0) % 360.0 - 180.0)
+        for i in np.nonzero(d <= orb + 0.001)[0]:
+            found[(int(i), pname)] = float(d[i])
+    for i in np.nonzero(np.abs(lats) > 89.0)[0]:
+        for pname in points:
+            found[(int(i), pname)] = None
+    return found
+
+
+def parallaxes(path: str) -> dict[str, float]:
+    """{nomenclature: parallax} from a sefstars.txt, first entry per nomenclature."""
+    found = {}
+    with open(path, encoding="latin-1") as f:
+        for line in f:
+            fields = [x.strip() for x in line.split(",")]
+            if not line.startswith("#") and len(fields) >= 14:
+                found.setdefault(fields[1], float(fields[12]))
+    return found
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Fixed-star index benchmark + brute-force check")
+    ap.add_argument("--catalog", default=None, help="sefstars.txt (default: FIXSTARS_CATALOG or SWEPHE_PATH)")
+    ap.add_argument("--synthetic", type=int, default=0, help="Use N random stars instead")
+    ap.add_argument("--max-mag", type=float, default=None)
+    ap.add_argument("--orb", type=float, default=1.0)
+    ap.add_argument("--size", type=int, default=2000, help="Corpus size")
+    ap.add_argument("--seed", type=int, default=20240121)
+    ap.add_argument("--fixstar", type=int, default=20, help="Charts to time swe.fixstar2_ut on")
+    args = ap.parse_args()
+
+    path = None if args.synthetic else args.catalog or find_catalog()
+    t0 = time.perf_counter()
+    if path:
+        catalog = load_catalog(path, args.max_mag)
+    else:
+        catalog = synthetic_catalog(args.synthetic or 1500, args.seed)
+    load_ms = (time.perf_counter() - t0) * 1e3
+
+    natal_chart.CHART_CACHE = ChartCache(maxsize=0)
+    natal_chart.init_ephemeris()
+    charts = []
+    for r in build_corpus(args.size, args.seed):
+        chart = compute_chart(r["year"], r["month"], r["day"], r["hour"], r["minute"],
+                              r["lat"], r["lon"], r["tz"], r["hsys"], r["time_known"])
+        points = {b: chart["points"][b]["lon"] for b in ASPECT_BODIES
+                  if chart["points"].get(b, {}).get("lon") is not None}
+        charts.append((chart["jd"], points))
+
+    cold = []
+    for jd, points in charts:
+        t1 = time.perf_counter()
+        catalog.contacts(points, jd, args.orb)
+        cold.append((time.perf_counter() - t1) * 1e6)
+    warm, results = [], []
+    for jd, points in charts:
+        t1 = time.perf_counter()
+        results.append(catalog.contacts(points, jd, args.orb))
+        warm.append((time.perf_counter() - t1) * 1e6)
+
+    problems, brute_us = [], []
+    index = {nom: i for i, nom in enumerate(catalog.nomenclature)}
+    for (jd, points), found in zip(charts, results):
+        t1 = time.perf_counter()
+        expected = brute_force(catalog, points, jd, args.orb)
+        brute_us.append((time.perf_counter() - t1) * 1e6)
+        got = {(index[c["nomenclature"]], c["point"]): c["orb"] for c in found}
+        for key in got.keys() | expected.keys():
+            exact = expected.get(key)
+            if key in expected and (exact is None or abs(exact - args.orb) <= 0.001):
+                continue
+            if key not in got or exact is None or abs(got[key] - exact) > 0.01:
+                problems.append(f"jd {jd}: {catalog.names[key[0]]} on {key[1]}: "
+                                f"index {got.get(key)}, brute force {exact}")
+
+    fixstar_ms = None
+    if path:
+        swe.set_ephe_path(os.path.dirname(os.path.abspath(path)))
+        plx = parallaxes(path)
+        worst, mismatched, no_parallax, times = 0.0, 0, 0, []
+        for jd, points in charts[:args.fixstar]:
+            t1 = time.perf_counter()
+            hits = []
+            for nom in catalog.nomenclature:
+                xx, name, _ = swe.fixstar2_ut("," + nom, jd, natal_chart.EPHE_FLAG)
+                hits += [p for p, lon in points.items() if abs(natal_chart.ang_diff(xx[0], lon)) <= args.orb]
+            times.append((time.perf_counter() - t1) * 1e3)
+            lons, lats = catalog.positions(jd)
+            lons = lons + _nutation((jd - J2000) / 36525)
+            for i, nom in enumerate(catalog.nomenclature):
+                if plx[nom] <= 0:
+                    no_parallax += 1
+                    continue
+                xx, name, _ = swe.fixstar2_ut("," + nom, jd, natal_chart.EPHE_FLAG)
+                if name.partition(",")[2] != nom:
+                    mismatched += 1  # the lookup landed on another entry of the same designation
+                    continue
+                tol = 21 / math.cos(math.radians(lats[i])) + 5
+                worst = max(worst, abs(natal_chart.ang_diff(lons[i], xx[0])) * 3600 / tol)
+        fixstar_ms = statistics.median(times)
+        if worst > 1:
+            problems.append(f"positions up to {worst:.2f}x the tolerance from swe.fixstar2_ut")
+
+    p50 = statistics.median(warm)
+    print(f"{len(catalog):,} stars ({path or 'synthetic'}), loaded in {load_ms:.1f} ms; "
+          f"{len(charts)} charts, orb {args.orb:g}, {sum(map(len, results)) / len(results):.1f} contacts/chart")
+    print(f"  index (cold)   p50 {statistics.median(cold):8.1f} us  max {max(cold):8.1f} us  "
+          f"({len(catalog._buckets)} epoch buckets)")
+    print(f"  index          p50 {p50:8.1f} us  p99 {sorted(warm)[int(len(warm) * 0.99)]:8.1f} us")
+    print(f"  brute force    p50 {statistics.median(brute_us):8.1f} us  (numpy, every star x point)")
+    if fixstar_ms is not None:
+        print(f"  swe.fixstar2   p50 {fixstar_ms * 1e3:8.1f} us  ({fixstar_ms * 1e3 / p50:,.0f}x, one call per star)")
+        print(f"  positions vs swe.fixstar2_ut: within {worst:.2f} of tolerance "
+              f"({no_parallax // len(times)} stars without parallax, "
+              f"{mismatched // len(times)} other lookups skipped)")
+    for p in problems[:20]:
+        print(f"  {p}")
+    print(f"verify  {'OK' if not problems else f'{len(problems)} problems'}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
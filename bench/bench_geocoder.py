@@ -0,0 +1,129 @@
+"""
+Benchmark: geocoder build size, open time and lookup latency.
+
+  python3 bench/bench_geocoder.py
+  python3 bench/bench_geocoder.py --places cities500.txt --countries countryInfo.txt
+
+Indexes a GeoNames dump (--places), or --synthetic random places when none
+is given, into a temporary file, then times opening it and resolving names:
+exact names, names with accents stripped or added, one-edit typos and
+unknown names (both through the fuzzy path), plus prefix search. Every
+exact and accent query must resolve to a place with that folded name, and
+a typo must resolve to the one known name within one edit of it when there
+is exactly one, and to nothing when there are several.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from geocoder import Geocoder, _edits, build_index, fold, read_country_info, read_geonames
+
+ACCENTS = {"a": "á", "e": "é", "i": "í", "o": "ö", "u": "ü", "c": "ç", "n": "ñ"}
+SYLLABLES = ["ba", "ko", "ri", "san", "ta", "mel", "dor", "vi", "lu", "na", "port", "ham",
+             "burg", "ville", "ton", "ka", "zi", "pe", "lo", "ma", "nor", "sta", "gra", "do"]
+ZONES = ["Europe/London", "Europe/Paris", "America/New_York", "America/Sao_Paulo",
+         "Asia/Tokyo", "Australia/Sydney", "Pacific/Auckland", "Africa/Lagos"]
+
+
+def synthetic_places(n: int, rng: random.Random):
+    """GeoNames-shaped places with made-up names, some of them accented."""
+    for _ in range(n):
+        words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+                 for _ in range(rng.choice((1, 1, 1, 2)))]
+        name = " ".join(w.title() for w in words)
+        if rng.random() < 0.2:
+            name = "".join(ACCENTS.get(c, c) if rng.random() < 0.3 else c for c in name)
+        yield (name, rng.choice(["NZ", "AU", "GB", "FR", "BR", "US"]),
+               rng.uniform(-60, 70), rng.uniform(-180, 180), rng.choice(ZONES),
+               int(rng.paretovariate(1.2) * 500), ())
+
+
+def typo(key: str, rng: random.Random) -> str:
+    i = rng.randrange(len(key))
+    return key[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + key[i + 1:]
+
+
+def timed(fn, queries) -> tuple[list, list[float]]:
+    results, us = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append(fn(q))
+        us.append((time.perf_counter() - t0) * 1e6)
+    return results, us
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Geocoder benchmark")
+    ap.add_argument("--places", default=None, help="GeoNames citiesNNN.txt")
+    ap.add_argument("--countries", default=None, help="GeoNames countryInfo.txt")
+    ap.add_argument("--synthetic", type=int, default=200_000, help="Random places if no --places")
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=20240121)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    t0 = time.perf_counter()
+    if args.places:
+        source = list(read_geonames(args.places))
+        countries = read_country_info(args.countries) if args.countries else None
+    else:
+        source = list(synthetic_places(args.synthetic, rng))
+        countries = None
+    data = build_index(source, countries)
+    build_s = time.perf_counter() - t0
+
+    with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as f:
+        f.write(data)
+    try:
+        t0 = time.perf_counter()
+        geo = Geocoder(f.name)
+        open_ms = (time.perf_counter() - t0) * 1e3
+        print(f"index   {geo.places:,} places, {geo.keys:,} names, {len(data) / 1024 / 1024:.1f} MiB, "
+              f"built in {build_s:.1f}s, opened in {open_ms:.2f} ms")
+
+        names = [p[0] for p in rng.sample(source, min(args.queries, len(source)))]
+        keys = [fold(n) for n in names]
+        sets = {
+            "exact": names,
+            "accents": ["".join(ACCENTS.get(c, c) for c in n) for n in names],
+            "upper": [fold(n).upper() for n in names],
+            "typo": [typo(k, rng) for k in keys],
+            "unknown": ["qqx" + k for k in keys],
+        }
+        problems = 0
+        print(f"{'queries':<8s} {'found':>6s} {'p50 us':>8s} {'p99 us':>8s} {'max us':>8s}")
+        for label, queries in sets.items():
+            results, us = timed(lambda q: geo.lookup(q, fuzzy=label in ("typo", "unknown")), queries)
+            found = sum(r is not None for r in results)
+            for key, q, r in zip(keys, queries, results):
+                if label == "typo":
+                    near = {fold(q)} if geo.lookup(q) else {e for e in _edits(fold(q)) if geo.lookup(e)}
+                    problems += (fold(r.name) not in near or len(near) != 1) if r else len(near) == 1
+                elif label != "unknown":
+                    problems += r is None or fold(r.name) != key
+            q = statistics.quantiles(us, n=100)
+            print(f"{label:<8s} {found:>6d} {q[49]:>8.1f} {q[98]:>8.1f} {max(us):>8.1f}")
+
+        _, us = timed(lambda k: geo.search(k, 10), [k[:3] for k in keys])
+        q = statistics.quantiles(us, n=100)
+        print(f"{'prefix':<8s} {'':>6s} {q[49]:>8.1f} {q[98]:>8.1f} {max(us):>8.1f}")
+        geo.close()
+    finally:
+        os.unlink(f.name)
+
+    print(f"verify  {'OK' if not problems else f'{problems} wrong results'}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
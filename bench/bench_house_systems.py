@@ -0,0 +1,72 @@
+"""
+Benchmark: several house systems in one chart vs one chart per system.
+
+  python3 bench/bench_house_systems.py
+  python3 bench/bench_house_systems.py --systems P,W --size 5000
+
+For each record of the bench_pipeline corpus (cache disabled), computes one
+compute_chart per house system and one compute_chart with all of them, and
+reports the time per record both ways. Every system's cusps and placements
+in the combined chart must match its own chart (cusps to 1e-9 degrees,
+since houses_armc and houses round differently in the last bits).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import natal_chart
+from bench_pipeline import build_corpus
+from natal_chart import ChartCache, compute_chart, house_systems
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Multi-house-system benchmark")
+    ap.add_argument("--systems", default="P,W,K,E")
+    ap.add_argument("--size", type=int, default=2000, help="Corpus size")
+    ap.add_argument("--seed", type=int, default=20240121)
+    args = ap.parse_args()
+
+    natal_chart.CHART_CACHE = ChartCache(maxsize=0)
+    natal_chart.init_ephemeris()
+    systems = house_systems(args.systems)
+    corpus = [r for r in build_corpus(args.size, args.seed) if r["time_known"]]
+
+    separate_us, combined_us, problems = [], [], 0
+    for r in corpus:
+        birth = (r["year"], r["month"], r["day"], r["hour"], r["minute"], r["lat"], r["lon"], r["tz"])
+        t0 = time.perf_counter()
+        singles = [compute_chart(*birth, code) for code in systems]
+        t1 = time.perf_counter()
+        combined = compute_chart(*birth, systems)
+        t2 = time.perf_counter()
+        separate_us.append((t1 - t0) * 1e6)
+        combined_us.append((t2 - t1) * 1e6)
+
+        for code, single in zip(systems, singles):
+            if single["is_day_chart"] != combined["is_day_chart"]:
+                continue  # Part of Fortune follows the primary system's sect
+            got = combined["houses"][code]
+            placements = {n: p.house for n, p in single["points"].items() if p.error is None}
+            if got["placements"] != placements or any(
+                    abs(a - b) > 1e-9 for a, b in zip(got["cusps"], single["house_cusps"])):
+                problems += 1
+
+    sep, comb = statistics.median(separate_us), statistics.median(combined_us)
+    print(f"{len(corpus)} charts, systems {','.join(systems)}")
+    print(f"  one chart per system   p50 {sep:8.1f} us")
+    print(f"  one chart, all systems p50 {comb:8.1f} us  ({sep / comb:.2f}x)")
+    print(f"verify  {'OK' if not problems else f'{problems} systems differ'}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+"""
+Benchmark: house placement by cusp search vs swe.house_pos.
+
+  python3 bench/bench_houses.py
+  python3 bench/bench_houses.py --size 5000 --systems PKRCEWB --near 1e-6 --near 1e-3
+
+For each record of the bench_pipeline corpus, and each --systems code, takes
+the chart's cusps and places its points, plus probes on and --near degrees
+either side of every cusp, three ways: swe.house_pos per point (what compute_chart
+used to do), cusp_search per point, and houses_of over the whole corpus as
+one array operation. Reports the cost per point of each. houses_of must
+match cusp_search everywhere; house_pos recomputes the cusps with its own
+rounding, so a disagreement with it within --tolerance degrees of a cusp is
+only counted, and any further out is a failure. Charts whose cusps
+cusp_search rejects (house_pos is kept for those) are counted separately.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import numpy as np
+import swisseph as swe
+
+from bench_pipeline import build_corpus
+from natal_chart import (
+    PLANET_IDS, UTC, abs_ang_diff, cusp_search, get_zone, houses_of, init_ephemeris, julday_ut, norm360,
+)
+
+NEAR = [1e-9, 1e-7, 3e-7, 1e-6, 1e-5, 1e-3]
+
+
+def sky(rec: dict, code: str):
+    """(armc, lat, eps, cusps, point longitudes) for one record and system."""
+    dt = datetime(rec["year"], rec["month"], rec["day"], rec["hour"], rec["minute"],
+                  tzinfo=get_zone(rec["tz"])).astimezone(UTC)
+    jd = julday_ut(dt)
+    cusps, ascmc = swe.houses(jd, rec["lat"], rec["lon"], code.encode("ascii"))
+    eps = swe.calc_ut(jd, swe.ECL_NUT, swe.FLG_MOSEPH)[0][0]
+    lons = []
+    for pid in PLANET_IDS.values():
+        try:
+            lons.append(swe.calc_ut(jd, pid, 0)[0][0])
+        except swe.Error:
+            pass
+    return ascmc[2], rec["lat"], eps, [norm360(c) for c in cusps[:12]], lons
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="House placement benchmark + house_pos cross-check")
+    ap.add_argument("--size", type=int, default=2000, help="Corpus size")
+    ap.add_argument("--seed", type=int, default=20240121)
+    ap.add_argument("--systems", default="PKORCEWBMT")
+    ap.add_argument("--near", type=float, action="append", default=None,
+                    help="Probe this far either side of each cusp (repeatable)")
+    ap.add_argument("--tolerance", type=float, default=2e-6,
+                    help="Disagreements with house_pos this close to a cusp are not failures")
+    args = ap.parse_args()
+    near = args.near or NEAR
+
+    init_ephemeris()
+    corpus = build_corpus(args.size, args.seed)
+    skies, rejected = [], 0
+    for code in args.systems:
+        for rec in corpus:
+            try:
+                armc, lat, eps, cusps, lons = sky(rec, code)
+            except swe.Error:
+                continue
+            if cusp_search(cusps) is None:
+                rejected += 1
+                continue
+            probes = [c + d for c in cusps for n in near for d in (-n, 0.0, n)]
+            skies.append((code, armc, lat, eps, cusps, [norm360(x) for x in lons + probes]))
+
+    points = sum(len(s[5]) for s in skies)
+    t0 = time.perf_counter()
+    ref = [[int(swe.house_pos(armc, lat, eps, (x, 0.0), code.encode("ascii"))) for x in lons]
+           for code, armc, lat, eps, _, lons in skies]
+    t1 = time.perf_counter()
+    got = []
+    for _, _, _, _, cusps, lons in skies:
+        find = cusp_search(cusps)
+        got.append([find(x) for x in lons])
+    t2 = time.perf_counter()
+    width = max(len(s[5]) for s in skies)
+    lon_arr = np.full((len(skies), width), np.nan)
+    for i, s in enumerate(skies):
+        lon_arr[i, :len(s[5])] = s[5]
+    cusp_arr = np.array([s[4] for s in skies])
+    t3 = time.perf_counter()
+    batch = houses_of(lon_arr, cusp_arr)
+    t4 = time.perf_counter()
+
+    print(f"{len(skies)} charts x systems {args.systems}, {points} placements, "
+          f"{rejected} charts left to house_pos")
+    print(f"  house_pos     {(t1 - t0) / points * 1e9:7.0f} ns/point")
+    print(f"  cusp_search   {(t2 - t1) / points * 1e9:7.0f} ns/point")
+    print(f"  houses_of     {(t4 - t3) / points * 1e9:7.0f} ns/point")
+
+    problems, edges = [], []
+    for i, (code, _, _, _, cusps, lons) in enumerate(skies):
+        for j, x in enumerate(lons):
+            h = got[i][j]
+            if h != batch[i, j]:
+                problems.append(f"{code} {x:.9f}: houses_of {batch[i, j]} != cusp_search {h}")
+            if h != ref[i][j]:
+                edge = min(abs_ang_diff(x, c) for c in cusps)
+                edges.append(edge)
+                if edge > args.tolerance:
+                        problems.append(f"{code} {x:.9f}: cusp_search {h} != house_pos {ref[i][j]}, "
+                                    f"{edge:.2e}° from a cusp")
+    if edges:
+        print(f"  house_pos   {len(edges)} placements differ, all within {max(edges):.2e}° of a cusp"
+              if max(edges) <= args.tolerance else
+              f"  house_pos   {len(edges)} placements differ, up to {max(edges):.2e}° from a cusp")
+    for p in problems[:20]:
+        print(f"  {p}")
+    print(f"verify  {'OK' if not problems else f'{len(problems)} disagreements'}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
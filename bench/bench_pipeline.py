@@ -0,0 +1,217 @@
+"""
+Benchmark and golden-correctness suite for the chart pipeline.
+
+  python3 bench/bench_pipeline.py                        # time + check golden
+  python3 bench/bench_pipeline.py --json results.json    # also save results
+  python3 bench/bench_pipeline.py --compare results.json # diff against a saved run
+  python3 bench/bench_pipeline.py --update-golden        # re-pin outputs
+
+Runs a fixed, seeded corpus of births (cities from CITIES, several house
+systems, ~20% unknown birth times) through compute_chart, compute_aspects,
+detect_configurations, analyze_chart and format_output with the chart cache
+disabled. Reports per-stage latency percentiles and charts/sec, and checks
+every record's full /api/chart payload against bench/golden.json, so a fast
+path can be shown to be both faster and byte-identical. Exits 1 on any
+golden mismatch.
+"""
+
+from __future__ import annotations
+
+import argparse
+import calendar
+import hashlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import swisseph as swe
+
+import natal_chart
+from natal_chart import (
+    CITIES, ChartCache, analyze_chart, chart_result, compute_aspects, compute_chart,
+    detect_configurations, format_output,
+)
+
+GOLDEN_PATH = os.path.join(ROOT, "bench", "golden.json")
+STAGES = ["compute_chart", "compute_aspects", "detect_configurations", "analyze_chart", "format_output"]
+HOUSE_SYSTEMS = ["P", "P", "P", "W", "E", "K", "R"]   # Placidus-weighted, as in production
+
+
+def build_corpus(size: int, seed: int) -> list[dict]:
+    """Deterministic list of birth records; same (size, seed) -> same corpus."""
+    rng = random.Random(seed)
+    cities = sorted(CITIES)
+    corpus = []
+    for i in range(size):
+        year, month = rng.randint(1900, 2030), rng.randint(1, 12)
+        lat, lon, tz = CITIES[rng.choice(cities)]
+        time_known = rng.random() >= 0.2
+        corpus.append({
+            "name": f"Person {i}",
+            "year": year,
+            "month": month,
+            "day": rng.randint(1, calendar.monthrange(year, month)[1]),
+            "hour": rng.randint(0, 23) if time_known else 12,
+            "minute": rng.randint(0, 59) if time_known else 0,
+            "lat": lat, "lon": lon, "tz": tz,
+            "hsys": rng.choice(HOUSE_SYSTEMS),
+            "time_known": time_known,
+        })
+    return corpus
+
+
+def record_digest(rec: dict) -> str:
+    """Short hash of the full /api/chart payload for one record."""
+    chart = compute_chart(rec["year"], rec["month"], rec["day"], rec["hour"], rec["minute"],
+                          rec["lat"], rec["lon"], rec["tz"], rec["hsys"], rec["time_known"])
+    payload = json.dumps(chart_result(rec["name"], chart), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def percentile(sorted_vals: list[float], q: float) -> float:
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+
+def time_pipeline(corpus: list[dict]) -> tuple[dict, float]:
+    timings: dict[str, list[float]] = {s: [] for s in STAGES}
+    clock = time.perf_counter
+    t_start = clock()
+    for rec in corpus:
+        t0 = clock()
+        chart = compute_chart(rec["year"], rec["month"], rec["day"], rec["hour"], rec["minute"],
+                              rec["lat"], rec["lon"], rec["tz"], rec["hsys"], rec["time_known"])
+        t1 = clock()
+        aspects = compute_aspects(chart["points"])
+        t2 = clock()
+        configs = detect_configurations(aspects, chart["points"])
+        t3 = clock()
+        analysis = analyze_chart(chart)
+        t4 = clock()
+        format_output(rec["name"], chart, analysis, aspects, configs)
+        t5 = clock()
+        for stage, dt in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+            timings[stage].append(dt * 1e6)
+    elapsed = clock() - t_start
+
+    stats = {}
+    for stage, vals in timings.items():
+        vals.sort()
+        stats[stage] = {
+            "mean_us": sum(vals) / len(vals),
+            "p50_us": percentile(vals, 0.50),
+            "p90_us": percentile(vals, 0.90),
+            "p99_us": percentile(vals, 0.99),
+            "max_us": vals[-1],
+        }
+    return stats, len(corpus) / elapsed
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ephemeris_source() -> str:
+    _, ret = swe.calc_ut(2451545.0, swe.SUN, swe.FLG_SPEED)
+    return "moshier" if ret & swe.FLG_MOSEPH else "jpl" if ret & swe.FLG_JPLEPH else "swiss"
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Chart pipeline benchmark + golden check")
+    ap.add_argument("--size", type=int, default=3000, help="Corpus size")
+    ap.add_argument("--seed", type=int, default=20240121)
+    ap.add_argument("--json", default=None, help="Write results to this file")
+    ap.add_argument("--compare", default=None, help="Previous --json results to diff against")
+    ap.add_argument("--golden", default=GOLDEN_PATH)
+    ap.add_argument("--update-golden", action="store_true")
+    ap.add_argument("--skip-golden", action="store_true")
+    args = ap.parse_args()
+
+    # Every chart must be computed, not served from the cache
+    natal_chart.CHART_CACHE = ChartCache(maxsize=0)
+    natal_chart.init_ephemeris()
+    corpus = build_corpus(args.size, args.seed)
+
+    stats, rate = time_pipeline(corpus)
+    print(f"{len(corpus)} charts, {rate:,.0f} charts/s (all stages)\n")
+    print(f"{'stage':<24s} {'mean us':>9s} {'p50 us':>9s} {'p90 us':>9s} {'p99 us':>9s} {'max us':>9s}")
+    for stage, s in stats.items():
+        print(f"{stage:<24s} {s['mean_us']:>9.1f} {s['p50_us']:>9.1f} {s['p90_us']:>9.1f} "
+              f"{s['p99_us']:>9.1f} {s['max_us']:>9.1f}")
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "swisseph": swe.version,
+            "ephemeris": ephemeris_source(),
+            "size": args.size,
+            "seed": args.seed,
+        },
+        "charts_per_sec": rate,
+        "stages": stats,
+    }
+
+    if args.compare:
+        with open(args.compare) as f:
+            prev = json.load(f)
+        print(f"\nvs {args.compare} ({prev['meta'].get('commit')}):")
+        print(f"  charts/s  {prev['charts_per_sec']:,.0f} -> {rate:,.0f} "
+              f"({rate / prev['charts_per_sec']:.2f}x)")
+        for stage, s in stats.items():
+            old = prev["stages"].get(stage)
+            if old:
+                print(f"  {stage:<24s} p50 {old['p50_us']:.1f} -> {s['p50_us']:.1f} us")
+
+    status = 0
+    if not args.skip_golden:
+        digests = [record_digest(rec) for rec in corpus]
+        snapshot = {
+            "size": args.size, "seed": args.seed, "ephemeris": results["meta"]["ephemeris"],
+            "digest": hashlib.sha256("".join(digests).encode()).hexdigest(),
+            "records": digests,
+        }
+        if args.update_golden:
+            with open(args.golden, "w") as f:
+                json.dump(snapshot, f, indent=0)
+                f.write("\n")
+            print(f"\nGolden snapshot written to {args.golden}")
+            results["golden"] = "updated"
+        else:
+            with open(args.golden) as f:
+                golden = json.load(f)
+            if (golden["size"], golden["seed"]) != (args.size, args.seed):
+                print(f"\nGolden was pinned for size={golden['size']} seed={golden['seed']}; "
+                      f"rerun with those or --update-golden", file=sys.stderr)
+                return 1
+            if golden["ephemeris"] != snapshot["ephemeris"]:
+                print(f"\nWarning: golden pinned with {golden['ephemeris']} ephemeris, "
+                      f"running with {snapshot['ephemeris']}", file=sys.stderr)
+            bad = [i for i, (a, b) in enumerate(zip(golden["records"], digests)) if a != b]
+            if bad:
+                print(f"\nGOLDEN MISMATCH: {len(bad)} of {len(digests)} records differ "
+                      f"(first: {bad[:10]})", file=sys.stderr)
+                results["golden"] = {"mismatches": bad}
+                status = 1
+            else:
+                print(f"\nGolden: all {len(digests)} records byte-identical")
+                results["golden"] = "ok"
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,93 @@
+"""
+Benchmark: cost of the profiling mode, on and off.
+
+  CHART_PROFILE=1 python3 bench/bench_profile.py
+  CHART_PROFILE=1 python3 bench/bench_profile.py --size 500 --fields teaser
+
+Runs single-record api_response calls over the bench_pipeline corpus
+(cache disabled) without a profile, then with "profile": true, and reports
+p50 latency both ways. Unprofiled requests must leave cProfile unimported.
+Each profiled report must account for every stage the fields need exactly
+once, put all of its swisseph time under compute_chart (nothing else calls
+swisseph), and have Python and swisseph time adding up to the total.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import natal_chart
+from bench_pipeline import build_corpus
+from natal_chart import PROFILE_STAGES, ChartCache, api_response, resolve_fields
+
+# Stages each pipeline stage name (RESULT_FIELDS) shows up as in a report
+REPORTED = {"aspects": "compute_aspects", "configurations": "detect_configurations",
+            "analysis": "analyze_chart", "stars": "star_contacts", "format": "format_output"}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Profiling mode benchmark")
+    ap.add_argument("--size", type=int, default=1000, help="Corpus size")
+    ap.add_argument("--seed", type=int, default=20240121)
+    ap.add_argument("--fields", default="full_text")
+    args = ap.parse_args()
+    if not natal_chart.PROFILE_REQUESTS:
+        print("Set CHART_PROFILE=1 to allow profiled requests", file=sys.stderr)
+        return 1
+
+    natal_chart.CHART_CACHE = ChartCache(maxsize=0)
+    natal_chart.init_ephemeris()
+    bodies = [json.dumps({**r, "name": "Bench", "fields": args.fields}).encode()
+              for r in build_corpus(args.size, args.seed) if r["time_known"]]
+    wanted = {"compute_chart"} | {REPORTED[s] for f in resolve_fields(args.fields)
+                                  for s in natal_chart.RESULT_FIELDS[f]}
+
+    plain = []
+    for body in bodies:
+        t0 = time.perf_counter()
+        api_response(body)
+        plain.append((time.perf_counter() - t0) * 1e6)
+    problems = []
+    if "cProfile" in sys.modules:
+        problems.append("cProfile imported by unprofiled requests")
+
+    profiled = []
+    for body in bodies:
+        body = body[:-1] + b', "profile": true}'
+        t0 = time.perf_counter()
+        status, payload = api_response(body)
+        profiled.append((time.perf_counter() - t0) * 1e6)
+        report = payload.get("profile")
+        if status != 200 or report is None:
+            problems.append(f"profiled request failed: {status} {payload.get('error')}")
+            continue
+        calls = {s: v["calls"] for s, v in report["stages"].items()}
+        if calls != {s: int(s in wanted) for s in PROFILE_STAGES}:
+            problems.append(f"stage calls {calls}")
+        if abs(report["stages"]["compute_chart"]["swisseph_ms"] - report["swisseph_ms"]) > 0.002:
+            problems.append(f"swisseph {report['swisseph_ms']} ms, "
+                            f"{report['stages']['compute_chart']['swisseph_ms']} ms under compute_chart")
+        if abs(report["python_ms"] + report["swisseph_ms"] - report["total_ms"]) > 0.002:
+            problems.append("Python + swisseph != total")
+
+    p50, p50_prof = statistics.median(plain), statistics.median(profiled)
+    print(f"{len(bodies)} requests, fields {args.fields}")
+    print(f"  unprofiled  p50 {p50:8.1f} us")
+    print(f"  profiled    p50 {p50_prof:8.1f} us  ({p50_prof / p50:.1f}x, cProfile and report)")
+    for p in problems[:20]:
+        print(f"  {p}")
+    print(f"verify  {'OK' if not problems else f'{len(problems)} problems'}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
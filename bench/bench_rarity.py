@@ -0,0 +1,117 @@
+"""
+Benchmark: chart rarity lookup vs sampling charts on demand.
+
+  python3 bench/bench_rarity.py
+  python3 bench/bench_rarity.py --from-year 1980 --to-year 1990 --table data/rarity.bin
+
+Builds a rarity table over a small grid (--from-year to --to-year, --step
+hours) once in-process and once on a two-worker pool, which must produce
+the same bytes, and reports build cost per chart. Every grid chart is then
+recomputed through compute_chart and chart_stages: the table's counts must
+equal a direct count of its features, and each chart's rarity index must be
+within 0.2 of its exact percentile among the grid charts, both as cast and
+scored as if its birth time were unknown (Sun–Moon pair, no Rising sign),
+the way a time-unknown chart is ranked. Finally times
+RarityTable.score on bench_pipeline corpus charts (stages already computed)
+against computing the stages of --sample charts, what answering the same
+question on demand would take, using --table instead of the small grid's
+table if given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from bisect import bisect_left
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import natal_chart
+from bench_pipeline import build_corpus
+from natal_chart import ChartCache, chart_stages, compute_chart
+from rarity import FAMILIES, RarityTable, _surprisal, build_table, chart_features, grid
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Rarity table benchmark + direct-count check")
+    ap.add_argument("--from-year", type=int, default=2000)
+    ap.add_argument("--to-year", type=int, default=2003)
+    ap.add_argument("--step", type=float, default=6.1)
+    ap.add_argument("--table", default=None, help="Score against this table instead")
+    ap.add_argument("--size", type=int, default=2000, help="Corpus size for scoring")
+    ap.add_argument("--seed", type=int, default=20240121)
+    ap.add_argument("--sample", type=int, default=1000, help="Charts an on-demand estimate would sample")
+    args = ap.parse_args()
+
+    natal_chart.CHART_CACHE = ChartCache(maxsize=0)
+    natal_chart.init_ephemeris()
+    samples = list(grid((args.from_year, args.to_year), args.step))
+    t0 = time.perf_counter()
+    data = build_table(samples)
+    t1 = time.perf_counter()
+    pooled = build_table(samples, workers=2, chunk=500)
+    table = RarityTable(data=data)
+    problems = []
+    if pooled != data:
+        problems.append("two-worker build differs from the in-process build")
+
+    counts = {f: Counter() for f in FAMILIES}
+    feats = []
+    for dt, lat, lon in samples:
+        chart = compute_chart(dt.year, dt.month, dt.day, dt.hour, dt.minute, lat, lon, "UTC")
+        f = chart_features(chart, *chart_stages(chart))
+        for family, keys in f.items():
+            counts[family].update(keys)
+        feats.append(f)
+    for family in FAMILIES:
+        if dict(counts[family]) != table.counts[family]:
+            problems.append(f"{family}: table counts differ from a direct count")
+    worst = 0.0
+    for time_known in (True, False):
+        untimed = [f if time_known else {**f, "big_three": []} for f in feats]
+        scores = sorted(_surprisal(f, table.share) for f in untimed)
+        for f in untimed:
+            s = _surprisal(f, table.share)
+            exact = 100.0 * bisect_left(scores, s) / len(scores)
+            worst = max(worst, abs(table.index(s, time_known) - exact))
+    if worst > 0.2:
+        problems.append(f"rarity index up to {worst:.2f} from the exact percentile")
+
+    if args.table:
+        table = RarityTable(args.table)
+    corpus = build_corpus(args.size, args.seed)
+    charts = []
+    for r in corpus:
+        chart = compute_chart(r["year"], r["month"], r["day"], r["hour"], r["minute"],
+                              r["lat"], r["lon"], r["tz"], r["hsys"], r["time_known"])
+        charts.append((chart, chart_stages(chart)))
+    us = []
+    for chart, stages in charts:
+        t2 = time.perf_counter()
+        table.score(chart, *stages)
+        us.append((time.perf_counter() - t2) * 1e6)
+    t3 = time.perf_counter()
+    for dt, lat, lon in samples[:args.sample]:
+        chart_stages(compute_chart(dt.year, dt.month, dt.day, dt.hour, dt.minute, lat, lon, "UTC"))
+    sample_ms = (time.perf_counter() - t3) * 1e3 * args.sample / min(args.sample, len(samples))
+
+    print(f"grid {args.from_year}-{args.to_year - 1} every {args.step:g}h: {len(samples):,} "
+          f"charts, build {(t1 - t0) / len(samples) * 1e6:.0f} us/chart, {len(data) / 1024:.0f} KiB")
+    print(f"  score          p50 {statistics.median(us):8.1f} us  p99 {sorted(us)[int(len(us) * 0.99)]:8.1f} us")
+    print(f"  sample {args.sample:<6d}  {sample_ms:8.1f} ms per chart scored on demand "
+          f"({sample_ms * 1e3 / statistics.median(us):,.0f}x)")
+    print(f"  index vs exact percentile: within {worst:.3f}")
+    for p in problems:
+        print(f"  {p}")
+    print(f"verify  {'OK' if not problems else f'{len(problems)} problems'}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,145 @@
+"""
+Benchmark: solar and lunar return search, checked against brute-force sampling.
+
+  python3 bench/bench_returns.py
+  python3 bench/bench_returns.py --size 500 --year 2027 --brute-step 0.1
+
+For each record of the bench_pipeline corpus (birth time known, cache
+disabled), finds the solar return and every lunar return of --year. Times
+the Newton search alone (return_times), the same search by sampling the
+Moon every --brute-step days and bisecting each crossing, and whole
+year_returns calls building teaser and full_text payloads. Every return
+must have the body within 1e-6 degrees of its natal longitude on the
+ephemeris and within 1" in its chart (cast to the second); the lunar
+returns must be exactly the crossings sampling finds, and the solar return
+must fall within two days of the birthday.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import swisseph as swe
+
+import natal_chart
+from bench_pipeline import build_corpus
+from natal_chart import (
+    ChartCache, abs_ang_diff, ang_diff, chart_result, compute_chart, get_zone,
+    julday_ut, resolve_fields,
+)
+from returns import return_times, year_returns
+
+
+def moon_lon(jd: float) -> float:
+    return swe.calc_ut(jd, swe.MOON, natal_chart.EPHE_FLAG)[0][0]
+
+
+def brute_force(target: float, jd0: float, jd1: float, step: float) -> list[float]:
+    """Moon crossings of target in [jd0, jd1) from fixed-step sampling and bisection."""
+    hits = []
+    t, prev = jd0, ang_diff(moon_lon(jd0), target)
+    while t < jd1:
+        t_next = min(t + step, jd1)
+        d = ang_diff(moon_lon(t_next), target)
+        if prev < 0 <= d:
+            lo, hi = t, t_next
+            while hi - lo > 1e-7:
+                mid = (lo + hi) / 2
+                if ang_diff(moon_lon(mid), target) < 0:
+                    lo = mid
+                else:
+                    hi = mid
+            hits.append(lo)
+        t, prev = t_next, d
+    return hits
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Solar/lunar return benchmark + brute-force check")
+    ap.add_argument("--size", type=int, default=300, help="Corpus size")
+    ap.add_argument("--seed", type=int, default=20240121)
+    ap.add_argument("--year", type=int, default=2026)
+    ap.add_argument("--brute-step", type=float, default=0.25, help="Sampling step, days")
+    args = ap.parse_args()
+
+    natal_chart.CHART_CACHE = ChartCache(maxsize=0)
+    natal_chart.init_ephemeris()
+    corpus = [r for r in build_corpus(args.size, args.seed) if r["time_known"]]
+    natal = [compute_chart(r["year"], r["month"], r["day"], r["hour"], r["minute"],
+                           r["lat"], r["lon"], r["tz"], r["hsys"]) for r in corpus]
+
+    newton_s = brute_s = 0.0
+    lunar_count = 0
+    problems = []
+    for r, chart in zip(corpus, natal):
+        zone = get_zone(r["tz"])
+        jd0 = julday_ut(datetime(args.year, 1, 1, tzinfo=zone).astimezone(natal_chart.UTC))
+        jd1 = julday_ut(datetime(args.year + 1, 1, 1, tzinfo=zone).astimezone(natal_chart.UTC))
+        target = chart["points"]["Moon"]["lon"]
+        t0 = time.perf_counter()
+        hits = return_times(target, "Moon", jd0, jd1)
+        t1 = time.perf_counter()
+        ref = brute_force(target, jd0, jd1, args.brute_step)
+        t2 = time.perf_counter()
+        newton_s += t1 - t0
+        brute_s += t2 - t1
+        lunar_count += len(hits)
+
+        label = f"{r['year']}-{r['month']:02d}-{r['day']:02d} {r['tz']}"
+        if len(hits) != len(ref) or any(abs(jd - b) > 1e-5 for (jd, _), b in zip(hits, ref)):
+            problems.append(f"{label}: {len(hits)} lunar returns, sampling finds {len(ref)}")
+        for jd, _ in hits:
+            err = abs_ang_diff(moon_lon(jd), target)
+            if err > 1e-6:
+                problems.append(f"{label}: lunar return {jd:.6f} off by {err:.2e}°")
+
+    def timed_year(fields) -> list[float]:
+        wanted = resolve_fields(fields)
+        us = []
+        for chart in natal:
+            t0 = time.perf_counter()
+            for kind in ("solar", "lunar"):
+                for ret in year_returns(chart, kind, args.year):
+                    chart_result("Return", ret["chart"], wanted)
+            us.append((time.perf_counter() - t0) * 1e6)
+        return us
+
+    for chart in natal:
+        for kind, body in (("solar", "Sun"), ("lunar", "Moon")):
+            rets = year_returns(chart, kind, args.year)
+            target = chart["points"][body]["lon"]
+            for ret in rets:
+                err = abs_ang_diff(ret["chart"]["points"][body]["lon"], target) * 3600
+                if err > 1.0:
+                    problems.append(f"{chart['dt_utc']:%Y-%m-%d}: {kind} return chart {body} off by {err:.2f}\"")
+            if kind == "solar":
+                born = chart["dt_utc"]
+                birthday = born.replace(year=args.year, day=min(born.day, 28) if born.month == 2 else born.day)
+                if len(rets) != 1 or abs(rets[0]["exact"] - birthday) > timedelta(days=2):
+                    problems.append(f"{born:%Y-%m-%d}: {len(rets)} solar returns near the birthday")
+    teaser_us, full_us = timed_year("teaser"), timed_year("full_text")
+
+    print(f"{len(corpus)} charts, year {args.year}: {lunar_count} lunar returns "
+          f"({lunar_count / len(corpus):.2f} per chart)")
+    print(f"  Newton search     {newton_s / lunar_count * 1e6:8.1f} us/return")
+    print(f"  sample + bisect   {brute_s / lunar_count * 1e6:8.1f} us/return  "
+          f"({brute_s / newton_s:.0f}x slower, step {args.brute_step:g} d)")
+    print(f"  solar + lunar year, teaser     p50 {statistics.median(teaser_us) / 1e3:7.2f} ms/chart")
+    print(f"  solar + lunar year, full_text  p50 {statistics.median(full_us) / 1e3:7.2f} ms/chart")
+    for p in problems[:20]:
+        print(f"  {p}")
+    print(f"verify  {'OK' if not problems else f'{len(problems)} problems'}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+"""
+Benchmark: /api/chart requests/s and latency under concurrent load.
+
+  python3 bench/bench_server.py
+  python3 bench/bench_server.py --concurrency 1 8 32 128 --duration 10 --workers 4
+
+Starts each server in a subprocess on a free port, with the chart cache
+disabled so every request computes a chart:
+  baseline    api/chart.py's handler under http.server.HTTPServer, one
+              request at a time, a new connection per request (HTTP/1.0)
+  chart_server  asyncio front end + --workers processes, keep-alive
+Then, for each --concurrency, that many clients each keep one connection
+open and POST bench_pipeline records back to back for --duration seconds.
+Reports requests/s, latency percentiles, 503s (chart_server's backpressure)
+and failed requests (refused or reset connections, other statuses).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+from bench_pipeline import build_corpus
+
+BASELINE = (
+    "import sys; sys.path.insert(0, {api!r}); import chart; "
+    "from http.server import HTTPServer; "
+    "s = HTTPServer(('127.0.0.1', 0), chart.handler); "
+    "print('listening on http://127.0.0.1:%d' % s.server_address[1], file=sys.stderr, flush=True); "
+    "s.serve_forever()"
+)
+
+
+def start_server(cmd: list[str]) -> tuple[subprocess.Popen, int]:
+    env = dict(os.environ, CHART_CACHE_SIZE="0", CHART_METRICS="0")
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stderr=subprocess.PIPE, text=True)
+    for line in proc.stderr:
+        m = re.search(r"listening on http://[\d.]+:(\d+)", line)
+        if m:
+            # Keep draining stderr (access logs) so the server never blocks on it
+            threading.Thread(target=proc.stderr.read, daemon=True).start()
+            return proc, int(m.group(1))
+    raise RuntimeError(f"server did not start: {' '.join(cmd)}")
+
+
+async def client(port: int, bodies: list[bytes], offset: int, deadline: float, stats: dict) -> None:
+    reader = writer = None
+    i = offset
+    while time.perf_counter() < deadline:
+        body = bodies[i % len(bodies)]
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /api/chart HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = int(head.split(b" ", 2)[1])
+            length = re.search(rb"(?i)content-length:\s*(\d+)", head)
+            if length:
+                await reader.readexactly(int(length.group(1)))
+            else:
+                await reader.read()     # HTTP/1.0 without a length: body runs to EOF
+            if not length or re.search(rb"(?i)connection:\s*close", head) or head.startswith(b"HTTP/1.0"):
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            stats["failed"] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+            continue
+        if status == 200:
+            stats["latencies"].append(time.perf_counter() - t0)
+        elif status == 503:
+            stats["busy"] += 1
+            await asyncio.sleep(0.05)   # back off as Retry-After asks, rather than spin
+        else:
+            stats["failed"] += 1
+    if writer is not None:
+        writer.close()
+
+
+async def load(port: int, bodies: list[bytes], concurrency: int, duration: float) -> dict:
+    stats = {"latencies": [], "busy": 0, "failed": 0}
+    deadline = time.perf_counter() + duration
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(port, bodies, i * 97, deadline, stats) for i in range(concurrency)))
+    stats["seconds"] = time.perf_counter() - t0
+    return stats
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Chart API server load benchmark")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    ap.add_argument("--duration", type=float, default=5.0, help="Seconds per concurrency level")
+    ap.add_argument("--workers", type=int, default=None, help="chart_server workers (default: CPU count)")
+    ap.add_argument("--max-pending", type=int, default=None)
+    ap.add_argument("--size", type=int, default=2000, help="Distinct request bodies")
+    ap.add_argument("--seed", type=int, default=20240121)
+    ap.add_argument("--skip-baseline", action="store_true")
+    ap.add_argument("--json", default=None, help="Write results to this file")
+    args = ap.parse_args()
+
+    fields = ("name", "year", "month", "day", "hour", "minute", "lat", "lon", "tz")
+    bodies = [json.dumps({k: r[k] for k in fields}).encode() for r in build_corpus(args.size, args.seed)]
+
+    server_cmd = [sys.executable, "chart_server.py", "--port", "0"]
+    if args.workers:
+        server_cmd += ["--workers", str(args.workers)]
+    if args.max_pending:
+        server_cmd += ["--max-pending", str(args.max_pending)]
+    servers = [("chart_server", server_cmd)]
+    if not args.skip_baseline:
+        api = os.path.join(ROOT, "api")
+        servers.insert(0, ("baseline", [sys.executable, "-c", BASELINE.format(api=api)]))
+
+    print(f"{len(bodies)} bodies, {args.duration:g}s per level, {os.cpu_count()} CPUs\n")
+    print(f"{'server':<13s} {'conc':>5s} {'req/s':>8s} {'p50 ms':>8s} {'p95 ms':>8s} "
+          f"{'p99 ms':>8s} {'503':>6s} {'failed':>7s}")
+    rows = []
+    for label, cmd in servers:
+        proc, port = start_server(cmd)
+        try:
+            asyncio.run(load(port, bodies, 1, 1.0))   # warm-up
+            for c in args.concurrency:
+                s = asyncio.run(load(port, bodies, c, args.duration))
+                ms = [x * 1e3 for x in s["latencies"]]
+                row = {"server": label, "concurrency": c, "rps": len(ms) / s["seconds"],
+                       "p50_ms": percentile(ms, 50), "p95_ms": percentile(ms, 95),
+                       "p99_ms": percentile(ms, 99), "busy": s["busy"], "failed": s["failed"]}
+                rows.append(row)
+                print(f"{label:<13s} {c:>5d} {row['rps']:>8,.0f} {row['p50_ms']:>8.1f} "
+                      f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['busy']:>6d} {row['failed']:>7d}")
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"duration": args.duration, "cpus": os.cpu_count(), "runs": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
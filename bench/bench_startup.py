@@ -0,0 +1,106 @@
+"""
+Benchmark: cold-start cost of the /api/chart function.
+
+  python3 bench/bench_startup.py
+  python3 bench/bench_startup.py --runs 20 --json startup.json
+  python3 bench/bench_startup.py --max-import-ms 60 --max-first-request-ms 15
+
+Each run starts a fresh interpreter (as a cold serverless instance would)
+and measures, in milliseconds:
+  import_core     import natal_chart
+  import_handler  import api/chart.py (includes the prewarm hook)
+  first_request   first POST /api/chart served by the handler
+  second_request  a second, different POST on the same instance
+Reports median and max over the runs; exits 1 if a --max-* budget is exceeded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = r"""
+import json, sys, threading, time, urllib.request
+t0 = time.perf_counter()
+import natal_chart
+t1 = time.perf_counter()
+sys.path.insert(0, "api")
+import chart
+t2 = time.perf_counter()
+
+from http.server import HTTPServer
+srv = HTTPServer(("127.0.0.1", 0), chart.handler)
+threading.Thread(target=srv.serve_forever, daemon=True).start()
+
+def post(body):
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{srv.server_address[1]}/api/chart",
+        data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+    t = time.perf_counter()
+    with urllib.request.urlopen(req) as r:
+        r.read()
+    return time.perf_counter() - t
+
+rec = dict(name="Probe", year=1994, month=1, day=21, hour=13, minute=0,
+           lat=-41.2866, lon=174.7762, tz="Pacific/Auckland")
+first = post(rec)
+second = post(dict(rec, year=1987, tz="Europe/Paris", lat=48.8566, lon=2.3522))
+print(json.dumps({"import_core": (t1 - t0) * 1e3, "import_handler": (t2 - t1) * 1e3,
+                  "first_request": first * 1e3, "second_request": second * 1e3}))
+"""
+
+
+def run_once(prewarm: bool) -> dict:
+    env = dict(os.environ, NATAL_CHART_PREWARM="1" if prewarm else "0")
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Cold-start benchmark for /api/chart")
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--no-prewarm", action="store_true", help="Disable the import-time prewarm hook")
+    ap.add_argument("--json", default=None, help="Write raw runs and summary to this file")
+    ap.add_argument("--max-import-ms", type=float, default=None,
+                    help="Fail if median import_core + import_handler exceeds this")
+    ap.add_argument("--max-first-request-ms", type=float, default=None,
+                    help="Fail if median first_request exceeds this")
+    args = ap.parse_args()
+
+    runs = [run_once(not args.no_prewarm) for _ in range(args.runs)]
+    summary = {
+        k: {"median": statistics.median(r[k] for r in runs), "max": max(r[k] for r in runs)}
+        for k in runs[0]
+    }
+
+    print(f"{'stage':<16s} {'median ms':>10s} {'max ms':>10s}   ({args.runs} cold processes)")
+    for k, s in summary.items():
+        print(f"{k:<16s} {s['median']:>10.2f} {s['max']:>10.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"prewarm": not args.no_prewarm, "runs": runs, "summary": summary}, f, indent=2)
+
+    failed = False
+    import_ms = summary["import_core"]["median"] + summary["import_handler"]["median"]
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"FAIL: import {import_ms:.1f} ms > {args.max_import_ms} ms", file=sys.stderr)
+        failed = True
+    first_ms = summary["first_request"]["median"]
+    if args.max_first_request_ms is not None and first_ms > args.max_first_request_ms:
+        print(f"FAIL: first request {first_ms:.1f} ms > {args.max_first_request_ms} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+"""
+Benchmark: synastry for a group and pair throughput for a cohort.
+
+  python3 bench/bench_synastry.py
+  python3 bench/bench_synastry.py --group 50 --cohort 2000 --verify 200
+
+Times synastry() on a --group of charts from the bench_pipeline corpus, then
+streams every pair of a --cohort through iter_pair_scores (random natal
+longitudes; the cost does not depend on where they come from) and projects
+the time for a 10k-person cohort. With --verify N, the first N group pairs'
+aspects are checked against a plain Python loop over ASPECT_DEFS.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import numpy as np
+
+from bench_pipeline import build_corpus
+from natal_chart import ASPECT_BODIES, ASPECT_DEFS, LUMINARIES, LUMINARY_BONUS, abs_ang_diff, compute_chart
+from synastry import iter_pair_scores, synastry
+
+
+def loop_aspects(chart_a, chart_b) -> set:
+    """Cross aspects of one pair, one body pair at a time."""
+    found = set()
+    for p1 in ASPECT_BODIES:
+        for p2 in ASPECT_BODIES:
+            pa, pb = chart_a["points"].get(p1), chart_b["points"].get(p2)
+            if pa is None or pb is None or "error" in pa or "error" in pb:
+                continue
+            diff = abs_ang_diff(pa["lon"], pb["lon"])
+            bonus = LUMINARY_BONUS if p1 in LUMINARIES or p2 in LUMINARIES else 0
+            best = None
+            for name, (angle, orb) in ASPECT_DEFS.items():
+                o = abs(diff - angle)
+                if o <= orb + bonus and (best is None or o < best[1]):
+                    best = (name, o)
+            if best:
+                found.add((p1, p2, best[0]))
+    return found
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Synastry benchmark")
+    ap.add_argument("--group", type=int, default=50)
+    ap.add_argument("--cohort", type=int, default=1000)
+    ap.add_argument("--verify", type=int, default=0, help="Check this many group pairs")
+    ap.add_argument("--seed", type=int, default=20240121)
+    args = ap.parse_args()
+
+    corpus = build_corpus(args.group, args.seed)
+    charts = [
+        compute_chart(r["year"], r["month"], r["day"], r["hour"], r["minute"],
+                      r["lat"], r["lon"], r["tz"], r["hsys"], r["time_known"])
+        for r in corpus
+    ]
+    t0 = time.perf_counter()
+    report = synastry(charts)
+    group_s = time.perf_counter() - t0
+
+    lons = np.random.default_rng(args.seed).uniform(0, 360, (args.cohort, len(ASPECT_BODIES)))
+    t0 = time.perf_counter()
+    pairs = sum(len(a) for a, _, _ in iter_pair_scores(lons))
+    rate = pairs / (time.perf_counter() - t0)
+
+    print(f"group   {args.group} charts, {len(report['pairs'])} pairs in {group_s * 1e3:.0f} ms")
+    print(f"cohort  {args.cohort} charts, {rate:,.0f} pairs/s "
+          f"(10k cohort ~{10_000 * 9_999 / 2 / rate / 60:.0f} min)")
+
+    problems = 0
+    if args.verify:
+        names = report["members"]
+        for pair in report["pairs"][:args.verify]:
+            a, b = names.index(pair["a"]), names.index(pair["b"])
+            got = {(x["p1"], x["p2"], x["aspect"]) for x in pair["aspects"]}
+            problems += got != loop_aspects(charts[a], charts[b])
+        print(f"verify  {'OK' if not problems else f'{problems} pairs differ'}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
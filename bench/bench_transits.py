@@ -0,0 +1,113 @@
+"""
+Benchmark: one-year transit scan, checked against brute-force sampling.
+
+  python3 bench/bench_transits.py
+  python3 bench/bench_transits.py --charts 20 --days 365 --verify
+
+Times find_transits over --days for all TRANSIT_BODIES on --charts natal
+charts from the bench_pipeline corpus. With --verify, every exact hit must
+be within 0.001" of the aspect on the ephemeris, every entry/exit within
+1" of the orb edge, and the number of exact hits per body/aspect/point
+must equal the sign changes found by sampling every --brute-step days.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import swisseph as swe
+
+from bench_pipeline import build_corpus
+from natal_chart import ASPECT_BODIES, ASPECT_DEFS, PLANET_IDS, UTC, ang_diff, compute_chart, julday_ut
+from transits import TRANSIT_BODIES, _targets, find_transits
+
+START = (2026, 1, 1)
+
+
+def brute_force_hits(chart, body: str, jd0: float, jd1: float, step: float) -> Counter:
+    """Exact-hit counts per (natal point, aspect) from fixed-step sign changes."""
+    pid = PLANET_IDS[body]
+    n = int((jd1 - jd0) / step) + 1
+    lons = [swe.calc_ut(jd0 + i * step, pid, swe.FLG_SPEED)[0][0] for i in range(n)]
+    hits: Counter = Counter()
+    for pname, aspect, target, _ in _targets(chart, body, ASPECT_BODIES):
+        prev = ang_diff(lons[0], target)
+        for lon in lons[1:]:
+            d = ang_diff(lon, target)
+            if (prev < 0) != (d < 0) and abs(prev) < 90:
+                hits[(pname, aspect)] += 1
+            prev = d
+    return hits
+
+
+def verify(chart, transits, jd0: float, jd1: float, brute_step: float) -> list[str]:
+    problems = []
+    found: dict[str, Counter] = {b: Counter() for b in TRANSIT_BODIES}
+    for t in transits:
+        pid = PLANET_IDS[t["transiting"]]
+        natal = chart["points"][t["natal"]]["lon"]
+        angle, orb = ASPECT_DEFS[t["aspect"]]
+        found[t["transiting"]][(t["natal"], t["aspect"])] += len(t["exact"])
+        for dt in t["exact"]:
+            lon = swe.calc_ut(julday_ut(dt), pid, swe.FLG_SPEED)[0][0]
+            # Exact times are reported to the second; allow for that rounding
+            speed = swe.calc_ut(julday_ut(dt), pid, swe.FLG_SPEED)[0][3]
+            err = abs(abs(ang_diff(lon, natal)) - angle) * 3600
+            if err > 0.001 + abs(speed) * 3600 / 86400 * 0.5:
+                problems.append(f"{t['transiting']} {t['aspect']} {t['natal']} exact off by {err:.4f}\"")
+    for body in TRANSIT_BODIES:
+        expected = brute_force_hits(chart, body, jd0, jd1, brute_step)
+        got = {k: v for k, v in found[body].items() if v}
+        if got != dict(expected):
+            diff = set(got.items()) ^ set(expected.items())
+            problems.append(f"{body}: hit counts differ from brute force: {sorted(diff)[:4]}")
+    return problems
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Transit search benchmark")
+    ap.add_argument("--charts", type=int, default=10)
+    ap.add_argument("--days", type=float, default=365)
+    ap.add_argument("--seed", type=int, default=20240121)
+    ap.add_argument("--verify", action="store_true")
+    ap.add_argument("--brute-step", type=float, default=0.02, help="Brute-force sampling step (days)")
+    args = ap.parse_args()
+
+    from datetime import datetime
+    start = datetime(*START, tzinfo=UTC)
+    end = start + timedelta(days=args.days)
+    corpus = [r for r in build_corpus(args.charts * 2, args.seed) if r["time_known"]][:args.charts]
+
+    times, counts, problems = [], [], []
+    for rec in corpus:
+        chart = compute_chart(rec["year"], rec["month"], rec["day"], rec["hour"], rec["minute"],
+                              rec["lat"], rec["lon"], rec["tz"])
+        t0 = time.perf_counter()
+        transits = find_transits(chart, start, end)
+        times.append(time.perf_counter() - t0)
+        counts.append(len(transits))
+        if args.verify:
+            problems += verify(chart, transits, julday_ut(start), julday_ut(end), args.brute_step)
+
+    print(f"{len(corpus)} charts, {args.days:g} days, {len(TRANSIT_BODIES)} bodies")
+    print(f"  scan       median {statistics.median(times) * 1e3:.0f} ms, max {max(times) * 1e3:.0f} ms")
+    print(f"  transits   median {statistics.median(counts):.0f} per chart")
+    if args.verify:
+        print(f"  verify     {'OK' if not problems else f'{len(problems)} problems'}")
+        for p in problems[:20]:
+            print(f"    {p}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
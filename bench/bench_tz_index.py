@@ -0,0 +1,120 @@
+"""
+Benchmark: timezone index size, lookup latency and agreement with the polygons.
+
+  python3 bench/bench_tz_index.py --geojson combined-with-oceans-now.json
+  python3 bench/bench_tz_index.py --geojson combined-with-oceans-now.json --precision 0.001 --verify 500
+
+Indexes a timezone-boundary-builder GeoJSON file in memory, then times
+zone_at on random points, split into whole cells (one array read) and
+mixed cells (edge walk). With --verify N, N random points are checked
+against an exact even-odd test on the original, unsimplified polygons; a
+disagreement only counts as wrong if the exact answer is the same for every
+point within 2 x --precision, i.e. it is not explained by vertex snapping.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from tz_index import DEFAULT_CELL, DEFAULT_PRECISION, MIXED, SCALE, TimezoneIndex, build_index, read_geojson
+
+
+class ExactZones:
+    """Even-odd point-in-polygon over the raw rings, vectorised per ring."""
+
+    def __init__(self, zones):
+        self.polys = []
+        for name, polygons in zones:
+            for rings in polygons:
+                arrays = [np.asarray(r, dtype=float)[:, :2] for r in rings]
+                outer = arrays[0]
+                bbox = (outer[:, 0].min(), outer[:, 1].min(), outer[:, 0].max(), outer[:, 1].max())
+                self.polys.append((name, bbox, arrays))
+
+    @staticmethod
+    def _inside(ring: np.ndarray, x: float, y: float) -> bool:
+        ax, ay = ring[:, 0], ring[:, 1]
+        bx, by = np.roll(ax, -1), np.roll(ay, -1)
+        crosses = (ay > y) != (by > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            xs = ax + (y - ay) * (bx - ax) / (by - ay)
+        return bool(np.count_nonzero(crosses & (xs < x)) % 2)
+
+    def zones_at(self, lat: float, lon: float) -> set[str]:
+        found = set()
+        for name, (x0, y0, x1, y1), rings in self.polys:
+            if x0 <= lon <= x1 and y0 <= lat <= y1 and self._inside(rings[0], lon, lat):
+                if not any(self._inside(h, lon, lat) for h in rings[1:]):
+                    found.add(name)
+        return found
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Timezone index benchmark")
+    ap.add_argument("--geojson", required=True, help="timezone-boundary-builder GeoJSON")
+    ap.add_argument("--cell", type=float, default=DEFAULT_CELL)
+    ap.add_argument("--precision", type=float, default=DEFAULT_PRECISION)
+    ap.add_argument("--points", type=int, default=100_000)
+    ap.add_argument("--verify", type=int, default=0, help="Check this many points against the polygons")
+    ap.add_argument("--seed", type=int, default=20240121)
+    args = ap.parse_args()
+
+    zones = list(read_geojson(args.geojson))
+    t0 = time.perf_counter()
+    data = build_index(zones, args.cell, args.precision)
+    build_s = time.perf_counter() - t0
+    index = TimezoneIndex(data=data)
+    mixed = sum(1 for v in index._grid if v & MIXED)
+    print(f"index   {len(data) / 1024 / 1024:.1f} MiB, {len(index.zones)} zones, "
+          f"{index.cols}x{index.rows} cells ({mixed / len(index._grid):.1%} mixed), built in {build_s:.1f}s")
+
+    rng = random.Random(args.seed)
+    points = [(rng.uniform(-85, 85), rng.uniform(-180, 180)) for _ in range(args.points)]
+    timings: dict[str, list[float]] = {"whole": [], "mixed": []}
+    for lat, lon in points:
+        col = min((round(lon * SCALE) + 180 * SCALE) // index._cell, index.cols - 1)
+        row = min((round(lat * SCALE) + 90 * SCALE) // index._cell, index.rows - 1)
+        kind = "mixed" if index._grid[row * index.cols + col] & MIXED else "whole"
+        t0 = time.perf_counter()
+        index.zone_at(lat, lon)
+        timings[kind].append((time.perf_counter() - t0) * 1e6)
+    print(f"{'cells':<8s} {'points':>7s} {'p50 us':>8s} {'p99 us':>8s} {'max us':>8s}")
+    for kind, us in timings.items():
+        if len(us) > 1:
+            q = statistics.quantiles(us, n=100)
+            print(f"{kind:<8s} {len(us):>7d} {q[49]:>8.1f} {q[98]:>8.1f} {max(us):>8.1f}")
+
+    problems = 0
+    if args.verify:
+        exact = ExactZones(zones)
+        near = 0
+        d = 2 * args.precision
+        for lat, lon in points[:args.verify]:
+            truth = exact.zones_at(lat, lon)
+            got = index.zone_at(lat, lon)
+            if got in truth or (not truth and got.startswith("Etc/")):
+                continue
+            around = [exact.zones_at(lat + dy, lon + dx) for dx in (-d, 0, d) for dy in (-d, 0, d)]
+            if any(z != truth for z in around):
+                near += 1
+            else:
+                problems += 1
+                print(f"  wrong at {lat:.5f},{lon:.5f}: {got}, polygons say {sorted(truth) or 'none'}")
+        print(f"verify  {args.verify} points, {near} differ within {d:g}° of a border, "
+              f"{'OK' if not problems else f'{problems} wrong'}")
+    index.close()
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Birth Window — what a chart looks like across an uncertain birth time
+
+For a birth known only to fall inside a window ("sometime in the
+afternoon", or the whole day), finds every moment in the window where the
+Ascendant sign, MC sign, Moon sign or the house of any point changes, and
+returns the intervals between them, each with its own summary. A chart is
+the same throughout an interval as far as signs of the angles and houses
+go, so these intervals are everything the unknown time can change.
+
+The window is sampled every SAMPLE_MINUTES with swe.houses; body positions
+come from cubic Hermite interpolation of swe.calc_ut longitudes and speeds
+at KNOT_HOURS knots, which is good to well under an arcsecond over a day.
+Each change found between two samples is then located by regula falsi on
+the continuous quantity behind it (the angle against the sign boundary, or
+a house cusp against the body), to within a second.
+
+Usage:
+  python3 birth_window.py --city wellington --year 1994 --month 1 --day 21
+  python3 birth_window.py --lat -41.29 --lon 174.78 --tz Pacific/Auckland \
+    --year 1994 --month 1 --day 21 --from 12:00 --to 18:00 --json
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import sys
+from datetime import datetime, timedelta
+
+import swisseph as swe
+
+import natal_chart
+from natal_chart import (
+    PLANET_IDS, SIGNS, UTC, ang_diff, get_zone, init_ephemeris, julday_ut, norm360, ordinal,
+)
+
+SAMPLE_MINUTES = 10     # cusps move ~2.5° per sample; smaller if they jump
+KNOT_HOURS = 6
+TIME_TOL_DAYS = 1 / 86400
+MAX_SPLIT_DEPTH = 12
+
+
+def _parse_hhmm(text: str) -> tuple[int, int]:
+    hour, _, minute = text.strip().partition(":")
+    hour, minute = int(hour), int(minute or 0)
+    if not (0 <= hour <= 24 and 0 <= minute < 60) or (hour == 24 and minute):
+        raise ValueError(f"Bad time of day: {text!r} (expected HH:MM, 00:00-24:00)")
+    return hour, minute
+
+
+class _BodyTrack:
+    """Unwrapped longitude of one body, Hermite-interpolated between knots."""
+
+    __slots__ = ("jd0", "h", "us", "vs")
+
+    def __init__(self, pid: int, jd_start: float, jd_end: float):
+        n = max(math.ceil((jd_end - jd_start) * 24 / KNOT_HOURS), 1)
+        self.jd0, self.h = jd_start, (jd_end - jd_start) / n or 1.0
+        self.us, self.vs = [], []
+        prev = None
+        for k in range(n + 1):
+            xx, _ = swe.calc_ut(jd_start + k * self.h, pid, natal_chart.EPHE_FLAG | swe.FLG_SPEED)
+            u = xx[0] if prev is None else self.us[-1] + ang_diff(xx[0], prev)
+            prev = xx[0]
+            self.us.append(u)
+            self.vs.append(xx[3])
+
+    def lon(self, jd: float) -> float:
+        x = (jd - self.jd0) / self.h
+        k = min(max(int(x), 0), len(self.us) - 2)
+        s = x - k
+        s2, s3 = s * s, s * s * s
+        h = self.h
+        u = ((2 * s3 - 3 * s2 + 1) * self.us[k] + (s3 - 2 * s2 + s) * h * self.vs[k]
+             + (-2 * s3 + 3 * s2) * self.us[k + 1] + (s3 - s2) * h * self.vs[k + 1])
+        return u % 360.0
+
+
+class _Window:
+    """Sky state over the window: angles and cusps from swe.houses, bodies from tracks."""
+
+    def __init__(self, jd_start: float, jd_end: float, lat: float, lon: float, hsys: str):
+        self.lat, self.lon, self.hsys = lat, lon, hsys.encode("ascii")
+        self.tracks: dict[str, _BodyTrack] = {}
+        for name, pid in PLANET_IDS.items():
+            try:
+                self.tracks[name] = _BodyTrack(pid, jd_start, jd_end)
+            except swe.Error:
+                pass    # no ephemeris file for it; compute_chart reports it
+        self.bodies = list(self.tracks) + (["S.Node"] if "N.Node" in self.tracks else [])
+
+    def body_lon(self, name: str, jd: float) -> float:
+        if name == "S.Node":
+            return (self.tracks["N.Node"].lon(jd) + 180.0) % 360.0
+        return self.tracks[name].lon(jd)
+
+    def houses(self, jd: float) -> tuple[tuple, float, float]:
+        try:
+            cusps, ascmc = swe.houses(jd, self.lat, self.lon, self.hsys)
+        except swe.Error:
+            raise ValueError(f"House system {self.hsys.decode()} is undefined at latitude {self.lat:g}") from None
+        return cusps, norm360(ascmc[0]), norm360(ascmc[1])
+
+    def state(self, jd: float) -> tuple:
+        """(asc sign, MC sign, Moon sign, house per body) at jd."""
+        cusps, asc, mc = self.houses(jd)
+        houses = tuple(_house_of(self.body_lon(b, jd), cusps) for b in self.bodies)
+        return (int(asc // 30), int(mc // 30), int(self.body_lon("Moon", jd) // 30), houses)
+
+
+def _house_of(lon: float, cusps) -> int:
+    for i in range(12):
+        c0, c1 = cusps[i], cusps[(i + 1) % 12]
+        if (lon - c0) % 360.0 < (c1 - c0) % 360.0:
+            return i + 1
+    return 12
+
+
+def _regula_falsi(g, t0: float, t1: float) -> float:
+    """Zero of g in [t0, t1] (signs differ at the ends), Illinois variant."""
+    g0, g1 = g(t0), g(t1)
+    side = 0
+    t = t0
+    while t1 - t0 > TIME_TOL_DAYS:
+        t = (t0 * g1 - t1 * g0) / (g1 - g0) if g1 != g0 else (t0 + t1) / 2
+        gt = g(t)
+        if abs(gt) < 1e-7:
+            break
+        if (gt < 0) == (g0 < 0):
+            t0, g0 = t, gt
+            if side == -1:
+                g1 /= 2
+            side = -1
+        else:
+            t1, g1 = t, gt
+            if side == 1:
+                g0 /= 2
+            side = 1
+    return t
+
+
+def _step_sign(old: int, new: int) -> int | None:
+    """Sign boundary (degrees) crossed going from old to the adjacent new sign."""
+    if new == (old + 1) % 12:
+        return new * 30
+    if new == (old - 1) % 12:
+        return old * 30
+    return None
+
+
+def _step_house(old: int, new: int) -> int | None:
+    """Cusp (1-12) crossed going from house old to the adjacent house new."""
+    if new == (old - 1 - 1) % 12 + 1:
+        return old
+    if new == old % 12 + 1:
+        return new
+    return None
+
+
+def _changes(win: _Window, t0: float, s0: tuple, t1: float, s1: tuple, depth: int = 0):
+    """(jd, component, new value) for each change between two samples."""
+    steps = []
+    for i, (a, b) in enumerate(zip(s0[:3], s1[:3])):
+        if a != b:
+            steps.append((i, b, _step_sign(a, b)))
+    for j, (a, b) in enumerate(zip(s0[3], s1[3])):
+        if a != b:
+            steps.append((3 + j, b, _step_house(a, b)))
+    if any(boundary is None for *_, boundary in steps) and depth < MAX_SPLIT_DEPTH:
+        # More than one change in a component: split until each is a single step
+        tm = (t0 + t1) / 2
+        sm = win.state(tm)
+        yield from _changes(win, t0, s0, tm, sm, depth + 1)
+        yield from _changes(win, tm, sm, t1, s1, depth + 1)
+        return
+
+    for comp, value, boundary in steps:
+        if boundary is None:
+            yield (t1 + t0) / 2, comp, value
+            continue
+        if comp == 0:
+            def g(t, b=boundary):
+                return ang_diff(win.houses(t)[1], b)
+        elif comp == 1:
+            def g(t, b=boundary):
+                return ang_diff(win.houses(t)[2], b)
+        elif comp == 2:
+            def g(t, b=boundary):
+                return ang_diff(win.body_lon("Moon", t), b)
+        else:
+            body = win.bodies[comp - 3]
+
+            def g(t, c=boundary - 1, body=body):
+                return ang_diff(win.houses(t)[0][c], win.body_lon(body, t))
+        yield _regula_falsi(g, t0, t1), comp, value
+
+
+def _jd_to_local(jd: float, zone) -> datetime:
+    y, m, d, hours = swe.revjul(jd, swe.GREG_CAL)
+    dt = datetime(y, m, d, tzinfo=UTC) + timedelta(seconds=round(hours * 3600))
+    return dt.astimezone(zone)
+
+
+def birth_time_windows(year: int, month: int, day: int, lat: float, lon: float, tz_str: str,
+                       start: str = "00:00", end: str = "24:00", hsys: str = "P") -> dict:
+    """
+    Intervals of local time between start and end (HH:MM on the birth date;
+    an end at or before start runs past midnight) within which the rising,
+    MC and Moon signs and every point's house stay the same. Each interval
+    has local ISO "start"/"end", "minutes", the "changes" that open it, and
+    its rising_sign, mc_sign, moon_sign, houses and day_chart. Per-sign
+    windows for the rising sign, MC and Moon are summarised alongside.
+    """
+    init_ephemeris()
+    zone = get_zone(tz_str)
+    (h0, m0), (h1, m1) = _parse_hhmm(start), _parse_hhmm(end)
+    base = datetime(year, month, day, tzinfo=zone)
+    dt_start = base + timedelta(hours=h0, minutes=m0)
+    dt_end = base + timedelta(hours=h1, minutes=m1)
+    if dt_end <= dt_start:
+        dt_end += timedelta(days=1)
+    jd_start, jd_end = julday_ut(dt_start.astimezone(UTC)), julday_ut(dt_end.astimezone(UTC))
+
+    win = _Window(jd_start, jd_end, lat, lon, hsys)
+    n = max(math.ceil((jd_end - jd_start) * 1440 / SAMPLE_MINUTES), 1)
+    ts = [jd_start + (jd_end - jd_start) * k / n for k in range(n + 1)]
+    states = [win.state(t) for t in ts]
+    events = []
+    for k in range(n):
+        if states[k] != states[k + 1]:
+            events.extend(_changes(win, ts[k], states[k], ts[k + 1], states[k + 1]))
+    events.sort()
+
+    def describe(comp: int, value: int) -> str:
+        if comp < 3:
+            return f"{('Ascendant', 'MC', 'Moon')[comp]} enters {SIGNS[value]}"
+        return f"{win.bodies[comp - 3]} enters {ordinal(value)} house"
+
+    def summary(state: tuple) -> dict:
+        houses = dict(zip(win.bodies, state[3]))
+        return {
+            "rising_sign": SIGNS[state[0]],
+            "mc_sign": SIGNS[state[1]],
+            "moon_sign": SIGNS[state[2]],
+            "houses": houses,
+            "day_chart": houses.get("Sun", 0) >= 7,
+        }
+
+    intervals = []
+    state = list(states[0][:3]) + [list(states[0][3])]
+    t_open, opened_by = jd_start, []
+    i = 0
+    while True:
+        # Events closer than the solver tolerance open the same interval
+        t_next = events[i][0] if i < len(events) else jd_end
+        if t_next - t_open > TIME_TOL_DAYS or i == len(events):
+            intervals.append({
+                "start": _jd_to_local(t_open, zone).isoformat(),
+                "end": _jd_to_local(min(t_next, jd_end), zone).isoformat(),
+                "minutes": round((min(t_next, jd_end) - t_open) * 1440, 2),
+                "changes": opened_by,
+                **summary((state[0], state[1], state[2], tuple(state[3]))),
+            })
+            t_open, opened_by = t_next, []
+        if i == len(events):
+            break
+        _, comp, value = events[i]
+        if comp < 3:
+            state[comp] = value
+        else:
+            state[3][comp - 3] = value
+        opened_by.append(describe(comp, value))
+        i += 1
+
+    total = (jd_end - jd_start) * 1440
+    windows = {}
+    for key in ("rising_sign", "mc_sign", "moon_sign"):
+        spans = []
+        for iv in intervals:
+            if spans and spans[-1]["sign"] == iv[key]:
+                spans[-1]["end"] = iv["end"]
+                spans[-1]["minutes"] = round(spans[-1]["minutes"] + iv["minutes"], 2)
+            else:
+                spans.append({"sign": iv[key], "start": iv["start"], "end": iv["end"],
+                              "minutes": iv["minutes"]})
+        for span in spans:
+            span["share"] = round(span["minutes"] / total, 4) if total else 1.0
+        windows[key.replace("_sign", "_signs")] = spans
+
+    return {
+        "start": dt_start.isoformat(),
+        "end": dt_end.isoformat(),
+        "tz": tz_str,
+        "hsys": hsys,
+        **windows,
+        "intervals": intervals,
+    }
+
+
+def format_windows(name: str, result: dict) -> str:
+    """Text report: sign windows, then every interval with what opens it."""
+    first_day = result["start"][:10]
+
+    def clock(iso: str, seconds: bool = False) -> str:
+        text = iso[11:19] if seconds else iso[11:16]
+        return text if iso[:10] == first_day else f"{text}+1d"
+
+    lines = [f"BIRTH TIME WINDOWS: {name}",
+             f"  {result['start'][:16]} to {result['end'][:16]} ({result['tz']})", ""]
+    for key, label in (("rising_signs", "Rising sign"), ("moon_signs", "Moon sign"), ("mc_signs", "MC sign")):
+        lines.append(f"{label}:")
+        for span in result[key]:
+            lines.append(f"  {clock(span['start']):>8s} - {clock(span['end']):<8s} {span['sign']:<12s}"
+                         f"{span['share'] * 100:5.1f}%")
+        lines.append("")
+    lines.append(f"Intervals ({len(result['intervals'])}):")
+    for iv in result["intervals"]:
+        opened = "; ".join(iv["changes"]) or "window start"
+        lines.append(f"  {clock(iv['start'], True):>11s} - {clock(iv['end'], True):<11s} "
+                     f"ASC {iv['rising_sign']:<11s} MC {iv['mc_sign']:<11s} Moon {iv['moon_sign']:<11s} {opened}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Chart changes across an uncertain birth time")
+    ap.add_argument("--name", default="Unknown time")
+    ap.add_argument("--year", type=int, required=True)
+    ap.add_argument("--month", type=int, required=True)
+    ap.add_argument("--day", type=int, required=True)
+    ap.add_argument("--from", dest="start", default="00:00", help="Window start HH:MM (local)")
+    ap.add_argument("--to", dest="end", default="24:00", help="Window end HH:MM (local)")
+    ap.add_argument("--city", default=None)
+    ap.add_argument("--lat", type=float, default=None)
+    ap.add_argument("--lon", type=float, default=None)
+    ap.add_argument("--tz", default=None)
+    ap.add_argument("--hsys", default="P")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    rec = {k: v for k, v in (("city", args.city), ("lat", args.lat), ("lon", args.lon),
+                             ("tz", args.tz)) if v is not None}
+    try:
+        rec = natal_chart.with_location(rec)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not all(k in rec for k in ("lat", "lon", "tz")):
+        print("Error: Provide --city or (--lat, --lon[, --tz])", file=sys.stderr)
+        return 1
+
+    result = birth_time_windows(args.year, args.month, args.day, float(rec["lat"]), float(rec["lon"]),
+                                str(rec["tz"]), args.start, args.end, args.hsys)
+    print(json.dumps(result) if args.json else format_windows(args.name, result))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Chart Engine — fan chart computation out to a process pool
+
+swisseph keeps global state (ephemeris path, file handles), and chart
+computation is pure CPU, so threads do not help. ChartEngine runs the full
+pipeline (compute_chart through chart_result) in worker processes, each of
+which initialises swisseph once and then receives chunks of birth records.
+
+  from chart_engine import ChartEngine
+
+  with ChartEngine(workers=8, chunksize=256) as engine:
+      for result in engine.map(records):               # input order
+          ...
+      for result in engine.map(records, ordered=False): # as completed
+          ...
+
+Results have the same shape as natal_chart.iter_charts_batch: the
+/api/chart payload plus "index", or "index" and "error". Input is consumed
+lazily with at most `max_pending` chunks in flight, so a generator of
+records streams with bounded memory. workers=1 computes in this process.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import natal_chart
+
+
+def _init_worker(tables_path: str | None, table_bodies: list[str] | None) -> None:
+    # A forked worker inherits the parent's cache, including any open SQLite
+    # connection, which must not be shared across processes
+    natal_chart.CHART_CACHE._db = None
+    natal_chart.CHART_CACHE.clear()
+    current = natal_chart.EPHEMERIS_TABLES
+    if (current.path if current else None) != tables_path:
+        natal_chart.use_ephemeris_tables(tables_path, table_bodies)
+    natal_chart.init_ephemeris()
+
+
+def _run_chunk(start: int, records: list, hsys: str) -> list[dict]:
+    results = list(natal_chart.iter_charts_batch(records, hsys))
+    for r in results:
+        r["index"] += start
+    return results
+
+
+def _chunks(records, size: int):
+    it = iter(records)
+    start = 0
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def worker_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool whose workers have swisseph initialised and the same
+    ephemeris tables loaded as this process. Also used by chart_server.
+    """
+    tables = natal_chart.EPHEMERIS_TABLES
+    bodies = None
+    if tables is not None:
+        names = {pid: name for name, pid in natal_chart.PLANET_IDS.items()}
+        bodies = [names[pid] for pid in sorted(tables.enabled) if pid in names]
+    return ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker,
+        initargs=(tables.path if tables else None, bodies),
+    )
+
+
+class ChartEngine:
+    """Process pool running the chart pipeline over batches of birth records."""
+
+    def __init__(self, workers: int | None = None, chunksize: int = 128,
+                 hsys: str = "P", max_pending: int | None = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = max(1, chunksize)
+        self.hsys = hsys
+        self.max_pending = max_pending or 2 * self.workers
+        self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = worker_pool(self.workers)
+        return self._pool
+
+    def map(self, records, ordered: bool = True):
+        """Yield one result per record, in input order or as chunks complete."""
+        if self.workers == 1:
+            yield from natal_chart.iter_charts_batch(records, self.hsys)
+            return
+
+        pool = self._executor()
+        chunks = _chunks(records, self.chunksize)
+        pending: deque = deque()
+        for start, chunk in itertools.islice(chunks, self.max_pending):
+            pending.append(pool.submit(_run_chunk, start, chunk, self.hsys))
+
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [f for f in pending if f in finished]
+                for f in done:
+                    pending.remove(f)
+            for future in done:
+                for start, chunk in itertools.islice(chunks, 1):
+                    pending.append(pool.submit(_run_chunk, start, chunk, self.hsys))
+                yield from future.result()
+
+    def compute(self, records) -> list[dict]:
+        """All results, in input order."""
+        return list(self.map(records))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self) -> ChartEngine:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Chart Server — standalone concurrent server for the /api/chart contract
+
+api/chart.py is a BaseHTTPRequestHandler, which Vercel runs one request at a
+time per instance. Outside Vercel (local dev, self-hosted fallback, load
+tests) this module serves the same contract concurrently: an asyncio front
+end with HTTP/1.1 keep-alive accepts connections and parses requests, and
+chart work runs in a bounded process pool (chart_engine.worker_pool).
+
+Requests go through natal_chart.api_response, exactly as on Vercel. At most
+`max_pending` POSTs are queued or running at once; beyond that the server
+answers 503 with Retry-After instead of letting the queue, and latency, grow
+without bound. Bodies over MAX_BODY get 413.
+
+Usage:
+  python3 chart_server.py --port 8000 --workers 4
+  curl -d '{"name":"A","year":1990,"month":1,"day":1,"hour":12,"minute":0,
+            "lat":51.5,"lon":-0.13,"tz":"Europe/London"}' localhost:8000/api/chart
+
+`app` is also an ASGI application, for running under an ASGI server instead:
+  uvicorn chart_server:app --port 8000
+
+Workers and queue depth default to CHART_SERVER_WORKERS (CPU count) and
+CHART_SERVER_MAX_PENDING (16 per worker). With CHART_METRICS=1 responses
+carry Server-Timing (worker stages plus "queue"), and GET /api/chart?metrics
+returns the histograms aggregated over all workers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from functools import partial
+from http import HTTPStatus
+from urllib.parse import parse_qs
+
+import natal_chart
+from chart_engine import worker_pool
+from natal_chart import METRICS
+
+API_PATH = "/api/chart"
+MAX_BODY = 2 * 1024 * 1024      # a full MAX_BATCH array is well under this
+MAX_HEADER = 16 * 1024
+KEEPALIVE_TIMEOUT = 15.0
+
+
+def _serve(body: bytes, content_type: str, fields: str | None = None,
+           profile: bool = False) -> tuple[int, bytes, dict]:
+    """One POST, in a worker: status, JSON body and the worker's stage timings."""
+    METRICS.begin_request()
+    status, payload = natal_chart.api_response(body, content_type, fields, profile)
+    with METRICS.stage("serialize"):
+        data = json.dumps(payload).encode()
+    return status, data, METRICS.end_request()
+
+
+def _json(status: int, payload, extra: list | None = None) -> tuple[int, list, bytes]:
+    return status, [("Content-Type", "application/json")] + (extra or []), json.dumps(payload).encode()
+
+
+class ChartService:
+    """
+    The /api/chart contract over a process pool, for async front ends.
+    handle() never blocks the event loop; chart work runs in the workers.
+    """
+
+    def __init__(self, workers: int | None = None, max_pending: int | None = None):
+        self.workers = workers or int(os.getenv("CHART_SERVER_WORKERS", "0")) or os.cpu_count() or 1
+        self.max_pending = (max_pending or int(os.getenv("CHART_SERVER_MAX_PENDING", "0"))
+                            or 16 * self.workers)
+        self.pending = 0
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = worker_pool(self.workers)
+        return self._pool
+
+    async def start(self) -> None:
+        """Start the workers and pay their first-chart setup before serving."""
+        pool = self._executor()
+        if os.getenv("NATAL_CHART_PREWARM", "1") != "0":
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(pool, natal_chart.prewarm)
+                                   for _ in range(self.workers)))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def handle(self, method: str, target: str, headers: dict, body: bytes):
+        """(status, headers, body) for one request; header names are lowercase."""
+        path, _, query = target.partition("?")
+        if path.rstrip("/") != API_PATH:
+            return _json(404, {"error": "Not found"})
+        if method == "GET" and "metrics" in query:
+            if not METRICS.enabled:
+                return _json(404, {"error": "Metrics disabled (set CHART_METRICS=1)"})
+            snapshot = METRICS.snapshot()
+            snapshot["server"] = {"workers": self.workers, "pending": self.pending,
+                                  "max_pending": self.max_pending}
+            return _json(200, snapshot)
+        if method != "POST":
+            return _json(405, {"error": "Use POST"}, [("Allow", "POST")])
+
+        METRICS.count("requests")
+        if self.pending >= self.max_pending:
+            METRICS.count("rejected")
+            METRICS.count("errors")
+            return _json(503, {"error": "Server busy, retry shortly"}, [("Retry-After", "1")])
+
+        self.pending += 1
+        t0 = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            status, data, timings = await loop.run_in_executor(
+                self._executor(), _serve, body, headers.get("content-type", ""),
+                parse_qs(query).get("fields", [None])[-1],
+                "profile" in parse_qs(query, keep_blank_values=True))
+        except Exception as e:
+            status, data, timings = 500, json.dumps({"error": str(e)}).encode(), {}
+        finally:
+            self.pending -= 1
+        if status >= 400:
+            METRICS.count("errors")
+
+        extra = [("Content-Type", "application/json")]
+        if timings:
+            # Worker histograms live in the workers; aggregate them here
+            total = (time.perf_counter() - t0) * 1e6
+            timings["queue"] = max(total - timings.pop("total"), 0.0)
+            timings["total"] = total
+            for stage, us in timings.items():
+                METRICS.observe(stage, us)
+            extra.append(("Server-Timing", METRICS.server_timing(timings)))
+            print(json.dumps({
+                "event": "chart_request",
+                "ts": round(time.time(), 3),
+                "status": status,
+                "bytes": len(data),
+                "stages_ms": {k: round(v / 1000, 3) for k, v in timings.items()},
+            }), file=sys.stderr)
+        return status, extra, data
+
+
+# ─── HTTP/1.1 Front End ───────────────────────────────────────────────────────
+
+def _response(status: int, headers: list, body: bytes, keep_alive: bool) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers]
+    lines.append(f"Content-Length: {len(body)}")
+    lines.append("Connection: " + ("keep-alive" if keep_alive else "close"))
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def _connection(service: ChartService, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+    """Serve requests on one connection until it closes or idles out."""
+    try:
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                return
+            except asyncio.LimitOverrunError:
+                writer.write(_response(*_json(431, {"error": "Headers too large"}), False))
+                return
+
+            lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ")
+            except ValueError:
+                writer.write(_response(*_json(400, {"error": "Bad request line"}), False))
+                return
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                writer.write(_response(*_json(411, {"error": "Content-Length required"}), False))
+                return
+            try:
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                length = -1
+            if not 0 <= length <= MAX_BODY:
+                status = 400 if length < 0 else 413
+                writer.write(_response(*_json(status, {"error": f"Body must be 0-{MAX_BODY} bytes"}), False))
+                return
+            if headers.get("expect", "").lower() == "100-continue":
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            try:
+                body = await reader.readexactly(length) if length else b""
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+
+            status, extra, data = await service.handle(method, target, headers, body)
+            writer.write(_response(status, extra, data, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8000, service: ChartService | None = None) -> None:
+    """Run the HTTP server until SIGINT/SIGTERM."""
+    service = service or ChartService()
+    await service.start()
+    server = await asyncio.start_server(partial(_connection, service), host, port,
+                                        limit=MAX_HEADER, backlog=1024)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    bound = server.sockets[0].getsockname()
+    print(f"chart_server listening on http://{bound[0]}:{bound[1]}{API_PATH} "
+          f"({service.workers} workers, max {service.max_pending} pending)", file=sys.stderr, flush=True)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        service.close()
+
+
+# ─── ASGI ─────────────────────────────────────────────────────────────────────
+
+_SERVICE: ChartService | None = None
+
+
+async def app(scope, receive, send) -> None:
+    """ASGI entry point; one ChartService (and worker pool) per server process."""
+    global _SERVICE
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                _SERVICE = _SERVICE or ChartService()
+                await _SERVICE.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if _SERVICE is not None:
+                    _SERVICE.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    _SERVICE = _SERVICE or ChartService()
+    body, more = b"", True
+    while more and len(body) <= MAX_BODY:
+        message = await receive()
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+    if len(body) > MAX_BODY:
+        status, headers, data = _json(413, {"error": f"Body must be 0-{MAX_BODY} bytes"})
+    else:
+        target = scope["path"]
+        if scope.get("query_string"):
+            target += "?" + scope["query_string"].decode("latin-1")
+        request_headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        status, headers, data = await _SERVICE.handle(scope["method"], target, request_headers, body)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+                   + [(b"content-length", str(len(data)).encode())],
+    })
+    await send({"type": "http.response.body", "body": data})
+
+
+def main() -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Concurrent /api/chart server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000, help="0 picks a free port")
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    ap.add_argument("--max-pending", type=int, default=None,
+                    help="Queued + running requests before answering 503 (default: 16 per worker)")
+    ap.add_argument("--metrics", action="store_true", help="Same as CHART_METRICS=1")
+    args = ap.parse_args()
+
+    if args.metrics:
+        os.environ["CHART_METRICS"] = "1"   # inherited by the workers
+        METRICS.enable()
+    asyncio.run(serve(args.host, args.port, ChartService(args.workers, args.max_pending)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
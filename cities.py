@@ -0,0 +1,107 @@
+"""
+Built-in city coordinates for natal_chart.py: name -> (lat, lon, IANA timezone).
+
+Kept out of natal_chart so serverless imports don't pay for it; natal_chart
+loads it on first access to natal_chart.CITIES. geocoder.py indexes this list
+when no GeoNames index has been built.
+"""
+
+CITIES = {
+    # New Zealand
+    "wellington": (-41.2866, 174.7762, "Pacific/Auckland"),
+    "auckland": (-36.8485, 174.7633, "Pacific/Auckland"),
+    "christchurch": (-43.5321, 172.6362, "Pacific/Auckland"),
+    "dunedin": (-45.8788, 170.5028, "Pacific/Auckland"),
+    "hamilton": (-37.7870, 175.2793, "Pacific/Auckland"),
+    "tauranga": (-37.6878, 176.1651, "Pacific/Auckland"),
+    "napier": (-39.4928, 176.9120, "Pacific/Auckland"),
+    "nelson": (-41.2706, 173.2840, "Pacific/Auckland"),
+    "queenstown": (-45.0312, 168.6626, "Pacific/Auckland"),
+    "palmerston north": (-40.3523, 175.6082, "Pacific/Auckland"),
+    "rotorua": (-38.1368, 176.2497, "Pacific/Auckland"),
+    "whangarei": (-35.7275, 174.3166, "Pacific/Auckland"),
+    "new plymouth": (-39.0556, 174.0752, "Pacific/Auckland"),
+    "invercargill": (-46.4132, 168.3538, "Pacific/Auckland"),
+    "whanganui": (-39.9301, 175.0479, "Pacific/Auckland"),
+    "gisborne": (-38.6623, 178.0176, "Pacific/Auckland"),
+    # Australia
+    "sydney": (-33.8688, 151.2093, "Australia/Sydney"),
+    "melbourne": (-37.8136, 144.9631, "Australia/Melbourne"),
+    "brisbane": (-27.4698, 153.0251, "Australia/Brisbane"),
+    "perth": (-31.9505, 115.8605, "Australia/Perth"),
+    "adelaide": (-34.9285, 138.6007, "Australia/Adelaide"),
+    "gold coast": (-28.0167, 153.4000, "Australia/Brisbane"),
+    "canberra": (-35.2809, 149.1300, "Australia/Sydney"),
+    "hobart": (-42.8821, 147.3272, "Australia/Hobart"),
+    "darwin": (-12.4634, 130.8456, "Australia/Darwin"),
+    # UK & Ireland
+    "london": (51.5074, -0.1278, "Europe/London"),
+    "edinburgh": (55.9533, -3.1883, "Europe/London"),
+    "manchester": (53.4808, -2.2426, "Europe/London"),
+    "dublin": (53.3498, -6.2603, "Europe/Dublin"),
+    "glasgow": (55.8642, -4.2518, "Europe/London"),
+    "birmingham": (52.4862, -1.8904, "Europe/London"),
+    # Europe
+    "paris": (48.8566, 2.3522, "Europe/Paris"),
+    "berlin": (52.5200, 13.4050, "Europe/Berlin"),
+    "amsterdam": (52.3676, 4.9041, "Europe/Amsterdam"),
+    "rome": (41.9028, 12.4964, "Europe/Rome"),
+    "madrid": (40.4168, -3.7038, "Europe/Madrid"),
+    "lisbon": (38.7223, -9.1393, "Europe/Lisbon"),
+    "barcelona": (41.3874, 2.1686, "Europe/Madrid"),
+    "vienna": (48.2082, 16.3738, "Europe/Vienna"),
+    "prague": (50.0755, 14.4378, "Europe/Prague"),
+    "copenhagen": (55.6761, 12.5683, "Europe/Copenhagen"),
+    "stockholm": (59.3293, 18.0686, "Europe/Stockholm"),
+    "oslo": (59.9139, 10.7522, "Europe/Oslo"),
+    "helsinki": (60.1699, 24.9384, "Europe/Helsinki"),
+    "zurich": (47.3769, 8.5417, "Europe/Zurich"),
+    "athens": (37.9838, 23.7275, "Europe/Athens"),
+    "istanbul": (41.0082, 28.9784, "Europe/Istanbul"),
+    # North America
+    "new york": (40.7128, -74.0060, "America/New_York"),
+    "los angeles": (34.0522, -118.2437, "America/Los_Angeles"),
+    "chicago": (41.8781, -87.6298, "America/Chicago"),
+    "houston": (29.7604, -95.3698, "America/Chicago"),
+    "san francisco": (37.7749, -122.4194, "America/Los_Angeles"),
+    "seattle": (47.6062, -122.3321, "America/Los_Angeles"),
+    "miami": (25.7617, -80.1918, "America/New_York"),
+    "denver": (39.7392, -104.9903, "America/Denver"),
+    "austin": (30.2672, -97.7431, "America/Chicago"),
+    "boston": (42.3601, -71.0589, "America/New_York"),
+    "toronto": (43.6532, -79.3832, "America/Toronto"),
+    "vancouver": (49.2827, -123.1207, "America/Vancouver"),
+    "montreal": (45.5017, -73.5673, "America/Toronto"),
+    "mexico city": (19.4326, -99.1332, "America/Mexico_City"),
+    # South America
+    "sao paulo": (-23.5505, -46.6333, "America/Sao_Paulo"),
+    "buenos aires": (-34.6037, -58.3816, "America/Argentina/Buenos_Aires"),
+    "bogota": (4.7110, -74.0721, "America/Bogota"),
+    "lima": (-12.0464, -77.0428, "America/Lima"),
+    "santiago": (-33.4489, -70.6693, "America/Santiago"),
+    # Asia
+    "tokyo": (35.6762, 139.6503, "Asia/Tokyo"),
+    "beijing": (39.9042, 116.4074, "Asia/Shanghai"),
+    "shanghai": (31.2304, 121.4737, "Asia/Shanghai"),
+    "hong kong": (22.3193, 114.1694, "Asia/Hong_Kong"),
+    "singapore": (1.3521, 103.8198, "Asia/Singapore"),
+    "mumbai": (19.0760, 72.8777, "Asia/Kolkata"),
+    "delhi": (28.7041, 77.1025, "Asia/Kolkata"),
+    "bangkok": (13.7563, 100.5018, "Asia/Bangkok"),
+    "seoul": (37.5665, 126.9780, "Asia/Seoul"),
+    "dubai": (25.2048, 55.2708, "Asia/Dubai"),
+    "taipei": (25.0330, 121.5654, "Asia/Taipei"),
+    "kuala lumpur": (3.1390, 101.6869, "Asia/Kuala_Lumpur"),
+    "jakarta": (-6.2088, 106.8456, "Asia/Jakarta"),
+    "manila": (14.5995, 120.9842, "Asia/Manila"),
+    # Africa
+    "cape town": (-33.9249, 18.4241, "Africa/Johannesburg"),
+    "johannesburg": (-26.2041, 28.0473, "Africa/Johannesburg"),
+    "nairobi": (-1.2921, 36.8219, "Africa/Nairobi"),
+    "cairo": (30.0444, 31.2357, "Africa/Cairo"),
+    "lagos": (6.5244, 3.3792, "Africa/Lagos"),
+    # Pacific
+    "honolulu": (21.3069, -157.8583, "Pacific/Honolulu"),
+    "suva": (-18.1416, 178.4419, "Pacific/Fiji"),
+    "noumea": (-22.2558, 166.4505, "Pacific/Noumea"),
+}
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Precomputed Ephemeris Tables — Chebyshev coefficients for slow bodies
+
+Builds a compact binary table of Chebyshev coefficients for geocentric
+longitude over a date range (default 1900–2100), one fixed-length segment at
+a time, and evaluates longitude and speed from it with plain Python
+arithmetic. The file is memory-mapped, so opening it costs nothing and a
+lookup makes no swisseph call. Building needs numpy; reading does not.
+
+Usage:
+  python3 ephemeris_tables.py build --out data/ephemeris_1900_2100.bin
+  python3 ephemeris_tables.py report --table data/ephemeris_1900_2100.bin
+
+Then point natal_chart at it (optionally limiting which bodies use it):
+  EPHEMERIS_TABLES=data/ephemeris_1900_2100.bin \
+  EPHEMERIS_TABLE_BODIES=Jupiter,Saturn,Uranus,Neptune,Pluto python3 natal_chart.py ...
+
+File layout (little-endian):
+  header     8s magic, u32 body count, f64 jd_start, f64 jd_end
+  directory  per body: i32 swisseph id, u32 source flag, f64 segment days,
+             u32 coefficients per segment, u32 segment count, u64 data offset
+  data       f64 coefficients, segment after segment, 8-byte aligned
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+
+import swisseph as swe
+
+MAGIC = b"NCEPHEM1"
+_HEADER = struct.Struct("<8sIdd")
+_ENTRY = struct.Struct("<iIdIIQ")
+
+# Default build: (segment length in days, Chebyshev degree) per body.
+# Segments are short enough to follow the annual retrograde loops that
+# Earth's motion puts into every geocentric longitude.
+TABLE_BODIES = {
+    "Jupiter": (32.0, 10),
+    "Saturn": (32.0, 10),
+    "Uranus": (32.0, 10),
+    "Neptune": (32.0, 10),
+    "Pluto": (32.0, 10),
+    "Chiron": (32.0, 10),
+    "N.Node": (32.0, 12),
+    "Lilith": (32.0, 10),
+}
+
+DEFAULT_START = 2415020.5   # 1900-01-01 00:00 UT
+DEFAULT_END = 2488069.5     # 2100-01-01 00:00 UT
+
+_SOURCE_FLAGS = swe.FLG_SWIEPH | swe.FLG_MOSEPH | swe.FLG_JPLEPH
+SOURCE_NAMES = {swe.FLG_SWIEPH: "swiss", swe.FLG_MOSEPH: "moshier", swe.FLG_JPLEPH: "jpl"}
+
+
+class EphemerisTables:
+    """Read-only view of a table file; lon_speed() is the only hot path."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, self.jd_start, self.jd_end = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not an ephemeris table file")
+
+        self._coeffs = memoryview(self._mm).cast("d")
+        self.bodies: dict[int, tuple] = {}
+        self.sources: dict[int, str] = {}
+        pos = _HEADER.size
+        for _ in range(count):
+            pid, source, seg_days, ncoef, nseg, offset = _ENTRY.unpack_from(self._mm, pos)
+            self.bodies[pid] = (seg_days, ncoef, nseg, offset // 8)
+            self.sources[pid] = SOURCE_NAMES.get(source, "unknown")
+            pos += _ENTRY.size
+        self.enabled = set(self.bodies)
+
+    def covers(self, pid: int, jd: float) -> bool:
+        return pid in self.enabled and self.jd_start <= jd < self.jd_end
+
+    def lon_speed(self, pid: int, jd: float) -> tuple[float, float] | None:
+        """Longitude (0–360) and speed (deg/day) at jd, or None if not covered."""
+        if not self.covers(pid, jd):
+            return None
+        seg_days, ncoef, nseg, base = self.bodies[pid]
+        seg = min(int((jd - self.jd_start) / seg_days), nseg - 1)
+        x = 2.0 * (jd - self.jd_start - seg * seg_days) / seg_days - 1.0
+        c = self._coeffs[base + seg * ncoef: base + (seg + 1) * ncoef]
+
+        # Sum c_n T_n(x) and its derivative c_n n U_{n-1}(x) by recurrence
+        t_prev, t_cur = 1.0, x
+        u_prev, u_cur = 0.0, 1.0
+        value = c[0] + c[1] * x
+        deriv = c[1]
+        x2 = 2.0 * x
+        for n in range(2, ncoef):
+            t_prev, t_cur = t_cur, x2 * t_cur - t_prev
+            u_prev, u_cur = u_cur, x2 * u_cur - u_prev
+            value += c[n] * t_cur
+            deriv += c[n] * n * u_cur
+        return value % 360.0, deriv * 2.0 / seg_days
+
+    def close(self) -> None:
+        self._coeffs.release()
+        self._mm.close()
+
+
+# ─── Build ────────────────────────────────────────────────────────────────────
+
+def _fit_body(pid: int, jd_start: float, jd_end: float, seg_days: float, degree: int):
+    import numpy as np
+    from numpy.polynomial import chebyshev
+
+    ncoef = degree + 1
+    nseg = math.ceil((jd_end - jd_start) / seg_days)
+    nodes = np.cos(np.pi * (np.arange(ncoef) + 0.5) / ncoef)[::-1]   # ascending in time
+    coeffs = np.empty((nseg, ncoef))
+    source = 0
+    for seg in range(nseg):
+        a = jd_start + seg * seg_days
+        lons = []
+        for x in nodes:
+            xx, ret = swe.calc_ut(a + (x + 1.0) * seg_days / 2.0, pid, swe.FLG_SPEED)
+            lons.append(xx[0])
+            source = ret & _SOURCE_FLAGS
+        lons = np.rad2deg(np.unwrap(np.deg2rad(lons)))
+        coeffs[seg] = chebyshev.chebfit(nodes, lons, degree)
+    return source, ncoef, nseg, coeffs
+
+
+def build_tables(path: str, bodies: dict[str, tuple] | None = None,
+                 jd_start: float = DEFAULT_START, jd_end: float = DEFAULT_END) -> list[str]:
+    """Write a table file; returns the bodies that were skipped (no ephemeris data)."""
+    from natal_chart import PLANET_IDS
+
+    swe.set_ephe_path(os.getenv("SWEPHE_PATH", ""))
+    fitted, skipped = [], []
+    for name, (seg_days, degree) in (bodies or TABLE_BODIES).items():
+        pid = PLANET_IDS[name]
+        try:
+            fitted.append((pid, seg_days, *_fit_body(pid, jd_start, jd_end, seg_days, degree)))
+        except swe.Error:
+            skipped.append(name)
+
+    offset = _HEADER.size + _ENTRY.size * len(fitted)
+    offset += -offset % 8
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(fitted), jd_start, jd_end))
+        data_offset = offset
+        for pid, seg_days, source, ncoef, nseg, coeffs in fitted:
+            f.write(_ENTRY.pack(pid, source, seg_days, ncoef, nseg, data_offset))
+            data_offset += coeffs.nbytes
+        f.write(b"\0" * (offset - f.tell()))
+        for *_, coeffs in fitted:
+            f.write(coeffs.astype("<f8").tobytes())
+    return skipped
+
+
+# ─── Accuracy Report ──────────────────────────────────────────────────────────
+
+def accuracy_report(tables: EphemerisTables, samples: int = 2000, seed: int = 1) -> list[dict]:
+    """Compare the table with swisseph at random instants, per body."""
+    from natal_chart import PLANET_IDS, abs_ang_diff
+
+    names = {pid: name for name, pid in PLANET_IDS.items()}
+    rng = random.Random(seed)
+    jds = [rng.uniform(tables.jd_start, tables.jd_end) for _ in range(samples)]
+    rows = []
+    for pid in tables.bodies:
+        lon_err, speed_err = [], []
+        t0 = time.perf_counter()
+        table = [tables.lon_speed(pid, jd) for jd in jds]
+        t_table = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        direct = [swe.calc_ut(jd, pid, swe.FLG_SPEED)[0] for jd in jds]
+        t_direct = time.perf_counter() - t0
+        for (lon, speed), xx in zip(table, direct):
+            lon_err.append(abs_ang_diff(lon, xx[0]) * 3600)
+            speed_err.append(abs(speed - xx[3]) * 3600)
+        rows.append({
+            "body": names.get(pid, str(pid)),
+            "source": tables.sources[pid],
+            "max_lon_arcsec": max(lon_err),
+            "rms_lon_arcsec": math.sqrt(sum(e * e for e in lon_err) / samples),
+            "max_speed_arcsec_day": max(speed_err),
+            "table_us": t_table / samples * 1e6,
+            "direct_us": t_direct / samples * 1e6,
+        })
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Build or check Chebyshev ephemeris tables")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Fit and write a table file")
+    b.add_argument("--out", required=True)
+    b.add_argument("--start-year", type=int, default=1900)
+    b.add_argument("--end-year", type=int, default=2100)
+    b.add_argument("--bodies", nargs="+", default=list(TABLE_BODIES), choices=list(TABLE_BODIES))
+    r = sub.add_parser("report", help="Accuracy and speed against swisseph")
+    r.add_argument("--table", required=True)
+    r.add_argument("--samples", type=int, default=2000)
+    r.add_argument("--tolerance", type=float, default=1.0,
+                   help="Max longitude error (arcsec) for a body to be recommended")
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        skipped = build_tables(
+            args.out, {n: TABLE_BODIES[n] for n in args.bodies},
+            swe.julday(args.start_year, 1, 1, 0.0), swe.julday(args.end_year, 1, 1, 0.0),
+        )
+        size = os.path.getsize(args.out)
+        print(f"Wrote {args.out} ({size / 1024:.0f} KiB) in {time.perf_counter() - t0:.1f}s")
+        if skipped:
+            print(f"Skipped (no ephemeris data): {', '.join(skipped)}", file=sys.stderr)
+        return 0
+
+    swe.set_ephe_path(os.getenv("SWEPHE_PATH", ""))
+    tables = EphemerisTables(args.table)
+    rows = accuracy_report(tables, args.samples)
+    print(f"{'Body':<10s} {'source':<8s} {'max lon':>10s} {'rms lon':>10s} "
+          f"{'max speed/d':>13s} {'table us':>9s} {'direct us':>10s}  use   (errors in arcsec)")
+    ok = []
+    for row in rows:
+        use = "table" if row["max_lon_arcsec"] <= args.tolerance else "direct"
+        if use == "table":
+            ok.append(row["body"])
+        print(f"{row['body']:<10s} {row['source']:<8s} {row['max_lon_arcsec']:>10.4f} "
+              f"{row['rms_lon_arcsec']:>10.4f} {row['max_speed_arcsec_day']:>13.4f} "
+              f"{row['table_us']:>9.1f} {row['direct_us']:>10.1f}  {use}")
+    print(f"\nEPHEMERIS_TABLE_BODIES={','.join(ok)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
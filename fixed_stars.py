@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Fixed Stars — conjunctions of chart points with catalog stars
+
+Loads a star catalog in the Swiss Ephemeris sefstars.txt format once and
+finds every star within STAR_ORB of longitude of each chart point, without
+calling swe.fixstar for each star and point.
+
+For each epoch bucket (BUCKET_DAYS, one Julian year) the whole catalog is
+carried to the bucket's mean equinox in one numpy pass (proper motion, IAU
+1976 precession, mean obliquity) and its ecliptic longitudes are sorted.
+Within a bucket the rest of precession moves every star by the same amount
+to well under an arcsecond (away from the ecliptic poles, where longitude
+means little), so a chart anywhere in it shifts its own point
+longitudes back by that amount (and by nutation) instead, and each point's
+contacts are one binary search for [lon - orb, lon + orb] on the sorted
+array. Buckets are cached, so a batch spread over a century pays the numpy
+pass at most once per year it touches.
+
+Longitudes are mean of date plus nutation (the four-term IAU 1980 series,
+good to 0.5"), without annual aberration or parallax: within about
+21"/cos(latitude) of swe.fixstar_ut, which is noise against a one-degree
+orb. Nothing here calls swisseph.
+
+Usage:
+  python3 fixed_stars.py --catalog sefstars.txt --city london 1990 6 2 14 5
+  python3 fixed_stars.py --catalog sefstars.txt --max-mag 5 --orb 0.5 --city paris 1975 3 9 8 30
+
+natal_chart reads the catalog from FIXSTARS_CATALOG, else sefstars.txt on
+SWEPHE_PATH, and reports stars down to FIXSTARS_MAX_MAG (default 2.5).
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import sys
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+import natal_chart
+
+J2000 = 2451545.0
+BUCKET_DAYS = 365.25
+MAX_BUCKETS = 128
+STAR_ORB = 1.0
+DEFAULT_MAX_MAG = 2.5
+CATALOG_FILE = "sefstars.txt"
+
+_ARCSEC = math.pi / (180 * 3600)
+_MAS_PER_YEAR = _ARCSEC / 1000
+
+
+def _general_precession(t: float) -> float:
+    """Precession in longitude since J2000, degrees, t in Julian centuries (Lieske 1977)."""
+    return (5029.0966 * t + 1.11113 * t * t - 0.000006 * t ** 3) / 3600
+
+
+def _nutation(t: float) -> float:
+    """Nutation in longitude, degrees, t in Julian centuries (Meeus ch. 22, to 0.5")."""
+    node = math.radians(125.04452 - 1934.136261 * t)
+    sun = math.radians(280.4665 + 36000.7698 * t)
+    moon = math.radians(218.3165 + 481267.8813 * t)
+    return (-17.20 * math.sin(node) - 1.32 * math.sin(2 * sun)
+            - 0.23 * math.sin(2 * moon) + 0.21 * math.sin(2 * node)) / 3600
+
+
+def _ecliptic_of_date(t: float) -> np.ndarray:
+    """Rotation from J2000 equatorial to the mean ecliptic and equinox of date."""
+    import numpy as np
+
+    zeta = (2306.2181 * t + 0.30188 * t * t + 0.017998 * t ** 3) * _ARCSEC
+    z = (2306.2181 * t + 1.09468 * t * t + 0.018203 * t ** 3) * _ARCSEC
+    theta = (2004.3109 * t - 0.42665 * t * t - 0.041833 * t ** 3) * _ARCSEC
+    eps = (84381.448 - 46.8150 * t - 0.00059 * t * t + 0.001813 * t ** 3) * _ARCSEC
+
+    def r1(a):
+        c, s = math.cos(a), math.sin(a)
+        return np.array([[1, 0, 0], [0, c, s], [0, -s, c]])
+
+    def r2(a):
+        c, s = math.cos(a), math.sin(a)
+        return np.array([[c, 0, -s], [0, 1, 0], [s, 0, c]])
+
+    def r3(a):
+        c, s = math.cos(a), math.sin(a)
+        return np.array([[c, s, 0], [-s, c, 0], [0, 0, 1]])
+
+    return r1(eps) @ r3(-z) @ r2(theta) @ r3(-zeta)
+
+
+def parse_catalog(lines) -> list[tuple]:
+    """
+    (name, nomenclature, ra, dec, pm_ra, pm_dec, magnitude) per star of a
+    sefstars.txt, with ra/dec in radians (J2000/ICRS) and proper motions in
+    radians per year along ra and dec, named by nomenclature where the
+    name is blank. Alternative names of a star already listed (same
+    nomenclature), B1950 entries and reference points (galactic poles, zero
+    points: no parallax and magnitude 0) are skipped.
+    """
+    stars, seen = [], set()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        f = [x.strip() for x in line.split(",")]
+        if len(f) < 14 or f[2] not in ("2000", "ICRS") or f[1] in seen:
+            continue
+        if float(f[12]) == 0 and float(f[13]) == 0:
+            continue
+        seen.add(f[1])
+        ra = (float(f[3]) + float(f[4]) / 60 + float(f[5]) / 3600) * 15
+        dec = abs(float(f[6])) + float(f[7]) / 60 + float(f[8]) / 3600
+        dec = math.radians(-dec if f[6].startswith("-") else dec)
+        # RA proper motion is given as mas/yr * cos(dec)
+        pm_ra = float(f[9]) * _MAS_PER_YEAR / max(math.cos(dec), 1e-9)
+        stars.append((f[0] or f[1], f[1], math.radians(ra), dec, pm_ra, float(f[10]) * _MAS_PER_YEAR, float(f[13])))
+    return stars
+
+
+class StarCatalog:
+    """Stars with per-epoch longitude-sorted indexes; contacts() is the hot path."""
+
+    def __init__(self, stars: list[tuple], max_mag: float | None = None):
+        import numpy as np  # only once a catalog exists; natal_chart imports this module on every chart
+
+        if max_mag is not None:
+            stars = [s for s in stars if s[6] <= max_mag]
+        self.names = [s[0] for s in stars]
+        self.nomenclature = [s[1] for s in stars]
+        self.magnitudes = [s[6] for s in stars]
+        cols = np.array([s[2:6] for s in stars], dtype=float).reshape(-1, 4)
+        self._ra, self._dec, self._pm_ra, self._pm_dec = cols.T
+        self._buckets: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def positions(self, jd: float) -> tuple[np.ndarray, np.ndarray]:
+        """Ecliptic longitudes and latitudes (degrees) of every star, mean of date."""
+        import numpy as np
+
+        years = (jd - J2000) / 365.25
+        ra = self._ra + self._pm_ra * years
+        dec = self._dec + self._pm_dec * years
+        cos_dec = np.cos(dec)
+        x, y, z = _ecliptic_of_date(years / 100) @ np.array(
+            [cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)])
+        return np.degrees(np.arctan2(y, x)) % 360.0, np.degrees(np.arcsin(np.clip(z, -1, 1)))
+
+    def _bucket(self, jd: float) -> tuple:
+        """(epoch, sorted longitudes, star order) for the bucket holding jd."""
+        k = math.floor((jd - J2000) / BUCKET_DAYS + 0.5)
+        bucket = self._buckets.get(k)
+        if bucket is None:
+            epoch = J2000 + k * BUCKET_DAYS
+            lons, _ = self.positions(epoch)
+            order = lons.argsort(kind="stable")
+            bucket = self._buckets[k] = (epoch, lons[order].tolist(), order.tolist())
+            if len(self._buckets) > MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(k)
+        return bucket
+
+    def contacts(self, points: dict[str, float], jd: float, orb: float = STAR_ORB) -> list[dict]:
+        """
+        Every (star, point) pair within orb degrees of longitude at jd (UT),
+        tightest first, for points as {name: ecliptic longitude of date}.
+        """
+        if not self.names:
+            return []
+        epoch, lons, order = self._bucket(jd)
+        t = (jd - J2000) / 36525
+        shift = _general_precession(t) - _general_precession((epoch - J2000) / 36525) + _nutation(t)
+        names, nomenclature, magnitudes = self.names, self.nomenclature, self.magnitudes
+        n = len(lons)
+        found = []
+        for pname, lon in points.items():
+            target = (lon - shift) % 360.0
+            lo, hi = target - orb, target + orb
+            # (first, last, target) per window; across 0/360 the target moves with it
+            spans = [(bisect_left(lons, lo), bisect_right(lons, hi), target)]
+            if lo < 0.0:
+                spans.append((bisect_left(lons, lo + 360.0), n, target + 360.0))
+            if hi >= 360.0:
+                spans.append((0, bisect_right(lons, hi - 360.0), target - 360.0))
+            for start, end, centre in spans:
+                for i in range(start, end):
+                    s = order[i]
+                    found.append({
+                        "star": names[s],
+                        "nomenclature": nomenclature[s],
+                        "point": pname,
+                        "orb": round(abs(lons[i] - centre), 2),
+                        "lon": round((lons[i] + shift) % 360.0, 4),
+                        "magnitude": magnitudes[s],
+                    })
+        found.sort(key=lambda c: (c["orb"], c["magnitude"]))
+        return found
+
+
+def load_catalog(path: str, max_mag: float | None = None) -> StarCatalog:
+    with open(path, encoding="latin-1") as f:
+        return StarCatalog(parse_catalog(f), max_mag)
+
+
+def find_catalog() -> str | None:
+    """FIXSTARS_CATALOG, else the first sefstars.txt on SWEPHE_PATH, or None."""
+    path = os.getenv("FIXSTARS_CATALOG")
+    if path:
+        return path
+    for directory in os.getenv("SWEPHE_PATH", "").split(os.pathsep):
+        if directory and os.path.exists(os.path.join(directory, CATALOG_FILE)):
+            return os.path.join(directory, CATALOG_FILE)
+    return None
+
+
+def open_star_catalog(path: str | None = None, max_mag: float | None = None) -> StarCatalog | None:
+    """
+    Catalog at path (default find_catalog()) limited to max_mag (default
+    FIXSTARS_MAX_MAG, else DEFAULT_MAX_MAG), or None if there is none.
+    """
+    path = path or find_catalog()
+    if not path or not os.path.exists(path):
+        return None
+    if max_mag is None:
+        max_mag = float(os.getenv("FIXSTARS_MAX_MAG", DEFAULT_MAX_MAG))
+    return load_catalog(path, max_mag)
+
+
+def main() -> int:
+    import argparse
+    import json
+
+    ap = argparse.ArgumentParser(description="Fixed star conjunctions for a chart")
+    ap.add_argument("year", type=int)
+    ap.add_argument("month", type=int)
+    ap.add_argument("day", type=int)
+    ap.add_argument("hour", type=int)
+    ap.add_argument("minute", type=int)
+    ap.add_argument("--city", required=True)
+    ap.add_argument("--catalog", default=None, help="sefstars.txt (default: FIXSTARS_CATALOG or SWEPHE_PATH)")
+    ap.add_argument("--max-mag", type=float, default=None)
+    ap.add_argument("--orb", type=float, default=STAR_ORB)
+    args = ap.parse_args()
+
+    catalog = open_star_catalog(args.catalog, args.max_mag)
+    if catalog is None:
+        print(f"No star catalog; pass --catalog or put {CATALOG_FILE} on SWEPHE_PATH", file=sys.stderr)
+        return 1
+    place = natal_chart.geocode(args.city)
+    if place is None:
+        print(f"Error: City '{args.city}' not found.", file=sys.stderr)
+        return 1
+    chart = natal_chart.compute_chart(args.year, args.month, args.day, args.hour, args.minute,
+                                      place.lat, place.lon, place.tz)
+    points = {n: p.lon for n, p in chart["points"].items() if p.lon is not None}
+    for c in catalog.contacts(points, chart["jd"], args.orb):
+        print(json.dumps(c))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Offline Geocoder — place name -> (lat, lon, IANA timezone) from a binary index
+
+Builds a compact binary index from a GeoNames dump (cities500.txt or
+cities1000.txt: a few hundred thousand places) and resolves city names
+against it without any network call. The file is memory-mapped, so opening
+it costs almost nothing; a lookup is one hash probe plus a short scan of
+equal keys, and never reads the whole dataset.
+
+Names are matched on a folded key: diacritics stripped, case folded and
+punctuation collapsed, so "Sao Paulo", "são paulo" and "SÃO PAULO" are the
+same key. A trailing ", Country" (name or ISO code) narrows the match.
+Among equal names the most populous place wins. Lookups are exact by
+default; with fuzzy=True a name that matches nothing tries every key one
+edit away (insert, delete, substitute, transpose) through the same hash
+table, and answers only if exactly one of them is a known name, so a typo
+never silently turns into whichever of two near names comes first.
+search() lists completions for a prefix from the sorted key array.
+
+Without a built index the built-in cities.py list is indexed in memory, so
+the API behaves the same, just over ~100 places.
+
+Usage:
+  curl -O https://download.geonames.org/export/dump/cities500.zip && unzip cities500.zip
+  curl -O https://download.geonames.org/export/dump/countryInfo.txt
+  python3 geocoder.py build --places cities500.txt --countries countryInfo.txt \
+      --out data/places.bin
+  python3 geocoder.py lookup --index data/places.bin "sao paulo, brazil"
+
+natal_chart reads the index from GEOCODER_INDEX (default data/places.bin).
+
+File layout (little-endian):
+  header   8s magic, u32 places, u32 keys, u32 hash slots, u32 meta bytes,
+           u64 offsets of places, keys, slots and string blob
+  meta     JSON: timezone names and country code -> name
+  places   f32 lat, f32 lon, u32 population, u32 name offset, u16 name length,
+           u16 timezone index, 2s country code; sorted by population, largest first
+  keys     u32 key offset, u16 key length, u32 place index; sorted by key, then place
+  slots    u32 crc32 of key, u32 key index + 1 (0 = empty); open addressing
+  blob     UTF-8 display names and folded keys
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+import unicodedata
+from typing import NamedTuple
+from zlib import crc32
+
+MAGIC = b"NCGEO001"
+_HEADER = struct.Struct("<8sIIIIQQQQ")
+_PLACE = struct.Struct("<ffIIHH2s")
+_KEY = struct.Struct("<IHI")
+_SLOT = struct.Struct("<II")
+
+DEFAULT_INDEX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "places.bin")
+
+# Letters NFKD does not decompose into a base letter plus accents
+_FOLD = str.maketrans({
+    "ø": "o", "đ": "d", "ð": "d", "ł": "l", "ħ": "h", "ı": "i", "ŧ": "t",
+    "þ": "th", "æ": "ae", "œ": "oe", "ß": "ss", "’": "", "'": "",
+})
+_NON_WORD = re.compile(r"[\W_]+")
+_EDIT_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789 "
+
+# Alternate names are only indexed for places at least this big, which keeps
+# the file compact while still knowing "Munich" is München
+ALT_NAME_MIN_POPULATION = 15000
+
+
+def fold(name: str) -> str:
+    """Match key for a place name: no diacritics, casefolded, single spaces."""
+    name = unicodedata.normalize("NFKD", name.casefold().translate(_FOLD))
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", name).strip()
+
+
+def _edits(key: str):
+    """Every string one insert, delete, substitute or transpose away from key."""
+    seen = {key}
+    splits = [(key[:i], key[i:]) for i in range(len(key) + 1)]
+    for a, b in splits:
+        if b:
+            candidates = [a + b[1:]]
+            if len(b) > 1:
+                candidates.append(a + b[1] + b[0] + b[2:])
+            candidates += [a + c + b[1:] for c in _EDIT_ALPHABET]
+        else:
+            candidates = []
+        candidates += [a + c + b for c in _EDIT_ALPHABET]
+        for cand in candidates:
+            if cand not in seen:
+                seen.add(cand)
+                yield cand
+
+
+class Place(NamedTuple):
+    name: str
+    country: str        # ISO 3166 code, "" if unknown
+    lat: float
+    lon: float
+    tz: str
+    population: int
+
+
+class Geocoder:
+    """Read-only view of an index; lookup() and search() are the API."""
+
+    def __init__(self, path: str | None = None, data: bytes | None = None):
+        self.path = path
+        self._mm = None
+        if data is None:
+            with open(path, "rb") as f:
+                self._mm = data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.places, self.keys, self._nslots, meta_len,
+         self._places_off, self._keys_off, self._slots_off, self._blob_off) = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a geocoder index")
+        self._buf = data
+        self._slots = memoryview(data)[self._slots_off:self._blob_off].cast("I")
+        meta = json.loads(bytes(data[_HEADER.size:_HEADER.size + meta_len]))
+        self.timezones: list[str] = meta["tz"]
+        self.countries: dict[str, str] = meta["countries"]
+        self._country_keys = {fold(name): code for code, name in self.countries.items()}
+
+    def __len__(self) -> int:
+        return self.places
+
+    # ─── Records ──────────────────────────────────────────────────────────────
+
+    def _text(self, offset: int, length: int) -> bytes:
+        start = self._blob_off + offset
+        return self._buf[start:start + length]
+
+    def place(self, index: int) -> Place:
+        lat, lon, pop, name_off, name_len, tz, cc = _PLACE.unpack_from(
+            self._buf, self._places_off + index * _PLACE.size)
+        return Place(self._text(name_off, name_len).decode(), cc.rstrip(b"\0").decode(),
+                     round(lat, 4), round(lon, 4), self.timezones[tz], pop)
+
+    def _key(self, i: int) -> tuple[bytes, int]:
+        off, length, place = _KEY.unpack_from(self._buf, self._keys_off + i * _KEY.size)
+        return self._text(off, length), place
+
+    def _country_of(self, index: int) -> bytes:
+        return self._buf[self._places_off + (index + 1) * _PLACE.size - 2:
+                         self._places_off + (index + 1) * _PLACE.size]
+
+    # ─── Queries ──────────────────────────────────────────────────────────────
+
+    def _find(self, key: bytes) -> int:
+        """Index of the first entry in the key array equal to key, or -1."""
+        slots = self._slots
+        mask = self._nslots - 1
+        h = crc32(key)
+        slot = h & mask
+        while True:
+            ki = slots[2 * slot + 1]
+            if ki == 0:
+                return -1
+            if slots[2 * slot] == h and self._key(ki - 1)[0] == key:
+                return ki - 1
+            slot = (slot + 1) & mask
+
+    def _matches(self, key: bytes, country: bytes | None):
+        """Place indexes for key, most populous first, optionally in one country."""
+        i = self._find(key)
+        if i < 0:
+            return
+        while i < self.keys:
+            k, place = self._key(i)
+            if k != key:
+                return
+            if country is None or self._country_of(place) == country:
+                yield place
+            i += 1
+
+    def _split(self, query: str) -> tuple[str, bytes | None]:
+        """Folded name and country code from "Name" or "Name, Region, Country"."""
+        name, _, rest = query.rpartition(",")
+        if not name:
+            return fold(query), None
+        qualifier = fold(rest)
+        code = self._country_keys.get(qualifier)
+        if code is None and qualifier.upper() in self.countries:
+            code = qualifier.upper()
+        if code is None:
+            # Unknown qualifier (a state, a misspelt country): ignore it
+            return fold(name.partition(",")[0]), None
+        return fold(name.partition(",")[0]), code.encode()
+
+    def lookup(self, query: str, fuzzy: bool = False) -> Place | None:
+        """
+        Best place for a name, or None. With fuzzy, a name with no exact
+        match resolves to the one known name one edit away, if there is
+        exactly one (in the query's country, if it names one).
+        """
+        key, country = self._split(query)
+        if not key:
+            return None
+        for place in self._matches(key.encode(), country):
+            return self.place(place)
+        if not fuzzy or len(key) < 4:
+            return None
+        slots, mask = self._slots, self._nslots - 1
+        found = None
+        for cand in _edits(key):
+            cand = cand.encode()
+            # Inline hash probe: most candidates stop at an empty slot
+            h = crc32(cand)
+            slot = h & mask
+            while slots[2 * slot + 1] and slots[2 * slot] != h:
+                slot = (slot + 1) & mask
+            if not slots[2 * slot + 1]:
+                continue
+            for place in self._matches(cand, country):
+                if found is not None:
+                    return None     # two names one edit away: ambiguous
+                found = place
+                break
+        return None if found is None else self.place(found)
+
+    def search(self, prefix: str, limit: int = 10, scan: int = 1000) -> list[Place]:
+        """
+        Places with a name starting with prefix, most populous first. At most
+        `scan` keys are examined, so very short prefixes return the biggest
+        places among the first matches in key order, not necessarily overall.
+        """
+        key, country = self._split(prefix)
+        if not key:
+            return []
+        target = key.encode()
+        lo, hi = 0, self.keys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = set()
+        for i in range(lo, min(lo + scan, self.keys)):
+            k, place = self._key(i)
+            if not k.startswith(target):
+                break
+            if country is None or self._country_of(place) == country:
+                found.add(place)
+        return [self.place(p) for p in sorted(found)[:limit]]
+
+    def close(self) -> None:
+        self._slots.release()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+
+# ─── Build ────────────────────────────────────────────────────────────────────
+
+def build_index(places, countries: dict[str, str] | None = None) -> bytes:
+    """
+    Index bytes for places: an iterable of (name, country code, lat, lon, tz,
+    population, alternate names). Places sort by population, so equal keys
+    resolve to the largest place first.
+    """
+    places = sorted(places, key=lambda p: -p[5])
+    timezones = sorted({p[4] for p in places})
+    tz_index = {tz: i for i, tz in enumerate(timezones)}
+    blob = bytearray()
+    strings: dict[bytes, int] = {}
+
+    def intern(s: bytes) -> int:
+        off = strings.get(s)
+        if off is None:
+            off = strings[s] = len(blob)
+            blob.extend(s)
+        return off
+
+    place_rows = bytearray()
+    keys = []
+    for i, (name, cc, lat, lon, tz, pop, alt) in enumerate(places):
+        raw = name.encode()
+        place_rows += _PLACE.pack(lat, lon, pop, intern(raw), len(raw), tz_index[tz],
+                                  cc.encode()[:2])
+        for k in {fold(name), *(fold(a) for a in alt)}:
+            if k:
+                keys.append((k.encode(), i))
+    keys.sort()
+
+    key_rows = bytearray()
+    nslots = 1
+    while nslots < 2 * len(keys):
+        nslots *= 2
+    slots = [None] * nslots
+    prev = None
+    for ki, (k, place) in enumerate(keys):
+        key_rows += _KEY.pack(intern(k), len(k), place)
+        if k != prev:
+            h = crc32(k)
+            slot = h & (nslots - 1)
+            while slots[slot] is not None:
+                slot = (slot + 1) & (nslots - 1)
+            slots[slot] = (h, ki + 1)
+            prev = k
+    slot_rows = b"".join(_SLOT.pack(*s) if s else b"\0" * _SLOT.size for s in slots)
+
+    meta = json.dumps({"tz": timezones, "countries": countries or {}}).encode()
+    places_off = _HEADER.size + len(meta)
+    keys_off = places_off + len(place_rows)
+    slots_off = keys_off + len(key_rows)
+    blob_off = slots_off + len(slot_rows)
+    header = _HEADER.pack(MAGIC, len(places), len(keys), nslots, len(meta),
+                          places_off, keys_off, slots_off, blob_off)
+    return b"".join((header, meta, place_rows, key_rows, slot_rows, blob))
+
+
+def read_geonames(path: str, alt_min_population: int = ALT_NAME_MIN_POPULATION):
+    """Places from a GeoNames dump (tab-separated, one place per line)."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 18 or not cols[17]:
+                continue
+            pop = int(cols[14] or 0)
+            alt = [cols[2]]
+            if pop >= alt_min_population and cols[3]:
+                # Non-Latin scripts fold to non-ASCII keys nobody types here; skip them
+                alt += [a for a in cols[3].split(",") if fold(a).isascii()]
+            yield cols[1], cols[8], float(cols[4]), float(cols[5]), cols[17], pop, alt
+
+
+def read_country_info(path: str) -> dict[str, str]:
+    """ISO code -> country name from GeoNames countryInfo.txt."""
+    countries = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) > 4:
+                countries[cols[0]] = cols[4]
+    return countries
+
+
+def builtin_index() -> bytes:
+    """Index over the built-in cities.py list (no countries or populations)."""
+    from cities import CITIES
+
+    return build_index((name.title(), "", lat, lon, tz, 0, ()) for name, (lat, lon, tz) in CITIES.items())
+
+
+def open_geocoder(path: str | None = None) -> Geocoder:
+    """Geocoder over path (default GEOCODER_INDEX or data/places.bin), else the built-in list."""
+    path = path or os.getenv("GEOCODER_INDEX") or DEFAULT_INDEX
+    if os.path.exists(path):
+        return Geocoder(path)
+    return Geocoder(data=builtin_index())
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Build or query the offline geocoder index")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Index a GeoNames dump")
+    b.add_argument("--places", required=True, help="GeoNames citiesNNN.txt")
+    b.add_argument("--countries", default=None, help="GeoNames countryInfo.txt (country-name qualifiers)")
+    b.add_argument("--alt-min-population", type=int, default=ALT_NAME_MIN_POPULATION)
+    b.add_argument("--out", required=True)
+    q = sub.add_parser("lookup", help="Resolve names (or prefixes with --prefix)")
+    q.add_argument("query", nargs="+")
+    q.add_argument("--index", default=None)
+    q.add_argument("--prefix", action="store_true", help="List completions instead")
+    q.add_argument("--fuzzy", action="store_true", help="Accept a unique one-edit match")
+    q.add_argument("--limit", type=int, default=10)
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        countries = read_country_info(args.countries) if args.countries else None
+        data = build_index(read_geonames(args.places, args.alt_min_population), countries)
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "wb") as f:
+            f.write(data)
+        geo = Geocoder(data=data)
+        print(f"Wrote {args.out} ({len(data) / 1024 / 1024:.1f} MiB, {geo.places:,} places, "
+              f"{geo.keys:,} names) in {time.perf_counter() - t0:.1f}s")
+        return 0
+
+    geo = open_geocoder(args.index)
+    status = 0
+    for query in args.query:
+        t0 = time.perf_counter()
+        found = geo.search(query, args.limit) if args.prefix else [p for p in [geo.lookup(query, args.fuzzy)] if p]
+        us = (time.perf_counter() - t0) * 1e6
+        print(f"{query!r} ({us:.0f} us)")
+        if not found:
+            print("  not found")
+            status = 1
+        for p in found:
+            print(f"  {p.name}, {p.country or '-'}  {p.lat:.4f} {p.lon:.4f}  {p.tz}  pop {p.population:,}")
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -66,6 +66,11 @@ export const generateRoast = inngest.createFunction(
         }),
       });
 
+      const timing = res.headers.get("Server-Timing");
+      if (timing) {
+        console.log(`[calculate-chart] Server-Timing: ${timing}`);
+      }
+
       if (!res.ok) {
         throw new Error(`Chart API error: ${res.status}`);
       }
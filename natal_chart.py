@@ -12,19 +12,59 @@ Usage:
   python3 natal_chart.py --name "Sarah" --year 1992 --month 3 --day 15 \
     --hour 14 --minute 30 --lat -36.85 --lon 174.76 --tz Pacific/Auckland
 
+  python3 natal_chart.py --name "Sam" --year 1990 --month 6 --day 2 \
+    --city london --window 12:00-18:00
+
+  python3 natal_chart.py --name "Sam" --year 1990 --month 6 --day 2 \
+    --hour 14 --minute 5 --city london --return lunar --return-year 2026
+
   python3 natal_chart.py --list-cities
 
-Cities with built-in coordinates: wellington, auckland, sydney, london, etc.
+  python3 natal_chart.py --batch people.csv --workers 0 > charts.ndjson
+  cat people.ndjson | python3 natal_chart.py --batch - --output text
+
+Batch input is CSV with a header row or NDJSON, using the /api/chart field
+names; "city" may stand in for lat/lon/tz, and a blank hour means unknown.
+
+Set CHART_CACHE_PATH to a file to reuse computed charts across runs
+(CHART_CACHE_SIZE and CHART_CACHE_PRECISION tune the in-memory LRU).
+EPHEMERIS_BACKEND (or --ephemeris) picks the ephemeris: auto (SE files on
+SWEPHE_PATH where present, Moshier otherwise), moshier, swiss or jpl
+(SWEPHE_JPL_FILE); SE files are preloaded at startup unless
+EPHEMERIS_PRELOAD=0. bench/bench_ephemeris.py compares them.
+
+Set CHART_METRICS=1 to time each pipeline stage (see Metrics), and
+CHART_HOUSE_CHECK=1 to cross-check every house placement against
+swe.house_pos (see cusp_search). --profile runs one chart or batch under
+cProfile and splits the time between Python and swisseph per stage;
+CHART_PROFILE=1 lets API requests ask for the same (see profile_call).
+
+--city goes through the offline geocoder (geocoder.py): a GeoNames index at
+GEOCODER_INDEX (default data/places.bin) if built, else the built-in list
+shown by --list-cities. Accents and case don't matter; with GEOCODER_FUZZY=1
+a name one typo away from exactly one known place resolves to it too.
+With a timezone index at TZ_INDEX (default data/timezones.bin, see
+tz_index.py), --tz can be left out of --lat/--lon runs and API records.
+The "rarity" result field scores charts against the population table
+shipped as data/rarity.bin (RARITY_TABLE overrides it; see rarity.py).
+With a star catalog (sefstars.txt at FIXSTARS_CATALOG or on SWEPHE_PATH,
+see fixed_stars.py) the reading lists stars down to FIXSTARS_MAX_MAG
+conjunct the planets and angles.
 """
 
 from __future__ import annotations
 
-import argparse
+import itertools
+import json
 import math
 import os
 import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import Mapping
 from datetime import datetime
-from itertools import combinations
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
 import swisseph as swe
@@ -95,6 +135,17 @@ ASPECT_DEFS = {
     "opposition": (180, 8),
 }
 
+# Houses the angles are placed in, whatever the house system
+ANGLE_HOUSES = {"Ascendant": 1, "MC": 10}
+
+# Display names for the common house systems; any other code swisseph
+# knows is accepted too, under swe.house_name
+HOUSE_SYSTEM_NAMES = {
+    "P": "Placidus", "K": "Koch", "O": "Porphyry", "R": "Regiomontanus",
+    "C": "Campanus", "E": "Equal", "W": "Whole Sign", "B": "Alcabitius",
+    "M": "Morinus", "T": "Topocentric",
+}
+
 LUMINARIES = {"Sun", "Moon"}
 LUMINARY_BONUS = 2
 
@@ -109,106 +160,51 @@ MOON_PHASES = [
     (315, 360, "Waning Crescent"),
 ]
 
-CITIES = {
-    # New Zealand
-    "wellington": (-41.2866, 174.7762, "Pacific/Auckland"),
-    "auckland": (-36.8485, 174.7633, "Pacific/Auckland"),
-    "christchurch": (-43.5321, 172.6362, "Pacific/Auckland"),
-    "dunedin": (-45.8788, 170.5028, "Pacific/Auckland"),
-    "hamilton": (-37.7870, 175.2793, "Pacific/Auckland"),
-    "tauranga": (-37.6878, 176.1651, "Pacific/Auckland"),
-    "napier": (-39.4928, 176.9120, "Pacific/Auckland"),
-    "nelson": (-41.2706, 173.2840, "Pacific/Auckland"),
-    "queenstown": (-45.0312, 168.6626, "Pacific/Auckland"),
-    "palmerston north": (-40.3523, 175.6082, "Pacific/Auckland"),
-    "rotorua": (-38.1368, 176.2497, "Pacific/Auckland"),
-    "whangarei": (-35.7275, 174.3166, "Pacific/Auckland"),
-    "new plymouth": (-39.0556, 174.0752, "Pacific/Auckland"),
-    "invercargill": (-46.4132, 168.3538, "Pacific/Auckland"),
-    "whanganui": (-39.9301, 175.0479, "Pacific/Auckland"),
-    "gisborne": (-38.6623, 178.0176, "Pacific/Auckland"),
-    # Australia
-    "sydney": (-33.8688, 151.2093, "Australia/Sydney"),
-    "melbourne": (-37.8136, 144.9631, "Australia/Melbourne"),
-    "brisbane": (-27.4698, 153.0251, "Australia/Brisbane"),
-    "perth": (-31.9505, 115.8605, "Australia/Perth"),
-    "adelaide": (-34.9285, 138.6007, "Australia/Adelaide"),
-    "gold coast": (-28.0167, 153.4000, "Australia/Brisbane"),
-    "canberra": (-35.2809, 149.1300, "Australia/Sydney"),
-    "hobart": (-42.8821, 147.3272, "Australia/Hobart"),
-    "darwin": (-12.4634, 130.8456, "Australia/Darwin"),
-    # UK & Ireland
-    "london": (51.5074, -0.1278, "Europe/London"),
-    "edinburgh": (55.9533, -3.1883, "Europe/London"),
-    "manchester": (53.4808, -2.2426, "Europe/London"),
-    "dublin": (53.3498, -6.2603, "Europe/Dublin"),
-    "glasgow": (55.8642, -4.2518, "Europe/London"),
-    "birmingham": (52.4862, -1.8904, "Europe/London"),
-    # Europe
-    "paris": (48.8566, 2.3522, "Europe/Paris"),
-    "berlin": (52.5200, 13.4050, "Europe/Berlin"),
-    "amsterdam": (52.3676, 4.9041, "Europe/Amsterdam"),
-    "rome": (41.9028, 12.4964, "Europe/Rome"),
-    "madrid": (40.4168, -3.7038, "Europe/Madrid"),
-    "lisbon": (38.7223, -9.1393, "Europe/Lisbon"),
-    "barcelona": (41.3874, 2.1686, "Europe/Madrid"),
-    "vienna": (48.2082, 16.3738, "Europe/Vienna"),
-    "prague": (50.0755, 14.4378, "Europe/Prague"),
-    "copenhagen": (55.6761, 12.5683, "Europe/Copenhagen"),
-    "stockholm": (59.3293, 18.0686, "Europe/Stockholm"),
-    "oslo": (59.9139, 10.7522, "Europe/Oslo"),
-    "helsinki": (60.1699, 24.9384, "Europe/Helsinki"),
-    "zurich": (47.3769, 8.5417, "Europe/Zurich"),
-    "athens": (37.9838, 23.7275, "Europe/Athens"),
-    "istanbul": (41.0082, 28.9784, "Europe/Istanbul"),
-    # North America
-    "new york": (40.7128, -74.0060, "America/New_York"),
-    "los angeles": (34.0522, -118.2437, "America/Los_Angeles"),
-    "chicago": (41.8781, -87.6298, "America/Chicago"),
-    "houston": (29.7604, -95.3698, "America/Chicago"),
-    "san francisco": (37.7749, -122.4194, "America/Los_Angeles"),
-    "seattle": (47.6062, -122.3321, "America/Los_Angeles"),
-    "miami": (25.7617, -80.1918, "America/New_York"),
-    "denver": (39.7392, -104.9903, "America/Denver"),
-    "austin": (30.2672, -97.7431, "America/Chicago"),
-    "boston": (42.3601, -71.0589, "America/New_York"),
-    "toronto": (43.6532, -79.3832, "America/Toronto"),
-    "vancouver": (49.2827, -123.1207, "America/Vancouver"),
-    "montreal": (45.5017, -73.5673, "America/Toronto"),
-    "mexico city": (19.4326, -99.1332, "America/Mexico_City"),
-    # South America
-    "sao paulo": (-23.5505, -46.6333, "America/Sao_Paulo"),
-    "buenos aires": (-34.6037, -58.3816, "America/Argentina/Buenos_Aires"),
-    "bogota": (4.7110, -74.0721, "America/Bogota"),
-    "lima": (-12.0464, -77.0428, "America/Lima"),
-    "santiago": (-33.4489, -70.6693, "America/Santiago"),
-    # Asia
-    "tokyo": (35.6762, 139.6503, "Asia/Tokyo"),
-    "beijing": (39.9042, 116.4074, "Asia/Shanghai"),
-    "shanghai": (31.2304, 121.4737, "Asia/Shanghai"),
-    "hong kong": (22.3193, 114.1694, "Asia/Hong_Kong"),
-    "singapore": (1.3521, 103.8198, "Asia/Singapore"),
-    "mumbai": (19.0760, 72.8777, "Asia/Kolkata"),
-    "delhi": (28.7041, 77.1025, "Asia/Kolkata"),
-    "bangkok": (13.7563, 100.5018, "Asia/Bangkok"),
-    "seoul": (37.5665, 126.9780, "Asia/Seoul"),
-    "dubai": (25.2048, 55.2708, "Asia/Dubai"),
-    "taipei": (25.0330, 121.5654, "Asia/Taipei"),
-    "kuala lumpur": (3.1390, 101.6869, "Asia/Kuala_Lumpur"),
-    "jakarta": (-6.2088, 106.8456, "Asia/Jakarta"),
-    "manila": (14.5995, 120.9842, "Asia/Manila"),
-    # Africa
-    "cape town": (-33.9249, 18.4241, "Africa/Johannesburg"),
-    "johannesburg": (-26.2041, 28.0473, "Africa/Johannesburg"),
-    "nairobi": (-1.2921, 36.8219, "Africa/Nairobi"),
-    "cairo": (30.0444, 31.2357, "Africa/Cairo"),
-    "lagos": (6.5244, 3.3792, "Africa/Lagos"),
-    # Pacific
-    "honolulu": (21.3069, -157.8583, "Pacific/Honolulu"),
-    "suva": (-18.1416, 178.4419, "Pacific/Fiji"),
-    "noumea": (-22.2558, 166.4505, "Pacific/Noumea"),
+
+def __getattr__(name: str):
+    # CITIES lives in cities.py and is only loaded when something asks for it
+    if name == "CITIES":
+        from cities import CITIES
+        return CITIES
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Fields a birth record must carry for /api/chart and compute_charts_batch
+# ("city" may stand in for lat, lon and tz, and tz may be left out given a
+# timezone index; see with_location)
+REQUIRED_FIELDS = ["name", "year", "month", "day", "hour", "minute", "lat", "lon", "tz"]
+
+# Fields an /api/chart result can carry, with the downstream stages (see
+# CHART_STAGES, plus "format" for the text rendering) each one needs beyond
+# compute_chart. chart_result only runs the stages its fields need.
+RESULT_FIELDS = {
+    "formatted_output": ("aspects", "configurations", "analysis", "stars", "format"),
+    "sun_sign": (), "moon_sign": (), "rising_sign": (), "mercury_sign": (),
+    "venus_sign": (), "mars_sign": (), "jupiter_sign": (), "saturn_sign": (),
+    "planets": (),
+    "houses": (),
+    "ephemeris": (),
+    "aspects": ("aspects",),
+    "configurations": ("aspects", "configurations"),
+    "analysis": ("analysis",),
+    "rarity": ("aspects", "configurations", "analysis"),
+    "fixed_stars": ("stars",),
+}
+
+_SIGN_FIELDS = tuple(f for f in RESULT_FIELDS if f.endswith("_sign"))
+
+# Named field sets for the "fields" request value; full_text is the
+# payload /api/chart has always returned and stays the default
+RESULT_PROFILES = {
+    "teaser": ("sun_sign", "moon_sign", "rising_sign"),
+    "structured": (*_SIGN_FIELDS, "planets", "houses", "aspects", "configurations", "analysis",
+                   "fixed_stars", "ephemeris"),
+    "full_text": ("formatted_output", *_SIGN_FIELDS, "planets"),
 }
 
+# Upper bound on records per batch request (keeps one call inside maxDuration)
+MAX_BATCH = 1000
+
 
 # ─── Helpers ──────────────────────────────────────────────────────────────────
 
@@ -217,6 +213,40 @@ def norm360(x: float) -> float:
     return x + 360.0 if x < 0 else x
 
 
+def cusp_search(cusps):
+    """
+    House finder (longitude -> 1-12) over 12 cusp longitudes: a binary
+    search on the cusps' offsets from the 1st, so the wrap through 0° Aries
+    needs no special case. None if the cusps don't run once round the
+    zodiac in order, where only swe.house_pos can place a point. A point
+    on a cusp is in the house the cusp opens; house_pos recomputes the cusps
+    itself and can disagree within about 1e-6° of one.
+    """
+    if len(cusps) != 12:
+        return None
+    c0 = cusps[0]
+    offsets = [(c - c0) % 360.0 for c in cusps]
+    if any(a > b for a, b in zip(offsets, offsets[1:])):
+        return None
+    return lambda lon: bisect_right(offsets, (lon - c0) % 360.0)
+
+
+def houses_of(lons, cusps):
+    """
+    cusp_search over many charts as one array operation: lons is (charts,
+    points) and cusps (charts, 12), both in degrees; returns the (charts,
+    points) house numbers. NaN longitudes come back as 0. Charts whose cusps
+    aren't in zodiacal order get wrong houses; check with cusp_search.
+    """
+    import numpy as np
+
+    lons = np.asarray(lons, dtype=float)
+    cusps = np.asarray(cusps, dtype=float)
+    offsets = (cusps - cusps[:, :1]) % 360.0
+    x = (lons - cusps[:, :1]) % 360.0
+    return (x[:, :, None] >= offsets[:, None, :]).sum(axis=2)
+
+
 def ang_diff(a: float, b: float) -> float:
     d = (norm360(a) - norm360(b)) % 360.0
     return d - 360.0 if d > 180.0 else d
@@ -226,12 +256,16 @@ def abs_ang_diff(a: float, b: float) -> float:
     return abs(ang_diff(a, b))
 
 
+# "DD°MM' " for every whole minute of a sign: deg_to_sign is a lookup, not a format
+_DEG_MIN = [f"{m // 60:02d}\u00b0{m % 60:02d}' " for m in range(30 * 60)]
+
+
 def deg_to_sign(d: float) -> str:
     d = norm360(d)
     si = int(d / 30)
     deg_in = d - si * 30
-    mm = int((deg_in - int(deg_in)) * 60)
-    return f"{int(deg_in):02d}\u00b0{mm:02d}' {SIGNS[si]}"
+    whole = int(deg_in)
+    return _DEG_MIN[whole * 60 + int((deg_in - whole) * 60)] + SIGNS[si]
 
 
 def sign_of(d: float) -> str:
@@ -278,80 +312,991 @@ def julday_ut(dt_utc: datetime) -> float:
     return swe.julday(dt_utc.year, dt_utc.month, dt_utc.day, hh, swe.GREG_CAL)
 
 
+@lru_cache(maxsize=None)
+def get_zone(tz_str: str) -> ZoneInfo:
+    # ZoneInfo only keeps a handful of zones strongly cached, so busy
+    # instances re-read tzdata from disk; hold on to every zone we've seen.
+    return ZoneInfo(tz_str)
+
+
+UTC = get_zone("UTC")
+
+
+def house_systems(spec) -> tuple[str, ...]:
+    """
+    House system codes for an hsys value: one code ("P"), several joined
+    or comma-separated ("P,W", "PW") or a list. The first is the chart's
+    primary system. Raises ValueError for a code swisseph doesn't know.
+    """
+    codes = [spec] if isinstance(spec, str) else list(spec)
+    systems = tuple(dict.fromkeys(c for code in codes for c in str(code) if c not in ", "))
+    for c in systems:
+        if c not in HOUSE_SYSTEM_NAMES and not swe.house_name(c.encode("ascii")):
+            raise ValueError(f"Unknown house system {c!r}")
+    if not systems:
+        raise ValueError("No house system given")
+    return systems
+
+
+def house_system_name(code: str) -> str:
+    return HOUSE_SYSTEM_NAMES.get(code) or swe.house_name(code.encode("ascii"))
+
+
 def ordinal(n: int) -> str:
     if 11 <= n % 100 <= 13:
         return f"{n}th"
     return f"{n}{['th','st','nd','rd','th','th','th','th','th','th'][n%10]}"
 
 
+# ─── Metrics ──────────────────────────────────────────────────────────────────
+
+# Latency histogram bucket upper bounds in microseconds (last bucket is +Inf)
+METRIC_BUCKETS_US = (50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "t0")
+
+    def __init__(self, metrics: Metrics, stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.metrics.observe(self.stage, (time.perf_counter() - self.t0) * 1e6)
+        return False
+
+
+class Metrics:
+    """
+    Per-stage pipeline timings, latency histograms and counters.
+
+    Disabled by default (set CHART_METRICS=1 or call enable()); while disabled
+    stage() returns a shared no-op context manager, so instrumented code pays
+    one method call per stage. Between begin_request() and end_request() the
+    stage durations of the current request are also collected, for the
+    Server-Timing header and the per-request log line.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self) -> None:
+        self.histograms: dict[str, list[int]] = {}
+        self.totals_us: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+        self.current: dict[str, float] | None = None
+        self._request_t0 = 0.0
+
+    def enable(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+
+    def stage(self, name: str):
+        return _StageTimer(self, name) if self.enabled else _NULL_TIMER
+
+    def observe(self, stage: str, us: float) -> None:
+        hist = self.histograms.get(stage)
+        if hist is None:
+            hist = self.histograms[stage] = [0] * (len(METRIC_BUCKETS_US) + 1)
+            self.totals_us[stage] = 0.0
+        hist[bisect_left(METRIC_BUCKETS_US, us)] += 1
+        self.totals_us[stage] += us
+        if self.current is not None:
+            self.current[stage] = self.current.get(stage, 0.0) + us
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def begin_request(self) -> None:
+        if self.enabled:
+            self.current = {}
+            self._request_t0 = time.perf_counter()
+
+    def end_request(self) -> dict[str, float]:
+        """Stage durations (us) of the current request, plus "total"; {} if disabled."""
+        if self.current is None:
+            return {}
+        timings = self.current
+        self.current = None
+        timings["total"] = (time.perf_counter() - self._request_t0) * 1e6
+        self.observe("total", timings["total"])
+        return timings
+
+    @staticmethod
+    def server_timing(timings: dict[str, float]) -> str:
+        return ", ".join(f"{stage};dur={us / 1000:.3f}" for stage, us in timings.items())
+
+    def snapshot(self) -> dict:
+        bounds = [f"le_{b}us" for b in METRIC_BUCKETS_US] + ["le_inf"]
+        stages = {}
+        for stage, hist in self.histograms.items():
+            n = sum(hist)
+            stages[stage] = {
+                "count": n,
+                "mean_us": self.totals_us[stage] / n if n else 0.0,
+                "buckets": dict(zip(bounds, hist)),
+            }
+        return {
+            "enabled": self.enabled,
+            "counters": dict(self.counters),
+            "cache": CHART_CACHE.stats(),
+            "stages": stages,
+        }
+
+
+METRICS = Metrics(enabled=os.getenv("CHART_METRICS", "") not in ("", "0"))
+
+
+def dump_metrics(file=None) -> None:
+    """Write the current metrics snapshot as JSON (stderr by default)."""
+    print(json.dumps(METRICS.snapshot(), indent=2), file=file or sys.stderr)
+
+
+# ─── Profiling ────────────────────────────────────────────────────────────────
+
+# A request may ask for a profile ("profile": true, or ?profile) only with
+# CHART_PROFILE=1; with CHART_PROFILE_DIR set each one is also kept there
+PROFILE_REQUESTS = os.getenv("CHART_PROFILE", "") not in ("", "0")
+
+# Stages a profile reports, by the function that runs each (_chart_at is
+# compute_chart after the zone lookup, and is what batches call)
+PROFILE_STAGES = {
+    "compute_chart": "_chart_at",
+    "compute_aspects": "compute_aspects",
+    "detect_configurations": "detect_configurations",
+    "analyze_chart": "analyze_chart",
+    "star_contacts": "star_contacts",
+    "format_output": "format_output",
+}
+PROFILE_TOP = 15
+
+
+def profile_call(fn, *args, path: str | None = None, **kwargs):
+    """
+    Run fn(*args, **kwargs) under cProfile against an empty chart cache, so
+    every stage really runs, and return (result, report) with the report
+    from profile_report. With path the raw profile is also written there,
+    for python -m pstats, snakeviz and the like. Nothing here is imported
+    or hooked until a profile is asked for.
+    """
+    import cProfile
+    import pstats
+
+    global CHART_CACHE
+    saved, CHART_CACHE = CHART_CACHE, ChartCache(maxsize=0)
+    prof = cProfile.Profile()
+    try:
+        result = prof.runcall(fn, *args, **kwargs)
+    finally:
+        CHART_CACHE = saved
+    stats = pstats.Stats(prof)
+    if path:
+        stats.dump_stats(path)
+    return result, {**profile_report(stats), "artifact": path}
+
+
+def _is_swisseph(func: tuple) -> bool:
+    return func[0] == "~" and "swisseph." in func[2]
+
+
+def _func_label(func: tuple) -> str:
+    filename, line, name = func
+    return name if filename == "~" else f"{os.path.basename(filename)}:{line}({name})"
+
+
+def profile_report(stats) -> dict:
+    """
+    JSON-serializable summary of a pstats.Stats: total, swisseph (C) and
+    Python milliseconds, then per PROFILE_STAGES stage its calls, cumulative
+    ms and the swisseph ms beneath it, then the PROFILE_TOP functions by own
+    time. Swisseph time is split between callers in proportion to the
+    calls' cumulative time, which is exact when each call site is in one
+    function, as in this pipeline.
+    """
+    raw = stats.stats  # func -> (primitive calls, calls, own s, cumulative s, callers)
+    callees: dict[tuple, list] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    memo: dict[tuple, float] = {}
+
+    def swisseph_under(func: tuple, active: frozenset = frozenset()) -> float:
+        if _is_swisseph(func):
+            return raw[func][3]
+        if func in memo or func in active:
+            return memo.get(func, 0.0)
+        total = 0.0
+        for callee, edge_ct in callees.get(func, ()):
+            ct = raw[callee][3]
+            if ct > 0:
+                total += swisseph_under(callee, active | {func}) * min(edge_ct / ct, 1.0)
+        memo[func] = total
+        return total
+
+    swisseph_s = sum(v[2] for f, v in raw.items() if _is_swisseph(f))
+    stages = {}
+    for stage, name in PROFILE_STAGES.items():
+        funcs = [f for f in raw if f[2] == name and f[0].endswith("natal_chart.py")]
+        stages[stage] = {
+            "calls": sum(raw[f][1] for f in funcs),
+            "ms": round(sum(raw[f][3] for f in funcs) * 1e3, 3),
+            "swisseph_ms": round(sum(swisseph_under(f) for f in funcs) * 1e3, 3),
+        }
+    top = sorted(raw.items(), key=lambda kv: kv[1][2], reverse=True)[:PROFILE_TOP]
+    return {
+        "total_ms": round(stats.total_tt * 1e3, 3),
+        "python_ms": round((stats.total_tt - swisseph_s) * 1e3, 3),
+        "swisseph_ms": round(swisseph_s * 1e3, 3),
+        "stages": stages,
+        "top": [{"function": _func_label(f), "calls": v[1], "own_ms": round(v[2] * 1e3, 3),
+                 "cumulative_ms": round(v[3] * 1e3, 3)} for f, v in top],
+    }
+
+
+def format_profile(report: dict) -> str:
+    """Text rendering of a profile_report, for the CLI."""
+    lines = [f"PROFILE  {report['total_ms']:.2f} ms: Python {report['python_ms']:.2f} ms, "
+             f"swisseph {report['swisseph_ms']:.2f} ms",
+             f"  {'stage':<22s} {'calls':>6s} {'ms':>9s} {'swisseph ms':>12s}"]
+    for stage, s in report["stages"].items():
+        lines.append(f"  {stage:<22s} {s['calls']:>6d} {s['ms']:>9.3f} {s['swisseph_ms']:>12.3f}")
+    lines.append(f"  {'function':<58s} {'calls':>6s} {'own ms':>9s} {'cum ms':>9s}")
+    for t in report["top"]:
+        lines.append(f"  {t['function'][:58]:<58s} {t['calls']:>6d} {t['own_ms']:>9.3f} "
+                     f"{t['cumulative_ms']:>9.3f}")
+    if report.get("artifact"):
+        lines.append(f"  profile written to {report['artifact']}")
+    return "\n".join(lines)
+
+
+def _profile_path() -> str | None:
+    """A fresh .prof path under CHART_PROFILE_DIR, or None if it is not set."""
+    directory = os.getenv("CHART_PROFILE_DIR")
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"chart-{time.time_ns()}.prof")
+
+
+# ─── Chart Cache ──────────────────────────────────────────────────────────────
+
+class ChartCache:
+    """
+    Bounded LRU of computed charts, keyed on normalized birth input:
+    (UTC instant, lat, lon rounded to `precision` decimals, hsys, time_known)
+    plus the ephemeris that serves it (natal_chart.EPHE_KEY: backend, the
+    source swisseph actually used, its path and any ephemeris tables).
+
+    Entries hold the place/instant-dependent chart core plus, once computed,
+    the downstream stages (aspects, configurations, analysis, stars), so a
+    repeat birth only re-runs format_output. With `path` set, the core is
+    also written through to a local SQLite file and read back on a memory
+    miss, letting warm instances and later CLI runs reuse it. Stages stay in
+    memory: they depend on process settings (the star catalog and
+    FIXSTARS_MAX_MAG) that the key does not carry. Since the key names the
+    ephemeris, rows written under another backend or table set are never
+    read back. Cached entries are shared between callers and must be
+    treated as read-only.
+    """
+
+    def __init__(self, maxsize: int = 1024, precision: int = 4, path: str | None = None):
+        self.maxsize = maxsize
+        self.precision = precision
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._db = None
+
+    def key(self, dt_utc: datetime, lat: float, lon: float, hsys: str, time_known: bool,
+            ephemeris: str = "") -> tuple:
+        return (dt_utc.isoformat(), round(lat, self.precision), round(lon, self.precision),
+                hsys, bool(time_known), ephemeris)
+
+    def _disk(self):
+        if self._db is None and self.path:
+            import sqlite3
+            self._db = sqlite3.connect(self.path, timeout=5)
+            self._db.execute("CREATE TABLE IF NOT EXISTS charts (key TEXT PRIMARY KEY, entry BLOB)")
+        return self._db
+
+    def get(self, key: tuple) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        db = self._disk()
+        if db is not None:
+            row = db.execute("SELECT entry FROM charts WHERE key = ?", (repr(key),)).fetchone()
+            if row is not None:
+                import pickle
+                # Rows written before stages stayed in memory may carry them
+                entry = {"core": pickle.loads(row[0])["core"]}
+                self._remember(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    def peek(self, key: tuple | None) -> dict | None:
+        """Look up an in-memory entry without touching LRU order or counters."""
+        return self._entries.get(key) if key is not None else None
+
+    def put(self, key: tuple, entry: dict) -> None:
+        self._remember(key, entry)
+        db = self._disk()
+        if db is not None:
+            import pickle
+            with db:
+                db.execute("INSERT OR REPLACE INTO charts (key, entry) VALUES (?, ?)",
+                           (repr(key), pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)))
+
+    def _remember(self, key: tuple, entry: dict) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop the in-memory entries and counters; disk rows stay, keyed by their ephemeris."""
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = self.disk_hits = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_hits": self.disk_hits,
+        }
+
+
+CHART_CACHE = ChartCache(
+    maxsize=int(os.getenv("CHART_CACHE_SIZE", "1024")),
+    precision=int(os.getenv("CHART_CACHE_PRECISION", "4")),
+    path=os.getenv("CHART_CACHE_PATH") or None,
+)
+
+
+# ─── Ephemeris Backend ────────────────────────────────────────────────────────
+
+# swisseph flag per backend. "auto" is what charts always did: SE files from
+# SWEPHE_PATH where swisseph finds them, its built-in Moshier theory where
+# not. "swiss" and "jpl" insist on their files and fail at startup without.
+EPHEMERIS_BACKENDS = {
+    "auto": swe.FLG_SWIEPH,
+    "moshier": swe.FLG_MOSEPH,
+    "swiss": swe.FLG_SWIEPH,
+    "jpl": swe.FLG_JPLEPH,
+}
+_SOURCE_FLAGS = swe.FLG_SWIEPH | swe.FLG_MOSEPH | swe.FLG_JPLEPH
+SOURCE_NAMES = {swe.FLG_SWIEPH: "swiss", swe.FLG_MOSEPH: "moshier", swe.FLG_JPLEPH: "jpl"}
+
+# Backend in use and its calc_ut flag (see use_ephemeris_backend)
+EPHE_BACKEND = "auto"
+EPHE_FLAG = swe.FLG_SWIEPH
+# What serves charts, as a chart cache key part: the backend, the source
+# swisseph fell to under "auto", the path, and any ephemeris tables
+EPHE_KEY = "auto"
+_EPHE_SETUP = ("auto", None, "", None)
+
+# SE file name prefix -> a body whose position reads from that file
+_SE_FILE_BODIES = {"sepl": swe.MERCURY, "semo": swe.MOON, "seas": swe.CHIRON}
+
+
+def ephemeris_source(retflag: int) -> str:
+    """Backend name for a calc_ut return flag (what was actually used)."""
+    return SOURCE_NAMES.get(retflag & _SOURCE_FLAGS, "unknown")
+
+
+def _preload_se_files(path: str) -> list[str]:
+    """
+    Read every SE file on path into the page cache and have swisseph open
+    it, so the first chart in each file's range pays no file I/O. Returns
+    the files loaded.
+    """
+    loaded = []
+    for folder in filter(None, path.split(os.pathsep)):
+        try:
+            names = sorted(os.listdir(folder))
+        except OSError:
+            continue
+        for fname in names:
+            stem, ext = os.path.splitext(fname)
+            pid = _SE_FILE_BODIES.get(stem[:4])
+            if ext != ".se1" or pid is None or len(stem) != 7:
+                continue
+            with open(os.path.join(folder, fname), "rb") as f:
+                while f.read(1 << 20):
+                    pass
+            # sepl_18 covers 1800-2400, sepl_m54 5400-4800 BCE: probe mid-range
+            century = -int(stem[6:]) if stem[5] == "m" else int(stem[5:])
+            try:
+                swe.calc_ut(swe.julday(century * 100 + 300, 1, 1, 0.0), pid, EPHE_FLAG)
+            except swe.Error:
+                pass
+            loaded.append(fname)
+    return loaded
+
+
+def use_ephemeris_backend(backend: str = "auto", path: str | None = None,
+                          jpl_file: str | None = None, preload: bool = True) -> dict:
+    """
+    Select the ephemeris for every later chart: "auto", "moshier", "swiss"
+    (SE files on path) or "jpl" (jpl_file, default de441.eph, on path).
+    path defaults to SWEPHE_PATH. With preload, SE files are read and opened
+    now rather than by the first chart that needs them. Raises ValueError if
+    a "swiss" or "jpl" backend can't find its files. Clears the in-memory
+    chart cache so no chart mixes backends, and returns what was set up.
+    """
+    global EPHE_BACKEND, EPHE_FLAG, _EPHE_READY, _EPHE_SETUP
+    if backend not in EPHEMERIS_BACKENDS:
+        raise ValueError(f"Unknown ephemeris backend {backend!r} "
+                         f"(choose from {', '.join(EPHEMERIS_BACKENDS)})")
+    path = os.getenv("SWEPHE_PATH", "") if path is None else path
+    swe.set_ephe_path(path)
+    if backend == "jpl":
+        jpl_file = jpl_file or os.getenv("SWEPHE_JPL_FILE") or "de441.eph"
+        swe.set_jpl_file(jpl_file)
+    EPHE_BACKEND, EPHE_FLAG = backend, EPHEMERIS_BACKENDS[backend]
+    _EPHE_READY = True
+
+    try:
+        _, ret = swe.calc_ut(2451545.0, swe.SUN, EPHE_FLAG)
+        source = ephemeris_source(ret)
+    except swe.Error as e:
+        source = f"error: {e}"
+    if backend in ("swiss", "jpl") and source != backend:
+        raise ValueError(f"Ephemeris backend {backend!r} has no files on {path or 'the default path'!r} "
+                         f"(swisseph fell back to {source})")
+    loaded = _preload_se_files(path) if preload and backend in ("auto", "swiss") else []
+    _EPHE_SETUP = (backend, source, os.path.abspath(path) if path else "",
+                   jpl_file if backend == "jpl" else None)
+    _update_ephe_key()
+    CHART_CACHE.clear()
+    return {"backend": backend, "source": source, "path": path, "preloaded": loaded}
+
+
+def _update_ephe_key() -> None:
+    global EPHE_KEY
+    backend, source, path, jpl_file = _EPHE_SETUP
+    key = f"{backend}:{source}:{path}" + (f":{jpl_file}" if jpl_file else "")
+    if EPHEMERIS_TABLES is not None:
+        bodies = ",".join(str(pid) for pid in sorted(EPHEMERIS_TABLES.enabled))
+        key += f"|tables:{os.path.abspath(EPHEMERIS_TABLES.path)}:{bodies}"
+    EPHE_KEY = key
+
+
+# ─── Ephemeris Tables ─────────────────────────────────────────────────────────
+
+# Optional precomputed Chebyshev tables for slow bodies (see ephemeris_tables.py)
+EPHEMERIS_TABLES = None
+
+
+def use_ephemeris_tables(path: str | None, bodies: list[str] | None = None) -> None:
+    """
+    Serve the given bodies (default: every body in the file) from a table
+    file instead of swisseph; None switches back to direct computation.
+    Clears the in-memory chart cache so no chart mixes the two sources.
+    """
+    global EPHEMERIS_TABLES
+    if EPHEMERIS_TABLES is not None:
+        EPHEMERIS_TABLES.close()
+        EPHEMERIS_TABLES = None
+    if path:
+        from ephemeris_tables import EphemerisTables
+
+        tables = EphemerisTables(path)
+        if bodies:
+            tables.enabled = {PLANET_IDS[b] for b in bodies} & set(tables.bodies)
+        EPHEMERIS_TABLES = tables
+    _update_ephe_key()
+    CHART_CACHE.clear()
+
+
+if os.getenv("EPHEMERIS_TABLES"):
+    use_ephemeris_tables(
+        os.getenv("EPHEMERIS_TABLES"),
+        [b.strip() for b in os.getenv("EPHEMERIS_TABLE_BODIES", "").split(",") if b.strip()],
+    )
+
+
+# ─── Geocoding ────────────────────────────────────────────────────────────────
+
+# Offline place index (see geocoder.py), opened on the first city lookup.
+# Names match exactly unless GEOCODER_FUZZY=1, which also accepts the one
+# known name a single typo away (never a guess between two)
+GEOCODER = None
+GEOCODER_FUZZY = os.getenv("GEOCODER_FUZZY", "") not in ("", "0")
+
+
+def geocode(city: str, fuzzy: bool | None = None):
+    """Best geocoder.Place for a city name ("Sao Paulo", "paris, france"), or None."""
+    global GEOCODER
+    if GEOCODER is None:
+        from geocoder import open_geocoder
+
+        GEOCODER = open_geocoder()
+    with METRICS.stage("geocode"):
+        return GEOCODER.lookup(city, GEOCODER_FUZZY if fuzzy is None else fuzzy)
+
+
+# Offline lat/lon -> zone index (see tz_index.py), opened on the first lookup
+TZ_INDEX = None
+_TZ_INDEX_OPENED = False
+
+
+def timezone_at(lat: float, lon: float) -> str | None:
+    """IANA zone at (lat, lon) from the timezone index, or None if none is built."""
+    global TZ_INDEX, _TZ_INDEX_OPENED
+    if not _TZ_INDEX_OPENED:
+        from tz_index import open_tz_index
+
+        TZ_INDEX = open_tz_index()
+        _TZ_INDEX_OPENED = True
+    if TZ_INDEX is None:
+        return None
+    with METRICS.stage("tz_lookup"):
+        return TZ_INDEX.zone_at(lat, lon)
+
+
+_TIME_KNOWN_WORDS = {"true": True, "yes": True, "y": True, "1": True,
+                     "false": False, "no": False, "n": False, "0": False}
+
+
+def record_time_known(rec: dict) -> bool:
+    """
+    A birth record's time_known: a JSON boolean, 0/1, or a string as CSV
+    and hand-written JSON carry it ("false", "no", "0", ...; blank means
+    absent). Absent is True. Raises ValueError for anything else.
+    """
+    value = rec.get("time_known")
+    if value is None or value == "":
+        return True
+    if isinstance(value, str):
+        value = _TIME_KNOWN_WORDS.get(value.strip().lower(), value)
+    if value in (True, False):   # also 1 and 0
+        return bool(value)
+    raise ValueError(f"Invalid time_known: {rec['time_known']!r} (expected true or false)")
+
+
+def with_location(rec: dict) -> dict:
+    """
+    rec with lat/lon/tz filled in from its "city" field where they are
+    missing, and tz from the coordinates if it is still missing; explicit
+    values always win. The place a city resolved to is kept as
+    "resolved_city" for the response to echo (see echo_city). Raises
+    ValueError for a city the geocoder cannot resolve. Without a timezone
+    index a missing tz stays missing.
+    """
+    city = rec.get("city")
+    if city and not all(k in rec for k in ("lat", "lon", "tz")):
+        place = geocode(str(city))
+        if place is None:
+            raise ValueError(f"Unknown city: {city}")
+        rec = dict(rec)
+        rec.setdefault("lat", place.lat)
+        rec.setdefault("lon", place.lon)
+        rec.setdefault("tz", place.tz)
+        rec["resolved_city"] = {"name": place.name, "country": place.country,
+                                "lat": place.lat, "lon": place.lon, "tz": place.tz}
+    if "tz" not in rec and "lat" in rec and "lon" in rec:
+        try:
+            tz = timezone_at(float(rec["lat"]), float(rec["lon"]))
+        except (TypeError, ValueError):
+            return rec      # bad coordinates are reported by the chart itself
+        if tz is not None:
+            rec = dict(rec, tz=tz)
+    return rec
+
+
+def echo_city(rec: dict, payload: dict) -> dict:
+    """payload with the place rec's "city" resolved to, if it had one, so callers can see it."""
+    if "resolved_city" in rec:
+        payload["resolved_city"] = rec["resolved_city"]
+    return payload
+
+
+# ─── Chart Model ──────────────────────────────────────────────────────────────
+
+class Point(Mapping):
+    """
+    One chart point in four slots: longitude, speed, house and sign index.
+    Sign, element, modality and retrograde are derived on access; deg_str
+    is rendered on first access and kept, since a request reads it from the
+    text reading, "planets" and to_dict alike.
+    Reads like the dict it replaces ({"lon", "sign", "deg_str", "house",
+    "speed", "retrograde"}, or {"lon": None, "error"} for a point that could
+    not be computed), so code written against dicts keeps working. Points
+    are shared through the chart cache, so they are read-only.
+    """
+
+    __slots__ = ("lon", "speed", "house", "sign_index", "error", "_deg_str")
+    _KEYS = ("lon", "sign", "deg_str", "house", "speed", "retrograde")
+    _ERROR_KEYS = ("lon", "error")
+
+    def __init__(self, lon: float | None, speed: float = 0.0, house: int | None = None,
+                 error: str | None = None):
+        _set = object.__setattr__
+        _set(self, "lon", lon)
+        _set(self, "speed", speed)
+        _set(self, "house", house)
+        _set(self, "error", error)
+        _set(self, "sign_index", int(norm360(lon) / 30) if lon is not None else None)
+        _set(self, "_deg_str", None)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f"Point is read-only (can't set {name!r})")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"Point is read-only (can't delete {name!r})")
+
+    def __reduce__(self):
+        return Point, (self.lon, self.speed, self.house, self.error)
+
+    @classmethod
+    def failed(cls, error: str) -> Point:
+        return cls(None, error=error)
+
+    @property
+    def sign(self) -> str:
+        return SIGNS[self.sign_index]
+
+    @property
+    def element(self) -> str:
+        return ("Fire", "Earth", "Air", "Water")[self.sign_index % 4]
+
+    @property
+    def modality(self) -> str:
+        return ("Cardinal", "Fixed", "Mutable")[self.sign_index % 3]
+
+    @property
+    def deg_str(self) -> str:
+        text = self._deg_str
+        if text is None:
+            text = deg_to_sign(self.lon)
+            object.__setattr__(self, "_deg_str", text)
+        return text
+
+    @property
+    def retrograde(self) -> bool:
+        return self.speed < 0
+
+    def __getitem__(self, key: str):
+        if key in (self._KEYS if self.error is None else self._ERROR_KEYS):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        if key in (self._KEYS if self.error is None else self._ERROR_KEYS):
+            return getattr(self, key)
+        return default
+
+    def __iter__(self):
+        return iter(self._KEYS if self.error is None else self._ERROR_KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS if self.error is None else self._ERROR_KEYS)
+
+    def to_dict(self) -> dict:
+        """The point as the dict it replaces, read straight from the slots."""
+        if self.error is not None:
+            return {"lon": None, "error": self.error}
+        lon, speed = self.lon, self.speed
+        return {"lon": lon, "sign": SIGNS[self.sign_index], "deg_str": self.deg_str,
+                "house": self.house, "speed": speed, "retrograde": speed < 0}
+
+    def __repr__(self) -> str:
+        return f"Point({self.to_dict()!r})"
+
+
+class Chart(Mapping):
+    """
+    A computed chart in slots rather than a dict, with points as Point.
+    Supports the same key access as the dict compute_chart used to return
+    (chart["points"], chart.get("cache_key"), ...); to_dict() gives a plain,
+    JSON-serializable copy.
+
+    points and house_cusps follow the primary house system; houses maps
+    every system the chart was computed for, primary first, to its "cusps"
+    and per-point "placements". ephemeris names the backend the positions
+    came from ("moshier", "swiss" or "jpl"; the least precise if mixed).
+
+    The trade-off against the nested dicts it replaced, per chart at
+    bench/bench_chart_model.py --size 500: 0.71x the memory (~5.0 vs
+    ~7.0 KB), while chart_result runs 1.0-1.2x as long (~330-360 vs
+    ~290-350 us) and to_json ~1.1x (~80 vs ~75 us), since a keyed read of
+    a Point is a method call rather than a dict lookup. Uncached, a request
+    spends ~700 us in compute_chart first, so end to end it is about 5%
+    slower.
+    """
+
+    __slots__ = (
+        "dt_local", "dt_utc", "jd", "lat", "lon", "tz_str", "time_known", "points",
+        "house_cusps", "houses", "asc", "mc", "moon_phase", "is_day_chart",
+        "chart_ruler_modern", "chart_ruler_trad", "asc_sign", "ephemeris", "cache_key",
+    )
+    _KEYS = (
+        "dt_local", "dt_utc", "jd", "lat", "lon", "tz_str", "time_known", "points",
+        "house_cusps", "houses", "asc", "mc", "day_of_week", "moon_phase", "is_day_chart",
+        "chart_ruler_modern", "chart_ruler_trad", "asc_sign", "ephemeris", "cache_key",
+    )
+    _KEY_SET = frozenset(_KEYS)
+
+    def __init__(self, dt_local: datetime, dt_utc: datetime, lat: float, lon: float,
+                 tz_str: str, time_known: bool, core: dict, cache_key: tuple | None = None):
+        self.dt_local = dt_local
+        self.dt_utc = dt_utc
+        self.lat = lat
+        self.lon = lon
+        self.tz_str = tz_str
+        self.time_known = time_known
+        self.cache_key = cache_key
+        self.jd = core["jd"]
+        self.points = core["points"]
+        self.house_cusps = core["house_cusps"]
+        # Entries cached before multi-system charts carry only the primary
+        self.houses = core.get("houses") or {core.get("hsys", "?"): {
+            "cusps": core["house_cusps"],
+            "placements": {n: p.house for n, p in core["points"].items() if p.error is None},
+        }}
+        self.asc = core["asc"]
+        self.mc = core["mc"]
+        self.moon_phase = core["moon_phase"]
+        self.is_day_chart = core["is_day_chart"]
+        self.chart_ruler_modern = core["chart_ruler_modern"]
+        self.chart_ruler_trad = core["chart_ruler_trad"]
+        self.asc_sign = core["asc_sign"]
+        self.ephemeris = core.get("ephemeris")
+
+    @property
+    def day_of_week(self) -> str:
+        return ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday",
+                "Sunday")[self.dt_local.weekday()]
+
+    def __getitem__(self, key: str):
+        if key in self._KEY_SET:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self._KEY_SET else default
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def to_dict(self) -> dict:
+        """Plain dict with ISO datetimes and dict points (no cache key)."""
+        return {
+            "dt_local": self.dt_local.isoformat(), "dt_utc": self.dt_utc.isoformat(),
+            "jd": self.jd, "lat": self.lat, "lon": self.lon, "tz_str": self.tz_str,
+            "time_known": self.time_known,
+            "points": {name: p.to_dict() for name, p in self.points.items()},
+            "house_cusps": self.house_cusps, "houses": self.houses, "asc": self.asc, "mc": self.mc,
+            "day_of_week": self.day_of_week, "moon_phase": self.moon_phase,
+            "is_day_chart": self.is_day_chart, "chart_ruler_modern": self.chart_ruler_modern,
+            "chart_ruler_trad": self.chart_ruler_trad, "asc_sign": self.asc_sign,
+            "ephemeris": self.ephemeris,
+        }
+
+
 # ─── Chart Computation ────────────────────────────────────────────────────────
 
+_EPHE_READY = False
+
+
+def init_ephemeris() -> None:
+    """
+    Set up the EPHEMERIS_BACKEND backend (default auto) on SWEPHE_PATH,
+    preloading SE files unless EPHEMERIS_PRELOAD=0; only the first call per
+    process does work, and none if use_ephemeris_backend already ran.
+    """
+    if not _EPHE_READY:
+        use_ephemeris_backend(os.getenv("EPHEMERIS_BACKEND", "auto"),
+                              preload=os.getenv("EPHEMERIS_PRELOAD", "1") != "0")
+
+
+def prewarm() -> None:
+    """
+    Run one throwaway chart through the whole pipeline so a fresh process
+    pays swisseph initialisation and first-call costs before its first
+    request rather than during it. Leaves the chart cache empty.
+    """
+    chart = compute_chart(2000, 1, 1, 12, 0, 51.5074, -0.1278, "Europe/London")
+    chart_result("Prewarm", chart)
+    CHART_CACHE.clear()
+
+
 def compute_chart(
     year: int, month: int, day: int, hour: int, minute: int,
-    lat: float, lon: float, tz_str: str, hsys: str = "P",
+    lat: float, lon: float, tz_str: str | None, hsys="P",
     time_known: bool = True,
-) -> dict:
-    swe.set_ephe_path(os.getenv("SWEPHE_PATH", ""))
-
-    tz = ZoneInfo(tz_str)
-    dt_local = datetime(year, month, day, hour, minute, tzinfo=tz)
-    dt_utc = dt_local.astimezone(ZoneInfo("UTC"))
-    jd = julday_ut(dt_utc)
+) -> Chart:
+    """
+    Chart for a local birth time. hsys may name several house systems (see
+    house_systems); positions, obliquity and ARMC are computed once and
+    only cusps and placements are derived per system.
+    """
+    init_ephemeris()
+
+    if tz_str is None:
+        tz_str = timezone_at(lat, lon)
+        if tz_str is None:
+            raise ValueError("No timezone given and no timezone index to look it up (see tz_index.py)")
+    with METRICS.stage("zone"):
+        dt_local = datetime(year, month, day, hour, minute, tzinfo=get_zone(tz_str))
+        dt_utc = dt_local.astimezone(UTC)
+    return _chart_at(dt_local, dt_utc, lat, lon, tz_str, hsys, time_known)
+
+
+def _chart_at(
+    dt_local: datetime, dt_utc: datetime,
+    lat: float, lon: float, tz_str: str, hsys, time_known: bool,
+) -> Chart:
+    systems = house_systems(hsys)
+    key = CHART_CACHE.key(dt_utc, lat, lon, "".join(systems), time_known, EPHE_KEY)
+    entry = CHART_CACHE.get(key)
+    if entry is None:
+        with METRICS.stage("ephemeris"):
+            entry = {"core": _chart_core(julday_ut(dt_utc), lat, lon, systems, time_known)}
+        METRICS.count(f"ephemeris_{entry['core']['ephemeris']}")
+        CHART_CACHE.put(key, entry)
+
+    # Everything tied to the caller's local frame stays out of the cache
+    return Chart(dt_local, dt_utc, lat, lon, tz_str, time_known, entry["core"], key)
+
+
+# With CHART_HOUSE_CHECK=1 every placement cusp_search makes is cross-checked
+# against swe.house_pos; disagreements are logged to stderr and counted as
+# house_mismatch (bench/bench_houses.py runs the same check over a corpus)
+HOUSE_CHECK = os.getenv("CHART_HOUSE_CHECK", "") not in ("", "0")
+
+
+def _house_finder(code: str, cusps: list[float], armc: float, lat: float, eps: float):
+    """Longitude -> house for one system: cusp_search, or house_pos where that can't be used."""
+    hsys = code.encode("ascii")
+
+    def via_house_pos(lon_deg: float) -> int | None:
+        try:
+            return int(swe.house_pos(armc, lat, eps, (norm360(lon_deg), 0.0), hsys))
+        except Exception:
+            return None
 
-    # Houses/angles
+    search = cusp_search(cusps)
+    if search is None:
+        return via_house_pos
+    if not HOUSE_CHECK:
+        return search
+
+    def checked(lon_deg: float) -> int:
+        house, ref = search(lon_deg), via_house_pos(lon_deg)
+        METRICS.count("house_checks")
+        if house != ref:
+            METRICS.count("house_mismatch")
+            print(json.dumps({"event": "house_mismatch", "hsys": code, "lon": lon_deg,
+                              "cusp_search": house, "house_pos": ref, "cusps": cusps}),
+                  file=sys.stderr)
+        return house
+    return checked
+
+
+def _chart_core(jd: float, lat: float, lon: float, systems: tuple[str, ...], time_known: bool) -> dict:
+    """
+    The cacheable part of a chart: everything fixed by the UTC instant and
+    place. systems[0] is the primary house system, which sets each point's
+    house; the rest only add cusps and placements under "houses".
+    """
+    # Houses/angles; later systems reuse this ARMC and obliquity
+    hsys = systems[0]
     cusps, ascmc = swe.houses(jd, lat, lon, hsys.encode("ascii"))
     asc = norm360(float(ascmc[0]))
     mc = norm360(float(ascmc[1]))
 
-    # Obliquity for house_pos
-    eclnut, _ = swe.calc_ut(jd, swe.ECL_NUT, swe.FLG_MOSEPH)
+    # Obliquity for houses_armc (and house_pos, where cusps can't be searched).
+    # The same under every backend, but asking for it with another backend's
+    # flag leaves swisseph's SE file state broken for the next body
+    eclnut, _ = swe.calc_ut(jd, swe.ECL_NUT, EPHE_FLAG)
     eps = float(eclnut[0])
     armc = float(ascmc[2])
 
-    def house_for(lon_deg: float) -> int | None:
-        if not time_known:
-            return None
-        try:
-            hp = swe.house_pos(armc, lat, eps, (norm360(lon_deg), 0.0), hsys.encode("ascii"))
-            return int(hp)
-        except Exception:
-            return None
-
-    # Planet positions
+    cusp_lists = {hsys: [norm360(float(c)) for c in cusps[:12]]}
+    for code in systems[1:]:
+        extra, _ = swe.houses_armc(armc, lat, eps, code.encode("ascii"))
+        cusp_lists[code] = [norm360(float(c)) for c in extra[:12]]
+    finders = {code: _house_finder(code, c, armc, lat, eps) for code, c in cusp_lists.items()}
+
+    def house_for(lon_deg: float, code: str = hsys) -> int | None:
+        return finders[code](lon_deg) if time_known else None
+
+    # An angle on its house's opening cusp (the Ascendant nearly everywhere,
+    # the MC in quadrant systems) is in that house even where houses_armc
+    # puts the cusp a few ulps past it; elsewhere (the MC in Whole Sign or
+    # Equal) it falls wherever the cusps put it
+    def angle_house(name: str, lon_deg: float, code: str = hsys) -> int | None:
+        house = ANGLE_HOUSES[name]
+        if abs(ang_diff(cusp_lists[code][house - 1], lon_deg)) < 1e-6:
+            return house
+        return house_for(lon_deg, code)
+
+    # Planet positions, noting which ephemeris actually served each
     points: dict = {}
+    sources = set()
     for name, pid in PLANET_IDS.items():
         try:
-            xx, _ = swe.calc_ut(jd, pid, swe.FLG_SPEED)
-            plon = norm360(xx[0])
-            points[name] = {
-                "lon": plon,
-                "sign": sign_of(plon),
-                "deg_str": deg_to_sign(plon),
-                "house": house_for(plon),
-                "speed": xx[3],
-                "retrograde": xx[3] < 0,
-            }
+            pos = EPHEMERIS_TABLES.lon_speed(pid, jd) if EPHEMERIS_TABLES else None
+            if pos is None:
+                xx, ret = swe.calc_ut(jd, pid, EPHE_FLAG | swe.FLG_SPEED)
+                pos = xx[0], xx[3]
+                sources.add(ephemeris_source(ret))
+            else:
+                sources.add(EPHEMERIS_TABLES.sources[pid])
+            plon = norm360(pos[0])
+            points[name] = Point(plon, pos[1], house_for(plon))
         except Exception as e:
-            points[name] = {"lon": None, "error": str(e)}
+            points[name] = Point.failed(str(e))
 
     # Angles as points
     if time_known:
-        points["Ascendant"] = {
-            "lon": asc, "sign": sign_of(asc), "deg_str": deg_to_sign(asc),
-            "house": 1, "speed": 0, "retrograde": False,
-        }
-        points["MC"] = {
-            "lon": mc, "sign": sign_of(mc), "deg_str": deg_to_sign(mc),
-            "house": 10, "speed": 0, "retrograde": False,
-        }
+        points["Ascendant"] = Point(asc, 0, angle_house("Ascendant", asc))
+        points["MC"] = Point(mc, 0, angle_house("MC", mc))
 
     # South Node
     if "N.Node" in points and points["N.Node"].get("lon") is not None:
         sn_lon = norm360(points["N.Node"]["lon"] + 180)
-        points["S.Node"] = {
-            "lon": sn_lon, "sign": sign_of(sn_lon), "deg_str": deg_to_sign(sn_lon),
-            "house": house_for(sn_lon), "speed": 0, "retrograde": False,
-        }
+        points["S.Node"] = Point(sn_lon, 0, house_for(sn_lon))
 
     # Part of Fortune
     if time_known and points["Sun"].get("lon") and points["Moon"].get("lon"):
@@ -361,17 +1306,23 @@ def compute_chart(
             pof = norm360(asc + points["Moon"]["lon"] - points["Sun"]["lon"])
         else:
             pof = norm360(asc + points["Sun"]["lon"] - points["Moon"]["lon"])
-        points["Part of Fortune"] = {
-            "lon": pof, "sign": sign_of(pof), "deg_str": deg_to_sign(pof),
-            "house": house_for(pof), "speed": 0, "retrograde": False,
-        }
+        points["Part of Fortune"] = Point(pof, 0, house_for(pof))
         is_day_chart = is_day
     else:
         is_day_chart = None
 
-    # Day of week, moon phase
-    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    day_of_week = days[dt_local.weekday()]
+    # Further house systems: placements of the points computed above (sect
+    # and Part of Fortune follow the primary)
+    houses = {hsys: {
+        "cusps": cusp_lists[hsys],
+        "placements": {n: p.house for n, p in points.items() if p.error is None},
+    }}
+    for code in systems[1:]:
+        placements = {n: angle_house(n, p.lon, code) if n in ANGLE_HOUSES else house_for(p.lon, code)
+                      for n, p in points.items() if p.error is None}
+        houses[code] = {"cusps": cusp_lists[code], "placements": placements}
+
+    # Moon phase
     phase = moon_phase_name(points["Sun"]["lon"], points["Moon"]["lon"])
 
     # Chart ruler
@@ -382,43 +1333,44 @@ def compute_chart(
         modern_ruler = trad_ruler = None
 
     return {
-        "dt_local": dt_local,
-        "dt_utc": dt_utc,
         "jd": jd,
-        "lat": lat,
-        "lon": lon,
-        "tz_str": tz_str,
-        "time_known": time_known,
         "points": points,
-        "house_cusps": [norm360(float(c)) for c in cusps[:12]],
+        "house_cusps": houses[hsys]["cusps"],
+        "houses": houses,
         "asc": asc,
         "mc": mc,
-        "day_of_week": day_of_week,
         "moon_phase": phase,
         "is_day_chart": is_day_chart,
         "chart_ruler_modern": modern_ruler,
         "chart_ruler_trad": trad_ruler,
         "asc_sign": asc_sign,
+        # The least precise source any body came from
+        "ephemeris": next((b for b in ("moshier", "swiss", "jpl") if b in sources),
+                          "+".join(sorted(sources)) or None),
     }
 
 
 # ─── Aspects ──────────────────────────────────────────────────────────────────
 
 def compute_aspects(points: dict) -> list[dict]:
-    available = [p for p in ASPECT_BODIES if p in points and points[p].get("lon") is not None]
+    # One lookup per body: points may be Points, whose keyed access costs a call
+    available, lons = [], []
+    for name in ASPECT_BODIES:
+        p = points.get(name)
+        lon = p.get("lon") if p is not None else None
+        if lon is not None:
+            available.append(name)
+            lons.append(lon)
     aspects = []
 
     for i, p1 in enumerate(available):
-        for p2 in available[i + 1:]:
-            lon1 = points[p1]["lon"]
-            lon2 = points[p2]["lon"]
+        for j in range(i + 1, len(available)):
+            p2 = available[j]
+            diff = abs_ang_diff(lons[i], lons[j])
+            luminary = p1 in LUMINARIES or p2 in LUMINARIES
 
             for asp_name, (asp_angle, base_orb) in ASPECT_DEFS.items():
-                orb = base_orb
-                if p1 in LUMINARIES or p2 in LUMINARIES:
-                    orb += LUMINARY_BONUS
-
-                diff = abs_ang_diff(lon1, lon2)
+                orb = base_orb + LUMINARY_BONUS if luminary else base_orb
                 actual_orb = abs(diff - asp_angle)
 
                 if actual_orb <= orb:
@@ -434,83 +1386,151 @@ def compute_aspects(points: dict) -> list[dict]:
 
 # ─── Configurations ───────────────────────────────────────────────────────────
 
+def _bits(mask: int):
+    """Yield the set bit positions of mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
 def detect_configurations(aspects: list[dict], points: dict) -> list[dict]:
-    # Build lookup
-    asp_pairs: dict[str, set[tuple]] = {}
+    # Aspect graph as per-aspect adjacency bitmasks. Bit order follows
+    # ASPECT_BODIES, so walking bits lowest-first visits bodies in the same
+    # order the old combinations() scans did.
+    available = [p for p in ASPECT_BODIES if p in points and points[p].get("lon") is not None]
+    names = list(available)
+    index = {p: i for i, p in enumerate(names)}
     for a in aspects:
-        asp_pairs.setdefault(a["aspect"], set()).add((a["p1"], a["p2"]))
-        asp_pairs.setdefault(a["aspect"], set()).add((a["p2"], a["p1"]))
+        for p in (a["p1"], a["p2"]):
+            if p not in index:
+                index[p] = len(names)
+                names.append(p)
+    avail_mask = (1 << len(available)) - 1
 
-    def has(p1, p2, asp):
-        return (p1, p2) in asp_pairs.get(asp, set())
+    adj = {asp: [0] * len(names) for asp in ASPECT_DEFS}
+    for a in aspects:
+        i, j = index[a["p1"]], index[a["p2"]]
+        nbrs = adj.setdefault(a["aspect"], [0] * len(names))
+        nbrs[i] |= 1 << j
+        nbrs[j] |= 1 << i
+
+    opp, sq, tri = adj["opposition"], adj["square"], adj["trine"]
+    sxt, qcx = adj["sextile"], adj["quincunx"]
+
+    def above(i: int) -> int:
+        return avail_mask & ~((2 << i) - 1)
 
-    available = [p for p in ASPECT_BODIES if p in points and points[p].get("lon") is not None]
     configs = []
     seen = set()
 
+    def add(kind: str, label: str, members, detail: str) -> None:
+        key = (kind, tuple(sorted(members)))
+        if key not in seen:
+            seen.add(key)
+            configs.append({"type": label, "planets": key[1], "detail": detail})
+
     # T-Squares
     for a in aspects:
         if a["aspect"] == "opposition":
-            for p3 in available:
-                if p3 not in (a["p1"], a["p2"]):
-                    if has(a["p1"], p3, "square") and has(a["p2"], p3, "square"):
-                        key = ("T-Square", tuple(sorted([a["p1"], a["p2"], p3])))
-                        if key not in seen:
-                            seen.add(key)
-                            configs.append({
-                                "type": "T-Square",
-                                "planets": key[1],
-                                "detail": f"{a['p1']}-{a['p2']} opposition, {p3} at apex (square both)",
-                            })
+            i, j = index[a["p1"]], index[a["p2"]]
+            for k in _bits(sq[i] & sq[j] & avail_mask):
+                p3 = names[k]
+                add("T-Square", "T-Square", (a["p1"], a["p2"], p3),
+                    f"{a['p1']}-{a['p2']} opposition, {p3} at apex (square both)")
 
     # Grand Trines
-    for combo in combinations(available, 3):
-        if has(combo[0], combo[1], "trine") and has(combo[1], combo[2], "trine") and has(combo[0], combo[2], "trine"):
-            key = ("Grand Trine", tuple(sorted(combo)))
-            if key not in seen:
-                seen.add(key)
-                configs.append({
-                    "type": "Grand Trine",
-                    "planets": key[1],
-                    "detail": f"{combo[0]}, {combo[1]}, {combo[2]} in mutual trine",
-                })
-
-    # Grand Crosses
-    for combo in combinations(available, 4):
-        for a, b, c, d in [(combo[0], combo[1], combo[2], combo[3]),
-                           (combo[0], combo[2], combo[1], combo[3]),
-                           (combo[0], combo[3], combo[1], combo[2])]:
-            if (has(a, b, "opposition") and has(c, d, "opposition") and
-                has(a, c, "square") and has(a, d, "square") and
-                has(b, c, "square") and has(b, d, "square")):
-                key = ("Grand Cross", tuple(sorted(combo)))
-                if key not in seen:
-                    seen.add(key)
-                    configs.append({
-                        "type": "Grand Cross",
-                        "planets": key[1],
-                        "detail": f"{a}-{b} and {c}-{d} oppositions with four squares",
-                    })
+    trines = []
+    for i in _bits(avail_mask):
+        for j in _bits(tri[i] & above(i)):
+            for k in _bits(tri[i] & tri[j] & above(j)):
+                trines.append((i, j, k))
+                add("Grand Trine", "Grand Trine", (names[i], names[j], names[k]),
+                    f"{names[i]}, {names[j]}, {names[k]} in mutual trine")
+
+    # Grand Crosses: two oppositions whose ends all square each other.
+    # Reported in combinations() order, naming the first pairing that fits.
+    crosses = set()
+    for i in _bits(avail_mask):
+        for j in _bits(opp[i] & above(i)):
+            both_sq = sq[i] & sq[j]
+            for k in _bits(both_sq):
+                for l in _bits(opp[k] & both_sq & above(k)):
+                    crosses.add(tuple(sorted((i, j, k, l))))
+    for combo in sorted(crosses):
+        c0, c1, c2, c3 = combo
+        for a, b, c, d in ((c0, c1, c2, c3), (c0, c2, c1, c3), (c0, c3, c1, c2)):
+            if (opp[a] >> b & 1 and opp[c] >> d & 1 and
+                    sq[a] >> c & 1 and sq[a] >> d & 1 and sq[b] >> c & 1 and sq[b] >> d & 1):
+                a, b, c, d = names[a], names[b], names[c], names[d]
+                add("Grand Cross", "Grand Cross", (a, b, c, d),
+                    f"{a}-{b} and {c}-{d} oppositions with four squares")
                 break
 
     # Yods
     for a in aspects:
         if a["aspect"] == "sextile":
-            for p3 in available:
-                if p3 not in (a["p1"], a["p2"]):
-                    if has(a["p1"], p3, "quincunx") and has(a["p2"], p3, "quincunx"):
-                        key = ("Yod", tuple(sorted([a["p1"], a["p2"], p3])))
-                        if key not in seen:
-                            seen.add(key)
-                            configs.append({
-                                "type": "Yod (Finger of God)",
-                                "planets": key[1],
-                                "detail": f"{a['p1']}-{a['p2']} sextile, both quincunx {p3} (apex)",
-                            })
+            i, j = index[a["p1"]], index[a["p2"]]
+            for k in _bits(qcx[i] & qcx[j] & avail_mask):
+                p3 = names[k]
+                add("Yod", "Yod (Finger of God)", (a["p1"], a["p2"], p3),
+                    f"{a['p1']}-{a['p2']} sextile, both quincunx {p3} (apex)")
+
+    # Kites: a Grand Trine plus a body opposite one corner, sextile the other two
+    for i, j, k in trines:
+        for apex, b, c in ((i, j, k), (j, i, k), (k, i, j)):
+            for t in _bits(opp[apex] & sxt[b] & sxt[c] & avail_mask):
+                add("Kite", "Kite", (names[i], names[j], names[k], names[t]),
+                    f"{names[i]}, {names[j]}, {names[k]} grand trine, {names[t]} opposite "
+                    f"{names[apex]} (sextile {names[b]} and {names[c]})")
+
+    # Mystic Rectangles: two oppositions joined by trines and sextiles
+    for i in _bits(avail_mask):
+        for k in _bits(opp[i] & above(i)):
+            for j in _bits(tri[i] & sxt[k] & avail_mask):
+                for l in _bits(opp[j] & tri[k] & sxt[i] & avail_mask):
+                    a, b, c, d = names[i], names[j], names[k], names[l]
+                    add("Mystic Rectangle", "Mystic Rectangle", (a, b, c, d),
+                        f"{a}-{c} and {b}-{d} oppositions linked by trines and sextiles")
+
+    # Grand Sextiles: two interlaced Grand Trines, every body sextile two
+    # bodies of the other trine and opposite the third
+    for n, t1 in enumerate(trines):
+        for t2 in trines[n + 1:]:
+            if set(t1) & set(t2):
+                continue
+            m2 = (1 << t2[0]) | (1 << t2[1]) | (1 << t2[2])
+            if all((sxt[x] & m2).bit_count() == 2 and (opp[x] & m2).bit_count() == 1 for x in t1):
+                members = [names[x] for x in sorted(t1 + t2)]
+                add("Grand Sextile", "Grand Sextile", members,
+                    f"{', '.join(members)} in a six-pointed star (two interlaced grand trines)")
 
     return configs
 
 
+# ─── Fixed Stars ──────────────────────────────────────────────────────────────
+
+# Star catalog (see fixed_stars.py), opened on the first chart that needs it
+FIXED_STARS = None
+_FIXED_STARS_OPENED = False
+
+
+def star_contacts(chart: dict) -> list[dict]:
+    """Catalog stars conjunct the chart's ASPECT_BODIES, tightest first; [] without a catalog."""
+    global FIXED_STARS, _FIXED_STARS_OPENED
+    if not _FIXED_STARS_OPENED:
+        from fixed_stars import open_star_catalog
+
+        FIXED_STARS = open_star_catalog()
+        _FIXED_STARS_OPENED = True
+    if FIXED_STARS is None:
+        return []
+    points = chart["points"]
+    return FIXED_STARS.contacts({
+        b: points[b]["lon"] for b in ASPECT_BODIES if points.get(b, {}).get("lon") is not None
+    }, chart["jd"])
+
+
 # ─── Analysis ─────────────────────────────────────────────────────────────────
 
 def analyze_chart(chart: dict) -> dict:
@@ -521,28 +1541,26 @@ def analyze_chart(chart: dict) -> dict:
     elements = {"Fire": [], "Earth": [], "Air": [], "Water": []}
     modalities = {"Cardinal": [], "Fixed": [], "Mutable": []}
 
+    # Elements, modalities and stelliums by sign and house, in one pass
+    sign_groups: dict[str, list] = {}
+    house_groups: dict[int, list] = {}
     for p in count_points:
-        if p in points and points[p].get("sign"):
-            sign = points[p]["sign"]
+        point = points.get(p)
+        if point is None:
+            continue
+        sign = point.get("sign")
+        if sign:
             e = element_of(sign)
             m = modality_of(sign)
             if e in elements:
                 elements[e].append(p)
             if m in modalities:
                 modalities[m].append(p)
-
-    # Stelliums by sign
-    sign_groups: dict[str, list] = {}
-    for p in count_points:
-        if p in points and points[p].get("sign"):
-            sign_groups.setdefault(points[p]["sign"], []).append(p)
+            sign_groups.setdefault(sign, []).append(p)
+        house = point.get("house")
+        if house:
+            house_groups.setdefault(house, []).append(p)
     stelliums_sign = {s: ps for s, ps in sign_groups.items() if len(ps) >= 3}
-
-    # Stelliums by house
-    house_groups: dict[int, list] = {}
-    for p in count_points:
-        if p in points and points[p].get("house"):
-            house_groups.setdefault(points[p]["house"], []).append(p)
     stelliums_house = {h: ps for h, ps in house_groups.items() if len(ps) >= 3}
 
     return {
@@ -553,10 +1571,72 @@ def analyze_chart(chart: dict) -> dict:
     }
 
 
+# Downstream stages in dependency order; each takes the chart and the
+# stages computed before it
+CHART_STAGES = {
+    "aspects": lambda chart, done: compute_aspects(chart["points"]),
+    "configurations": lambda chart, done: detect_configurations(done["aspects"], chart["points"]),
+    "analysis": lambda chart, done: analyze_chart(chart),
+    "stars": lambda chart, done: star_contacts(chart),
+}
+
+
+def lazy_stages(chart: dict, needs) -> dict:
+    """
+    The downstream stages named in `needs` (plus the ones they depend on),
+    as {stage: value}. Stages already memoized on the chart's in-memory
+    CHART_CACHE entry are reused and new ones are added to it (never to the
+    disk store), so a repeat birth only computes each stage once per
+    process.
+    """
+    entry = CHART_CACHE.peek(chart.get("cache_key"))
+    done = entry.get("stages", {}) if entry is not None else {}
+    if "configurations" in needs:
+        needs = {*needs, "aspects"}
+    todo = [s for s in CHART_STAGES if s in needs and s not in done]
+    if not todo:
+        return done
+
+    done = dict(done)
+    for stage in todo:
+        with METRICS.stage(stage):
+            done[stage] = CHART_STAGES[stage](chart, done)
+    if entry is not None:
+        entry["stages"] = done
+    return done
+
+
+def chart_stages(chart: dict) -> tuple[list[dict], list[dict], dict]:
+    """Aspects, configurations and analysis for a chart (see lazy_stages)."""
+    done = lazy_stages(chart, ("aspects", "configurations", "analysis"))
+    return done["aspects"], done["configurations"], done["analysis"]
+
+
 # ─── Output ───────────────────────────────────────────────────────────────────
 
 def format_output(name: str, chart: dict, analysis: dict,
-                  aspects: list[dict], configs: list[dict]) -> str:
+                  aspects: list[dict], configs: list[dict], hsys=None,
+                  stars: list[dict] | None = None) -> str:
+    """
+    The text reading for a chart. hsys picks which of the chart's house
+    systems to show (one code or several, see house_systems); by default
+    all of them, each with its own house column and cusp table. stars are
+    its fixed-star contacts (star_contacts), listed when there are any.
+    """
+    houses = chart.get("houses") or {"?": {"cusps": chart["house_cusps"], "placements": {
+        n: p.get("house") for n, p in chart["points"].items()}}}
+    systems = tuple(houses) if hsys is None else house_systems(hsys)
+    missing = [c for c in systems if c not in houses]
+    if missing:
+        raise ValueError(f"Chart has no {', '.join(missing)} houses (computed: {', '.join(houses)})")
+
+    def house_cols(pname: str, blank: str) -> str:
+        cols = []
+        for code in systems:
+            h = houses[code]["placements"].get(pname)
+            cols.append(f"{ordinal(h):>5s}" if h else blank)
+        return " ".join(cols)
+
     lines: list[str] = []
     w = lines.append
     sep = "\u2500" * 72
@@ -600,27 +1680,24 @@ def format_output(name: str, chart: dict, analysis: dict,
         "Chiron", "N.Node", "S.Node", "Lilith",
     ]
     angle_order = ["Ascendant", "MC", "Part of Fortune"]
+    if len(systems) > 1:
+        w(f"  {'':<16s} {'':<22s} {' '.join(f'{c:>5s}' for c in systems)}")
 
+    points = chart["points"]
     for pname in display_order:
-        if pname not in chart["points"]:
-            continue
-        p = chart["points"][pname]
-        if p.get("lon") is None:
+        p = points.get(pname)
+        if p is None or p.get("lon") is None:
             continue
         rx = " Rx" if p.get("retrograde") else "   "
-        house_str = f"{ordinal(p['house']):>5s}" if p.get("house") else "  ?  "
-        w(f"  {pname:<16s} {p['deg_str']:<22s} {house_str}{rx}")
+        w(f"  {pname:<16s} {p['deg_str']:<22s} {house_cols(pname, '  ?  ')}{rx}")
 
     if chart["time_known"]:
-        w(f"  {'':─<16s} {'':─<22s} {'':─<5s}")
+        w(f"  {'':─<16s} {'':─<22s} {'':─<{6 * len(systems) - 1}s}")
         for pname in angle_order:
-            if pname not in chart["points"]:
+            p = points.get(pname)
+            if p is None or p.get("lon") is None:
                 continue
-            p = chart["points"][pname]
-            if p.get("lon") is None:
-                continue
-            house_str = f"{ordinal(p['house']):>5s}" if p.get("house") else "     "
-            w(f"  {pname:<16s} {p['deg_str']:<22s} {house_str}")
+            w(f"  {pname:<16s} {p['deg_str']:<22s} {house_cols(pname, '     ')}")
     w("")
 
     # ── Chart Overview ──
@@ -688,14 +1765,24 @@ def format_output(name: str, chart: dict, analysis: dict,
             w(f"  {c['type']}: {c['detail']}")
         w("")
 
-    # ── House Cusps ──
-    if chart["time_known"]:
-        w("HOUSE CUSPS")
+    # ── Fixed Stars ──
+    if stars:
+        w("FIXED STAR CONTACTS")
         w(sep)
-        for i, cusp_lon in enumerate(chart["house_cusps"]):
-            w(f"  House {i+1:>2d}:  {deg_to_sign(cusp_lon)}")
+        for c in stars:
+            w(f"  {c['star']:<16s} conjunct     {c['point']:<12s} {c['orb']:.2f}\u00b0  "
+              f"(mag {c['magnitude']:.1f})")
         w("")
 
+    # ── House Cusps ──
+    if chart["time_known"]:
+        for code in systems:
+            w(f"HOUSE CUSPS ({house_system_name(code)})" if len(systems) > 1 else "HOUSE CUSPS")
+            w(sep)
+            for i, cusp_lon in enumerate(houses[code]["cusps"]):
+                w(f"  House {i+1:>2d}:  {deg_to_sign(cusp_lon)}")
+            w("")
+
     # ── Reading Prompt ──
     w("\u2550" * 72)
     w("  READING PROMPT")
@@ -736,28 +1823,496 @@ def format_output(name: str, chart: dict, analysis: dict,
     return "\n".join(lines)
 
 
+# ─── API Results ──────────────────────────────────────────────────────────────
+
+def resolve_fields(spec=None) -> tuple[str, ...]:
+    """
+    Payload fields for a "fields" request value: a profile name from
+    RESULT_PROFILES, a comma-separated string or a list of field and profile
+    names, or None for the default (full_text) payload. Empty items (a
+    trailing comma) are skipped. Raises ValueError naming the first unknown
+    field, or if no field is named at all.
+    """
+    if spec is None:
+        return RESULT_PROFILES["full_text"]
+    if isinstance(spec, str):
+        spec = spec.split(",")
+    if not isinstance(spec, (list, tuple)):
+        raise ValueError("fields must be a profile name, a comma-separated string or a list")
+    fields: dict[str, None] = {}
+    for item in spec:
+        item = str(item).strip()
+        if not item:
+            continue
+        if item in RESULT_PROFILES:
+            fields.update(dict.fromkeys(RESULT_PROFILES[item]))
+        elif item in RESULT_FIELDS:
+            fields[item] = None
+        else:
+            raise ValueError(f"Unknown field {item!r} (fields: {', '.join(RESULT_FIELDS)}; "
+                             f"profiles: {', '.join(RESULT_PROFILES)})")
+    if not fields:
+        raise ValueError("fields is empty")
+    return tuple(fields)
+
+
+def chart_result(name: str, chart: dict, fields=None) -> dict:
+    """
+    Build the /api/chart payload for a chart, running only the downstream
+    stages the requested fields (see resolve_fields) depend on.
+    """
+    fields = RESULT_PROFILES["full_text"] if fields is None else fields
+    points = chart["points"]
+    # A Chart's points are read from their slots; any other mapping by key
+    slotted = type(chart) is Chart
+    needs = {stage for f in fields for stage in RESULT_FIELDS[f]}
+    done = lazy_stages(chart, needs)
+
+    result = {}
+    for field in fields:
+        if field == "formatted_output":
+            with METRICS.stage("format"):
+                result[field] = format_output(name, chart, done["analysis"], done["aspects"],
+                                              done["configurations"], stars=done["stars"])
+        elif field == "planets" and slotted:
+            result[field] = {
+                pname: {"sign": SIGNS[p.sign_index], "house": p.house,
+                        "deg_str": p.deg_str, "retrograde": p.speed < 0}
+                for pname, p in points.items() if p.error is None
+            }
+        elif field == "planets":
+            result[field] = {
+                pname: {
+                    "sign": pdata.get("sign", ""),
+                    "house": pdata.get("house"),
+                    "deg_str": pdata.get("deg_str", ""),
+                    "retrograde": pdata.get("retrograde", False),
+                }
+                for pname, pdata in points.items() if pdata.get("lon") is not None
+            }
+        elif field == "houses":
+            result[field] = {
+                code: {
+                    "system": house_system_name(code),
+                    "cusps": [deg_to_sign(c) for c in h["cusps"]],
+                    "placements": dict(h["placements"]),
+                }
+                for code, h in chart["houses"].items()
+            }
+        elif field.endswith("_sign"):
+            body = "Ascendant" if field == "rising_sign" else field[:-5].title()
+            if slotted:
+                p = points.get(body)
+                result[field] = SIGNS[p.sign_index] if p is not None and p.error is None else ""
+            else:
+                result[field] = points.get(body, {}).get("sign", "")
+        elif field == "ephemeris":
+            result[field] = chart.get("ephemeris")
+        elif field == "rarity":
+            result[field] = chart_rarity(chart, done)
+        elif field == "fixed_stars":
+            result[field] = done["stars"]
+        else:
+            result[field] = done[field]
+    return result
+
+
+# Population histograms (see rarity.py), opened on the first "rarity" field
+_RARITY = None
+_RARITY_OPENED = False
+
+
+def chart_rarity(chart: dict, stages: dict) -> dict | None:
+    """The rarity.py score for a chart given its aspects, configurations and analysis, or None without a table."""
+    global _RARITY, _RARITY_OPENED
+    if not _RARITY_OPENED:
+        from rarity import open_rarity_table
+
+        _RARITY = open_rarity_table()
+        _RARITY_OPENED = True
+    if _RARITY is None:
+        return None
+    with METRICS.stage("rarity"):
+        return _RARITY.score(chart, stages["aspects"], stages["configurations"], stages["analysis"])
+
+
+def api_response(body: bytes, content_type: str = "application/json",
+                 fields: str | None = None, profile: bool = False) -> tuple[int, dict]:
+    """
+    (status, payload) for a POST /api/chart body: one birth record as a JSON
+    object, or a batch as a JSON array or NDJSON. Shared by the Vercel
+    handler and chart_server so both serve the same contract. `fields` is
+    the ?fields= query value, the default for records without their own.
+    With `profile` (?profile) or a "profile": true record, the request runs
+    under profile_call and the payload gains a "profile" report; that needs
+    PROFILE_REQUESTS, else it is a 403.
+    """
+    if "ndjson" in content_type:
+        data = body
+    else:
+        try:
+            with METRICS.stage("parse"):
+                data = json.loads(body)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return 400, {"error": "Invalid JSON"}
+        if not isinstance(data, (dict, list)):
+            return 400, {"error": "Expected a JSON object or array"}
+
+    if profile or isinstance(data, dict) and data.get("profile"):
+        if not PROFILE_REQUESTS:
+            return 403, {"error": "Profiling disabled (set CHART_PROFILE=1)"}
+        (status, payload), report = profile_call(_respond, data, fields, path=_profile_path())
+        return status, {**payload, "profile": report}
+    return _respond(data, fields)
+
+
+def _respond(data, fields: str | None) -> tuple[int, dict]:
+    if isinstance(data, dict):
+        try:
+            data = with_location(data)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        if "window" in data and "hour" not in data:
+            return window_response(data)
+        if "return" in data:
+            return returns_response(data, fields)
+        try:
+            time_known = record_time_known(data)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        if not time_known:
+            data = {"hour": 12, "minute": 0, **data}   # an unknown time is cast at noon
+        missing = [k for k in REQUIRED_FIELDS if k not in data]
+        if missing:
+            return 400, {"error": f"Missing fields: {', '.join(missing)}"}
+        try:
+            wanted = resolve_fields(data.get("fields", fields))
+            systems = house_systems(data.get("hsys", "P"))
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        try:
+            chart = compute_chart(
+                year=int(data["year"]),
+                month=int(data["month"]),
+                day=int(data["day"]),
+                hour=int(data["hour"]),
+                minute=int(data["minute"]),
+                lat=float(data["lat"]),
+                lon=float(data["lon"]),
+                tz_str=str(data["tz"]),
+                hsys=systems,
+                time_known=time_known,
+            )
+            return 200, echo_city(data, chart_result(str(data["name"]), chart, wanted))
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    if isinstance(data, bytes):
+        try:
+            with METRICS.stage("parse"):
+                data = parse_birth_records(data.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            return 400, {"error": "Invalid JSON"}
+
+    if len(data) > MAX_BATCH:
+        return 413, {"error": f"Batch too large: {len(data)} records (max {MAX_BATCH})"}
+
+    try:
+        resolve_fields(fields)
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    results = compute_charts_batch(data, fields=fields)
+    errors = sum(1 for r in results if "error" in r)
+    return 200, {"results": results, "count": len(results), "errors": errors}
+
+
+def window_response(data: dict) -> tuple[int, dict]:
+    """
+    (status, payload) for a record with a "window" ("HH:MM-HH:MM", local)
+    instead of hour/minute: the birth_window intervals across that window.
+    """
+    missing = [k for k in REQUIRED_FIELDS if k not in data and k not in ("hour", "minute")]
+    if missing:
+        return 400, {"error": f"Missing fields: {', '.join(missing)}"}
+    start, sep, end = str(data["window"]).partition("-")
+    if not sep:
+        return 400, {"error": "window must be HH:MM-HH:MM"}
+    from birth_window import birth_time_windows
+
+    try:
+        with METRICS.stage("window"):
+            windows = birth_time_windows(
+                int(data["year"]), int(data["month"]), int(data["day"]),
+                float(data["lat"]), float(data["lon"]), str(data["tz"]), start, end,
+                house_systems(data.get("hsys", "P"))[0],
+            )
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    except Exception as e:
+        return 500, {"error": str(e)}
+    return 200, echo_city(data, {"name": str(data["name"]), **windows})
+
+
+def returns_response(data: dict, fields: str | None = None) -> tuple[int, dict]:
+    """
+    (status, payload) for a record with a "return" ("solar" or "lunar"):
+    that year's return charts (see returns.return_result).
+    """
+    missing = [k for k in REQUIRED_FIELDS if k not in data]
+    if missing:
+        return 400, {"error": f"Missing fields: {', '.join(missing)}"}
+    from returns import return_result
+
+    try:
+        with METRICS.stage("returns"):
+            return 200, echo_city(data, return_result(data, fields))
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    except Exception as e:
+        return 500, {"error": str(e)}
+
+
+# ─── Batch ────────────────────────────────────────────────────────────────────
+
+def parse_birth_records(text: str) -> list:
+    """
+    Parse a JSON array or NDJSON (one object per line) into a list of records.
+    NDJSON lines that fail to decode are kept as their raw string so the batch
+    can report them as per-record errors instead of rejecting the whole body.
+    """
+    stripped = text.strip()
+    if stripped.startswith("["):
+        records = json.loads(stripped)
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON array of birth records")
+        return records
+    return list(iter_birth_records(stripped.splitlines(), "ndjson"))
+
+
+def iter_birth_records(lines, fmt: str = "auto"):
+    """
+    Lazily parse birth records from an iterable of text lines (a file, stdin).
+
+    fmt is "ndjson", "csv" (header row naming the fields) or "auto", which
+    picks NDJSON if the first non-blank line starts with "{". Undecodable
+    NDJSON lines are yielded as their raw string, like parse_birth_records;
+    empty CSV cells are dropped so they read as missing fields.
+    """
+    lines = iter(lines)
+    if fmt == "auto":
+        for first in lines:
+            if first.strip():
+                fmt = "ndjson" if first.lstrip().startswith("{") else "csv"
+                lines = itertools.chain([first], lines)
+                break
+        else:
+            return
+
+    if fmt == "csv":
+        import csv
+
+        for row in csv.DictReader(lines):
+            yield {k.strip(): v.strip() for k, v in row.items()
+                   if k is not None and v is not None and v.strip()}
+        return
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            yield line
+
+
+def iter_charts_batch(records, hsys: str = "P", fields=None):
+    """
+    Yield one /api/chart result per birth record, in input order, with the
+    payload fields a record's own "fields" value asks for, else `fields`
+    (see resolve_fields). A record with a "return" gets its return charts
+    (see returns.return_result) instead of its natal chart.
+
+    Ephemeris setup, ZoneInfo objects and repeated births are shared through
+    init_ephemeris, get_zone and CHART_CACHE. Each result is the chart_result
+    payload plus "index", or "index" and "error" if the record was malformed
+    or its chart failed. Records are consumed one at a time, so a generator
+    input streams with constant memory.
+    """
+    init_ephemeris()
+
+    for i, rec in enumerate(records):
+        METRICS.count("batch_records")
+        if isinstance(rec, str):
+            yield {"index": i, "error": "Invalid JSON"}
+            continue
+        if not isinstance(rec, dict):
+            yield {"index": i, "error": "Record must be a JSON object"}
+            continue
+        try:
+            rec = with_location(rec)
+            if not record_time_known(rec):
+                rec = {"hour": 12, "minute": 0, **rec}   # an unknown time is cast at noon
+        except ValueError as e:
+            yield {"index": i, "error": str(e)}
+            continue
+        missing = [k for k in REQUIRED_FIELDS if k not in rec]
+        if missing:
+            yield {"index": i, "error": f"Missing fields: {', '.join(missing)}"}
+            continue
+
+        try:
+            if "return" in rec:
+                from returns import return_result
+
+                yield echo_city(rec, {"index": i, **return_result(rec, fields, hsys)})
+                continue
+            tz_str = str(rec["tz"])
+            with METRICS.stage("zone"):
+                dt_local = datetime(
+                    int(rec["year"]), int(rec["month"]), int(rec["day"]),
+                    int(rec["hour"]), int(rec["minute"]), tzinfo=get_zone(tz_str),
+                )
+                dt_utc = dt_local.astimezone(UTC)
+            wanted = resolve_fields(rec.get("fields", fields))
+            chart = _chart_at(
+                dt_local, dt_utc, float(rec["lat"]), float(rec["lon"]),
+                tz_str, rec.get("hsys", hsys), record_time_known(rec),
+            )
+            yield echo_city(rec, {"index": i, **chart_result(str(rec["name"]), chart, wanted)})
+        except Exception as e:
+            yield {"index": i, "error": str(e)}
+
+
+def compute_charts_batch(records: list, hsys: str = "P", fields=None) -> list[dict]:
+    """Compute /api/chart results for many birth records in one call (see iter_charts_batch)."""
+    return list(iter_charts_batch(records, hsys, fields))
+
+
+def _cli_record(rec):
+    """
+    Fill in what the CLI lets a person leave out: an unknown birth time
+    (blank or absent hour), which is cast at noon like --hour omitted. A
+    "city" field in place of lat/lon/tz and CSV strings for time_known are
+    read later by iter_charts_batch, as for the API.
+    """
+    if not isinstance(rec, dict):
+        return rec
+    rec = dict(rec)
+    if rec.get("hour") in (None, ""):
+        rec.update(hour=12, minute=0, time_known=False)
+    else:
+        rec.setdefault("minute", 0)
+    return rec
+
+
+def run_batch(source, out, hsys: str = "P", fmt: str = "auto", text: bool = False,
+              workers: int = 1, defaults: dict | None = None) -> dict:
+    """
+    Stream birth records from the text lines of source to out, one result per
+    line: the JSON result (text=False) or the formatted chart block. Errors
+    are reported inline and do not stop the run. workers > 1 computes on a
+    ChartEngine process pool (0 = one per CPU). defaults fills in fields
+    records leave out (e.g. "return"). Returns a summary dict.
+    """
+    records = (_cli_record(rec) for rec in iter_birth_records(source, fmt))
+    if defaults:
+        records = ({**defaults, **rec} if isinstance(rec, dict) else rec for rec in records)
+    count = errors = 0
+    t0 = time.perf_counter()
+    engine = None
+    if workers == 1:
+        results = iter_charts_batch(records, hsys)
+    else:
+        from chart_engine import ChartEngine
+
+        engine = ChartEngine(workers=workers or None, hsys=hsys)
+        results = engine.map(records)
+    try:
+        for result in results:
+            count += 1
+            if "error" in result:
+                errors += 1
+            if not text:
+                out.write(json.dumps(result) + "\n")
+            elif "error" in result:
+                out.write(f"# record {result['index']}: error: {result['error']}\n\n")
+            elif "returns" in result:
+                from returns import format_returns
+
+                out.write(format_returns(result) + "\n\n")
+            else:
+                out.write(result["formatted_output"] + "\n\n")
+    finally:
+        if engine is not None:
+            engine.close()
+    elapsed = time.perf_counter() - t0
+    return {
+        "records": count,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "charts_per_sec": round(count / elapsed, 1) if elapsed else 0.0,
+    }
+
+
 # ─── Main ─────────────────────────────────────────────────────────────────────
 
 def main() -> int:
+    import argparse
+
+    from cities import CITIES
+
     ap = argparse.ArgumentParser(
         description="Natal Chart Calculator — offline Swiss Ephemeris",
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
-    ap.add_argument("--name", required=True, help="Person's name")
-    ap.add_argument("--year", type=int, required=True)
-    ap.add_argument("--month", type=int, required=True)
-    ap.add_argument("--day", type=int, required=True)
+    ap.add_argument("--name", help="Person's name")
+    ap.add_argument("--year", type=int)
+    ap.add_argument("--month", type=int)
+    ap.add_argument("--day", type=int)
     ap.add_argument("--hour", type=int, default=None, help="Birth hour (24h). Omit if unknown.")
+    ap.add_argument("--window", metavar="HH:MM-HH:MM", default=None,
+                    help="Unknown time within this local window: list where signs and houses change")
     ap.add_argument("--minute", type=int, default=0)
-    ap.add_argument("--city", default=None, help="City name (built-in lookup)")
+    ap.add_argument("--city", default=None, help='City name, optionally "City, Country" (offline geocoder)')
     ap.add_argument("--lat", type=float, default=None)
     ap.add_argument("--lon", type=float, default=None)
-    ap.add_argument("--tz", default=None, help="Timezone (e.g. Pacific/Auckland)")
-    ap.add_argument("--hsys", default="P", help="House system (P=Placidus, W=Whole Sign, E=Equal)")
+    ap.add_argument("--tz", default=None,
+                    help="Timezone (e.g. Pacific/Auckland); looked up from --lat/--lon if omitted")
+    ap.add_argument("--hsys", default="P",
+                    help="House system (P=Placidus, W=Whole Sign, E=Equal); several, e.g. P,W, "
+                         "are shown side by side, the first setting each planet's house")
     ap.add_argument("--list-cities", action="store_true", help="List all built-in cities")
+    ap.add_argument("--batch", metavar="FILE",
+                    help="Read CSV or NDJSON birth records from FILE ('-' for stdin)")
+    ap.add_argument("--input-format", choices=["auto", "csv", "ndjson"], default="auto",
+                    help="Batch input format (default: detect from the first line)")
+    ap.add_argument("--output", choices=["json", "text"], default="json",
+                    help="Batch output: one JSON result per line, or formatted charts")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Batch worker processes (0 = one per CPU)")
+    ap.add_argument("--ephemeris", choices=list(EPHEMERIS_BACKENDS), default=None,
+                    help="Ephemeris backend (default: EPHEMERIS_BACKEND, else auto)")
+    ap.add_argument("--return", dest="return_kind", choices=["solar", "lunar"], default=None,
+                    help="Cast the solar return or the lunar returns of --return-year instead "
+                         "(for every record with --batch)")
+    ap.add_argument("--return-year", type=int, default=None, help="Year of the returns (default: this year)")
+    ap.add_argument("--return-city", default=None, help="City the returns are cast for (default: birthplace)")
+    ap.add_argument("--profile", nargs="?", const="natal_chart.prof", default=None, metavar="FILE",
+                    help="Profile the chart (or --batch run) with cProfile: summary on stderr, "
+                         "raw profile to FILE (default natal_chart.prof)")
 
     args = ap.parse_args()
 
+    if args.ephemeris:
+        # Batch workers set themselves up from the environment
+        os.environ["EPHEMERIS_BACKEND"] = args.ephemeris
+    try:
+        init_ephemeris()
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
     if args.list_cities:
         print("Available cities:")
         by_region: dict[str, list] = {}
@@ -770,34 +2325,121 @@ def main() -> int:
                 print(f"    {city}")
         return 0
 
+    returns = None
+    if args.return_kind:
+        returns = {"return": args.return_kind, "return_year": args.return_year,
+                   "return_place": args.return_city}
+
+    if args.batch:
+        if args.profile and args.workers != 1:
+            print("Error: --profile only sees this process; use --workers 1", file=sys.stderr)
+            return 1
+        source = sys.stdin if args.batch == "-" else open(args.batch, newline="", encoding="utf-8")
+        batch = (run_batch, source, sys.stdout, args.hsys, args.input_format,
+                 args.output == "text", args.workers, returns)
+        try:
+            with source:
+                if args.profile:
+                    summary, report = profile_call(*batch, path=args.profile)
+                    print(format_profile(report), file=sys.stderr)
+                else:
+                    summary = batch[0](*batch[1:])
+        except BrokenPipeError:
+            # Downstream closed early (e.g. `| head`); silence the flush at exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 1
+        print(f"{summary['records']} records, {summary['errors']} errors in "
+              f"{summary['seconds']:.2f}s ({summary['charts_per_sec']:,.0f} charts/s)", file=sys.stderr)
+        return 0
+
+    missing = [f"--{k}" for k in ("name", "year", "month", "day") if getattr(args, k) is None]
+    if missing:
+        ap.error(f"the following arguments are required: {', '.join(missing)}")
+
     # Resolve location
     if args.city:
-        key = args.city.lower().strip()
-        if key not in CITIES:
+        place = geocode(args.city)
+        if place is None:
             print(f"Error: City '{args.city}' not found. Use --list-cities to see options.", file=sys.stderr)
             print(f"  Or provide --lat, --lon, --tz manually.", file=sys.stderr)
             return 1
-        lat, lon, tz_str = CITIES[key]
-    elif args.lat is not None and args.lon is not None and args.tz:
-        lat, lon, tz_str = args.lat, args.lon, args.tz
+        from geocoder import fold
+
+        if fold(place.name) != fold(args.city.partition(",")[0]):
+            print(f"Note: --city {args.city!r} resolved to {place.name}"
+                  f"{', ' + place.country if place.country else ''} ({place.lat}, {place.lon}, {place.tz})",
+                  file=sys.stderr)
+        lat, lon, tz_str = place.lat, place.lon, place.tz
+    elif args.lat is not None and args.lon is not None:
+        lat, lon, tz_str = args.lat, args.lon, args.tz or timezone_at(args.lat, args.lon)
+        if tz_str is None:
+            print("Error: No timezone index to look up --tz from; pass --tz or build one with "
+                  "tz_index.py", file=sys.stderr)
+            return 1
     else:
-        print("Error: Provide --city or (--lat, --lon, --tz)", file=sys.stderr)
+        print("Error: Provide --city or (--lat, --lon[, --tz])", file=sys.stderr)
         return 1
 
+    try:
+        systems = house_systems(args.hsys)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.window and args.hour is None:
+        from birth_window import birth_time_windows, format_windows
+
+        start, _, end = args.window.partition("-")
+        try:
+            windows = birth_time_windows(args.year, args.month, args.day, lat, lon, tz_str,
+                                         start, end or "24:00", systems[0])
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print(format_windows(args.name, windows))
+        return 0
+
+    if returns:
+        from returns import format_returns, return_result
+
+        if args.hour is None:
+            print("Error: returns need the birth time (--hour)", file=sys.stderr)
+            return 1
+        try:
+            result = return_result({
+                "name": args.name, "year": args.year, "month": args.month, "day": args.day,
+                "hour": args.hour, "minute": args.minute, "lat": lat, "lon": lon, "tz": tz_str,
+                **returns,
+            }, hsys=systems)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print(format_returns(result))
+        return 0
+
     # Handle unknown birth time
     time_known = args.hour is not None
+    if not time_known:
+        print("Note: no --hour, so the chart is cast at noon without houses or angles; "
+              "--window 00:00-24:00 shows how they vary over the day.", file=sys.stderr)
     hour = args.hour if time_known else 12
     minute = args.minute if time_known else 0
 
-    chart = compute_chart(
-        args.year, args.month, args.day, hour, minute,
-        lat, lon, tz_str, args.hsys, time_known,
-    )
-    aspects = compute_aspects(chart["points"])
-    configs = detect_configurations(aspects, chart["points"])
-    analysis = analyze_chart(chart)
-
-    print(format_output(args.name, chart, analysis, aspects, configs))
+    def reading() -> str:
+        chart = compute_chart(
+            args.year, args.month, args.day, hour, minute,
+            lat, lon, tz_str, systems, time_known,
+        )
+        done = lazy_stages(chart, RESULT_FIELDS["formatted_output"])
+        return format_output(args.name, chart, done["analysis"], done["aspects"],
+                             done["configurations"], stars=done["stars"])
+
+    if args.profile:
+        text, report = profile_call(reading, path=args.profile)
+        print(text)
+        print(format_profile(report), file=sys.stderr)
+        return 0
+    print(reading())
     return 0
 
 
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Chart Rarity — how unusual a chart is, from precomputed population histograms
+
+`build` runs the chart pipeline over a dense grid of birth instants and
+places and counts the features a reading can call out: the Sun–Moon–Rising
+sign triple, the Sun–Moon pair, every aspect (body pair and type), every
+configuration type from detect_configurations, and the element and modality
+spreads from analyze_chart. It also keeps the distribution of a combined
+surprisal score (the sum of -log2 share over the triple, both spreads and
+each configuration), so a chart can be ranked against the population. A
+chart without a birth time has no Rising sign and scores its Sun–Moon pair
+instead, so it is ranked against the same samples scored that way.
+
+Scoring a chart is then a handful of dict lookups: the share of the
+population with each of its features, and its rarity index, the percentage
+of the population with a lower surprisal. Shares of several features are
+multiplied as if independent ("0.3% share your Sun–Moon–Rising combo and a
+Grand Cross").
+
+Birth instants are spaced --step hours apart (not a divisor of a day, so
+every time of day is covered) across the build years, and each is cast at
+the next built-in city in turn, so the grid follows where charts are
+actually cast rather than spreading evenly over the globe.
+
+Usage:
+  python3 rarity.py build --out data/rarity.bin --workers 0
+  python3 rarity.py score --table data/rarity.bin --city london 1990 6 2 14 5
+
+natal_chart reads the table from RARITY_TABLE (default data/rarity.bin) for
+the "rarity" result field.
+
+File layout (little-endian):
+  header     8s magic, u32 charts, u32 meta bytes, u32 quantiles
+  meta       JSON: {"families": {family: [key, ...]}, "build": {...}}
+  counts     u32 per key, families and keys in meta order
+  quantiles  f64 surprisal at each of the quantiles, ascending, scoring the
+             Sun–Moon–Rising triple
+  untimed    f64 the same, scoring the Sun–Moon pair (birth time unknown)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timedelta
+
+MAGIC = b"NCRARE02"
+_HEADER = struct.Struct("<8sIII")
+
+DEFAULT_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rarity.bin")
+DEFAULT_YEARS = (1940, 2010)
+DEFAULT_STEP_HOURS = 6.1
+QUANTILES = 1001
+
+FAMILIES = ("big_three", "sun_moon", "elements", "modalities", "aspects", "configurations")
+RARE_ASPECTS = 3    # rarest aspects reported per chart
+
+
+# ─── Features ─────────────────────────────────────────────────────────────────
+
+def chart_features(chart, aspects: list[dict], configurations: list[dict], analysis: dict) -> dict:
+    """Histogram keys per family for one chart; big_three only when the birth time is known."""
+    points = chart["points"]
+    sun, moon = points["Sun"]["sign"], points["Moon"]["sign"]
+    feats = {
+        "big_three": [f"{sun}/{moon}/{chart['asc_sign']}"] if chart["time_known"] and chart["asc_sign"] else [],
+        "sun_moon": [f"{sun}/{moon}"],
+        "elements": [" ".join(f"{e[0]}{len(ps)}" for e, ps in analysis["elements"].items())],
+        "modalities": [" ".join(f"{m[0]}{len(ps)}" for m, ps in analysis["modalities"].items())],
+        "aspects": [f"{a['p1']} {a['aspect']} {a['p2']}" for a in aspects],
+        "configurations": list(dict.fromkeys(c["type"] for c in configurations)),
+    }
+    return feats
+
+
+def _surprisal(feats: dict, share) -> float:
+    combo = feats["big_three"] or feats["sun_moon"]
+    return -sum(math.log2(share(family, key))
+                for family, keys in (("big_three" if feats["big_three"] else "sun_moon", combo),
+                                     ("elements", feats["elements"]),
+                                     ("modalities", feats["modalities"]),
+                                     ("configurations", feats["configurations"]))
+                for key in keys)
+
+
+# ─── Table ────────────────────────────────────────────────────────────────────
+
+class RarityTable:
+    """Read-only histogram table; score() is the hot path."""
+
+    def __init__(self, path: str | None = None, data: bytes | None = None):
+        self.path = path
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        magic, self.charts, meta_len, nq = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a rarity table")
+        pos = _HEADER.size
+        meta = json.loads(data[pos:pos + meta_len])
+        pos += meta_len
+        self.build = meta.get("build", {})
+        self.counts: dict[str, dict[str, int]] = {}
+        for family, keys in meta["families"].items():
+            values = struct.unpack_from(f"<{len(keys)}I", data, pos)
+            pos += 4 * len(keys)
+            self.counts[family] = dict(zip(keys, values))
+        self.quantiles = list(struct.unpack_from(f"<{nq}d", data, pos))
+        self.quantiles_untimed = list(struct.unpack_from(f"<{nq}d", data, pos + 8 * nq))
+        # Half a chart for features the grid never produced, so they rank rarest
+        self._floor = 0.5 / max(self.charts, 1)
+        timed = self.build.get("time_known_charts", self.charts)
+        self._totals = {f: (timed if f == "big_three" else self.charts) for f in FAMILIES}
+
+    def share(self, family: str, key: str) -> float:
+        """Fraction of the population with this feature."""
+        n = self.counts.get(family, {}).get(key, 0)
+        return n / self._totals[family] if n else self._floor
+
+    def index(self, surprisal: float, time_known: bool = True) -> float:
+        """
+        Percentage of the population with a lower surprisal than this, scored
+        as a chart with (time_known) or without a Rising sign is.
+        """
+        q = self.quantiles if time_known else self.quantiles_untimed
+        return 100.0 * bisect_left(q, surprisal) / len(q) if q else 0.0
+
+    def score(self, chart, aspects: list[dict], configurations: list[dict], analysis: dict) -> dict:
+        """
+        Rarity of a chart: "index" (0–100, see index()), the share of each
+        single-key feature as {"key", "share"}, every configuration type and
+        the RARE_ASPECTS rarest aspects with their shares, and a "headline"
+        combining the sign combo with the rarest configuration, if any.
+        """
+        feats = chart_features(chart, aspects, configurations, analysis)
+        share = self.share
+        out: dict = {"index": round(self.index(_surprisal(feats, share), bool(feats["big_three"])), 1)}
+        for family in ("big_three", "sun_moon", "elements", "modalities"):
+            keys = feats[family]
+            out[family] = {"key": keys[0], "share": round(share(family, keys[0]), 6)} if keys else None
+        for family, limit in (("configurations", None), ("aspects", RARE_ASPECTS)):
+            # Counts order keys as shares do, and skip a division per key
+            seen = self.counts.get(family, {})
+            keys = sorted(feats[family], key=lambda k: seen.get(k, 0))[:limit]
+            out[family] = [{"key": k, "share": round(share(family, k), 6)} for k in keys]
+
+        combo = out["big_three"] or out["sun_moon"]
+        headline = [("Sun–Moon–Rising" if out["big_three"] else "Sun–Moon") + " combo"]
+        combined = combo["share"]
+        if out["configurations"]:
+            rarest = out["configurations"][0]
+            headline.append(rarest["key"])
+            combined *= rarest["share"]
+        out["headline"] = {"features": headline, "share": round(combined, 8)}
+        return out
+
+
+def open_rarity_table(path: str | None = None) -> RarityTable | None:
+    """Table at path (default RARITY_TABLE or data/rarity.bin), or None if there is none."""
+    path = path or os.getenv("RARITY_TABLE") or DEFAULT_TABLE
+    return RarityTable(path) if os.path.exists(path) else None
+
+
+# ─── Build ────────────────────────────────────────────────────────────────────
+
+def grid(years: tuple[int, int] = DEFAULT_YEARS, step_hours: float = DEFAULT_STEP_HOURS, places=None):
+    """(UTC instant, lat, lon) for every build sample, cycling through places (default CITIES)."""
+    from natal_chart import UTC
+
+    if places is None:
+        from cities import CITIES
+
+        places = [(lat, lon) for lat, lon, _ in CITIES.values()]
+    start = datetime(years[0], 1, 1, tzinfo=UTC)
+    n = int((datetime(years[1], 1, 1, tzinfo=UTC) - start) / timedelta(hours=step_hours))
+    for i in range(n):
+        lat, lon = places[i % len(places)]
+        yield start + timedelta(hours=i * step_hours), lat, lon
+
+
+def _count_chunk(samples: list) -> tuple[dict, list]:
+    """Feature counts over samples, plus each sample's features for the surprisal pass."""
+    import natal_chart
+
+    natal_chart.init_ephemeris()
+    counts = {f: Counter() for f in FAMILIES}
+    kept = []
+    for dt_utc, lat, lon in samples:
+        # Straight from _chart_core: grid charts are never asked for twice, and
+        # the caller's CHART_CACHE is left as it was
+        core = natal_chart._chart_core(natal_chart.julday_ut(dt_utc), lat, lon, ("P",), True)
+        chart = natal_chart.Chart(dt_utc, dt_utc, lat, lon, "UTC", True, core)
+        aspects, configurations, analysis = natal_chart.chart_stages(chart)
+        feats = chart_features(chart, aspects, configurations, analysis)
+        for family, keys in feats.items():
+            counts[family].update(keys)
+        kept.append({f: feats[f] for f in ("big_three", "sun_moon", "elements", "modalities",
+                                            "configurations")})
+    return counts, kept
+
+
+def build_table(samples, workers: int = 1, chunk: int = 2000, build: dict | None = None) -> bytes:
+    """Count features over the grid samples (on a worker pool if workers != 1) into a table."""
+    samples = list(samples)
+    chunks = [samples[i:i + chunk] for i in range(0, len(samples), chunk)]
+    counts = {f: Counter() for f in FAMILIES}
+    kept: list[dict] = []
+    if workers == 1:
+        results = map(_count_chunk, chunks)
+    else:
+        from chart_engine import worker_pool
+
+        pool = worker_pool(workers or None)
+        results = pool.map(_count_chunk, chunks)
+    for part, feats in results:
+        for family in FAMILIES:
+            counts[family].update(part[family])
+        kept.extend(feats)
+    if workers != 1:
+        pool.shutdown()
+
+    charts = len(kept)
+    timed = sum(1 for f in kept if f["big_three"])
+    totals = {f: (timed if f == "big_three" else charts) for f in FAMILIES}
+
+    def share(family, key):
+        return counts[family][key] / totals[family]
+
+    def quantiles(scores):
+        scores = sorted(scores)
+        return [scores[round(i * (charts - 1) / (QUANTILES - 1))] for i in range(QUANTILES)] if charts else []
+
+    timed_q = quantiles(_surprisal(f, share) for f in kept)
+    untimed_q = quantiles(_surprisal({**f, "big_three": []}, share) for f in kept)
+
+    families = {f: sorted(counts[f]) for f in FAMILIES}
+    meta = json.dumps({"families": families,
+                       "build": {**(build or {}), "time_known_charts": timed}},
+                      separators=(",", ":")).encode()
+    out = [_HEADER.pack(MAGIC, charts, len(meta), len(timed_q)), meta]
+    for f in FAMILIES:
+        out.append(struct.pack(f"<{len(families[f])}I", *(counts[f][k] for k in families[f])))
+    out.append(struct.pack(f"<{len(timed_q)}d", *timed_q))
+    out.append(struct.pack(f"<{len(untimed_q)}d", *untimed_q))
+    return b"".join(out)
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Build or query the chart rarity table")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Count chart features over a grid of births")
+    b.add_argument("--out", required=True)
+    b.add_argument("--from-year", type=int, default=DEFAULT_YEARS[0])
+    b.add_argument("--to-year", type=int, default=DEFAULT_YEARS[1], help="Exclusive")
+    b.add_argument("--step", type=float, default=DEFAULT_STEP_HOURS, help="Hours between birth instants")
+    b.add_argument("--workers", type=int, default=1, help="Worker processes (0 = one per CPU)")
+    s = sub.add_parser("score", help="Rarity of one chart")
+    s.add_argument("year", type=int)
+    s.add_argument("month", type=int)
+    s.add_argument("day", type=int)
+    s.add_argument("hour", type=int)
+    s.add_argument("minute", type=int)
+    s.add_argument("--city", required=True)
+    s.add_argument("--table", default=None)
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        years = (args.from_year, args.to_year)
+        data = build_table(grid(years, args.step), args.workers,
+                           build={"years": list(years), "step_hours": args.step})
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "wb") as f:
+            f.write(data)
+        table = RarityTable(data=data)
+        print(f"Wrote {args.out} ({len(data) / 1024:.0f} KiB, {table.charts:,} charts, "
+              f"{sum(len(c) for c in table.counts.values()):,} keys) in {time.perf_counter() - t0:.1f}s")
+        return 0
+
+    import natal_chart
+
+    table = open_rarity_table(args.table)
+    if table is None:
+        print("No rarity table; build one with `rarity.py build`", file=sys.stderr)
+        return 1
+    place = natal_chart.geocode(args.city)
+    if place is None:
+        print(f"Error: City '{args.city}' not found.", file=sys.stderr)
+        return 1
+    chart = natal_chart.compute_chart(args.year, args.month, args.day, args.hour, args.minute,
+                                      place.lat, place.lon, place.tz)
+    stages = natal_chart.chart_stages(chart)
+    t0 = time.perf_counter()
+    result = table.score(chart, *stages)
+    us = (time.perf_counter() - t0) * 1e6
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(f"({us:.0f} us)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Returns — solar and lunar return charts
+
+A solar return is the moment the transiting Sun comes back to the natal
+Sun's longitude, once a year around the birthday; a lunar return is the same
+for the Moon, every 27.3 days. Each return is cast as a full chart for the
+place the person is at the time (the birthplace by default).
+
+Return instants are found by Newton iteration on swe.calc_ut longitude and
+speed. Both bodies are always direct, so from a first guess at their mean
+motion the iteration converges to EXACT_TOL_DEG in two or three steps, and
+each later return in a run is searched from one period after the last, so
+a year of lunar returns costs a few dozen ephemeris calls before any chart
+is built. The charts go through natal_chart's pipeline and cache.
+
+Usage:
+  python3 returns.py --city london --year 1990 --month 6 --day 2 --hour 14 \
+    --minute 5 --return solar --return-year 2026
+
+  python3 returns.py ... --return lunar --return-year 2026 --place "new york" --json
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from datetime import datetime, timedelta
+
+import swisseph as swe
+
+import natal_chart
+from natal_chart import (
+    PLANET_IDS, UTC, ang_diff, chart_result, compute_chart, get_zone, house_systems,
+    init_ephemeris, julday_ut, record_time_known, resolve_fields, with_location,
+)
+
+RETURN_BODIES = {"solar": "Sun", "lunar": "Moon"}
+
+# Mean tropical periods in days: the first guess, and the step to the next return
+RETURN_PERIODS = {"Sun": 365.242190, "Moon": 27.321582}
+
+EXACT_TOL_DEG = 1e-7  # ~0.0004"; the Moon covers that in under a millisecond
+MAX_NEWTON_STEPS = 8
+
+
+def _position(pid: int, jd: float) -> tuple[float, float]:
+    tables = natal_chart.EPHEMERIS_TABLES
+    pos = tables.lon_speed(pid, jd) if tables else None
+    if pos is None:
+        xx, _ = swe.calc_ut(jd, pid, natal_chart.EPHE_FLAG | swe.FLG_SPEED)
+        pos = xx[0], xx[3]
+    return pos
+
+
+def _newton(pid: int, target: float, jd: float) -> tuple[float, float]:
+    """Time nearest jd at which the body is at longitude target, and its longitude then."""
+    for _ in range(MAX_NEWTON_STEPS):
+        lon, speed = _position(pid, jd)
+        d = ang_diff(lon, target)
+        if abs(d) < EXACT_TOL_DEG:
+            break
+        jd -= d / speed
+    else:
+        lon, _ = _position(pid, jd)
+    return jd, lon
+
+
+def return_times(natal_lon: float, body: str, jd_start: float, jd_end: float) -> list[tuple[float, float]]:
+    """(jd, longitude) of every return of body ("Sun" or "Moon") to natal_lon in [jd_start, jd_end)."""
+    pid = PLANET_IDS[body]
+    period = RETURN_PERIODS[body]
+    lon0, _ = _position(pid, jd_start)
+    jd = jd_start + (natal_lon - lon0) % 360.0 / 360.0 * period
+    hits: list[tuple[float, float]] = []
+    while True:
+        jd, lon = _newton(pid, natal_lon, jd)
+        if jd >= jd_end:
+            return hits
+        # A fast Moon can put the first guess past a return just before jd_start
+        if jd >= jd_start and (not hits or jd - hits[-1][0] > period / 2):
+            hits.append((jd, lon))
+        jd += period
+
+
+def _jd_to_datetime(jd: float) -> datetime:
+    y, m, d, hours = swe.revjul(jd, swe.GREG_CAL)
+    return datetime(y, m, d, tzinfo=UTC) + timedelta(seconds=round(hours * 3600))
+
+
+def find_returns(chart, kind: str, start: datetime, end: datetime,
+                 lat: float | None = None, lon: float | None = None,
+                 tz_str: str | None = None, hsys=None) -> list[dict]:
+    """
+    Every kind ("solar" or "lunar") return of a natal chart between start
+    and end (datetimes; naive ones are UTC), in order. Each is {"exact": UTC
+    datetime, "lon": the body's longitude then, "chart": Chart} with the
+    chart cast at lat/lon/tz_str (default the birthplace) to the second, in
+    the natal chart's house systems unless hsys names others.
+    """
+    if kind not in RETURN_BODIES:
+        raise ValueError(f"Unknown return {kind!r} (expected one of: {', '.join(RETURN_BODIES)})")
+    init_ephemeris()
+    body = RETURN_BODIES[kind]
+    natal_lon = chart["points"][body]["lon"]
+    if lat is None or lon is None:
+        lat, lon, tz_str = chart["lat"], chart["lon"], tz_str or chart["tz_str"]
+    if tz_str is None:
+        tz_str = natal_chart.timezone_at(lat, lon)
+        if tz_str is None:
+            raise ValueError("No timezone given and no timezone index to look it up (see tz_index.py)")
+    systems = house_systems(tuple(chart["houses"]) if hsys is None else hsys)
+    zone = get_zone(tz_str)
+
+    found = []
+    for jd, body_lon in return_times(natal_lon, body, julday_ut(_as_utc(start)), julday_ut(_as_utc(end))):
+        dt_utc = _jd_to_datetime(jd)
+        found.append({
+            "exact": dt_utc,
+            "lon": body_lon,
+            "chart": natal_chart._chart_at(dt_utc.astimezone(zone), dt_utc, lat, lon,
+                                           tz_str, systems, True),
+        })
+    return found
+
+
+def year_returns(chart, kind: str, year: int, lat: float | None = None,
+                 lon: float | None = None, tz_str: str | None = None, hsys=None) -> list[dict]:
+    """
+    The returns belonging to a year (see find_returns): for "solar", the one
+    nearest the birthday in that year, which may fall on the day before or
+    after it; for "lunar", all 13 or 14 in the calendar year, in tz_str's
+    zone (default the natal chart's).
+    """
+    if kind == "solar":
+        born = chart["dt_utc"]
+        try:
+            birthday = born.replace(year=year)
+        except ValueError:  # 29 February
+            birthday = born.replace(year=year, day=28)
+        half = timedelta(days=RETURN_PERIODS["Sun"] / 2)
+        return find_returns(chart, kind, birthday - half, birthday + half, lat, lon, tz_str, hsys)
+    zone = get_zone(tz_str or chart["tz_str"])
+    return find_returns(chart, kind, datetime(year, 1, 1, tzinfo=zone),
+                        datetime(year + 1, 1, 1, tzinfo=zone), lat, lon, tz_str, hsys)
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=UTC) if dt.tzinfo is None else dt.astimezone(UTC)
+
+
+def _return_place(place) -> dict:
+    """lat/lon/tz for a "return_place": a city name, or a dict like a birth record's location."""
+    rec = with_location({"city": place} if isinstance(place, str) else dict(place))
+    if not all(k in rec for k in ("lat", "lon")):
+        raise ValueError("return_place needs a city or lat and lon")
+    return {"lat": float(rec["lat"]), "lon": float(rec["lon"]),
+            "tz": str(rec["tz"]) if "tz" in rec else None}
+
+
+def return_result(rec: dict, fields=None, hsys="P") -> dict:
+    """
+    The /api/chart payload for a birth record with a "return" ("solar" or
+    "lunar"): "return_year" (default this year) picks the returns as
+    year_returns does and "return_place" (a city, or lat/lon[/tz]) where
+    they are cast. Each return carries its UTC "exact" and "local" instant
+    and the chart_result of its chart with the record's (or the default)
+    fields. Raises ValueError for a bad return, year, place or field.
+    """
+    kind = str(rec["return"]).lower()
+    if kind not in RETURN_BODIES:
+        raise ValueError(f"Unknown return {rec['return']!r} (expected one of: {', '.join(RETURN_BODIES)})")
+    year = int(rec.get("return_year") or datetime.now(UTC).year)
+    wanted = resolve_fields(rec.get("fields", fields))
+    natal = compute_chart(
+        int(rec["year"]), int(rec["month"]), int(rec["day"]), int(rec["hour"]), int(rec["minute"]),
+        float(rec["lat"]), float(rec["lon"]), str(rec["tz"]), house_systems(rec.get("hsys", hsys)),
+        record_time_known(rec),
+    )
+    place = _return_place(rec["return_place"]) if rec.get("return_place") else {}
+    returns = year_returns(natal, kind, year, place.get("lat"), place.get("lon"), place.get("tz"))
+
+    name = str(rec["name"])
+    out = []
+    for r in returns:
+        chart = r["chart"]
+        title = f"{name} — {kind.title()} Return {chart['dt_local']:%Y-%m-%d}"
+        out.append({
+            "exact": r["exact"].isoformat(),
+            "local": chart["dt_local"].isoformat(),
+            "lon": round(r["lon"], 6),
+            **chart_result(title, chart, wanted),
+        })
+    first = returns[0]["chart"] if returns else natal
+    return {
+        "name": name,
+        "return": kind,
+        "return_year": year,
+        "natal_lon": round(natal["points"][RETURN_BODIES[kind]]["lon"], 6),
+        "place": {"lat": first["lat"], "lon": first["lon"], "tz": first["tz_str"]},
+        "returns": out,
+    }
+
+
+def format_returns(result: dict) -> str:
+    """Text report: one line per return, then each return's formatted chart where present."""
+    lines = [f"{result['return'].upper()} RETURNS {result['return_year']}: {result['name']}",
+             f"  {RETURN_BODIES[result['return']]} back to {result['natal_lon']:.4f}° "
+             f"at {result['place']['lat']:.4f}, {result['place']['lon']:.4f} ({result['place']['tz']})", ""]
+    for r in result["returns"]:
+        lines.append(f"  {r['local'][:19].replace('T', ' ')}  (UTC {r['exact'][:19].replace('T', ' ')})")
+    for r in result["returns"]:
+        if "formatted_output" in r:
+            lines += ["", r["formatted_output"]]
+    return "\n".join(lines)
+
+
+def main() -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Solar and lunar return charts")
+    ap.add_argument("--name", default="Returns")
+    ap.add_argument("--year", type=int, required=True)
+    ap.add_argument("--month", type=int, required=True)
+    ap.add_argument("--day", type=int, required=True)
+    ap.add_argument("--hour", type=int, required=True)
+    ap.add_argument("--minute", type=int, default=0)
+    ap.add_argument("--city", default=None)
+    ap.add_argument("--lat", type=float, default=None)
+    ap.add_argument("--lon", type=float, default=None)
+    ap.add_argument("--tz", default=None)
+    ap.add_argument("--hsys", default="P")
+    ap.add_argument("--return", dest="kind", choices=list(RETURN_BODIES), default="solar")
+    ap.add_argument("--return-year", type=int, default=None, help="Default: this year")
+    ap.add_argument("--place", default=None, help="City the returns are cast for (default: birthplace)")
+    ap.add_argument("--fields", default=None, help="Result fields per return (see /api/chart)")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    rec = {k: v for k, v in (("city", args.city), ("lat", args.lat), ("lon", args.lon),
+                             ("tz", args.tz)) if v is not None}
+    try:
+        rec = with_location(rec)
+        if not all(k in rec for k in ("lat", "lon", "tz")):
+            raise ValueError("Provide --city or (--lat, --lon[, --tz])")
+        result = return_result({
+            **rec, "name": args.name, "year": args.year, "month": args.month, "day": args.day,
+            "hour": args.hour, "minute": args.minute, "hsys": args.hsys,
+            "return": args.kind, "return_year": args.return_year, "return_place": args.place,
+        }, args.fields)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result) if args.json else format_returns(result))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
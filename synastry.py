@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Synastry — cross-chart aspects and compatibility for groups
+
+Compares every pair of charts in a group. Each chart pair's 13 x 13 body
+pairs (ASPECT_BODIES of one person against ASPECT_BODIES of the other) are
+evaluated as array operations over blocks of chart pairs, never as a Python
+loop per pair. Aspects and orbs follow ASPECT_DEFS and compute_aspects'
+luminary bonus.
+
+  from synastry import synastry
+  report = synastry(charts, names)          # groups: full aspect lists
+  report["pairs"][0]["summary"]["score"]
+
+  from synastry import top_matches
+  best, scores = top_matches(lons, k=5)     # cohorts: best k per person
+
+Each pair gets a summary. Every aspect is weighted by how tight it is
+(1 - orb / allowed orb) times the average BODY_WEIGHTS of its two bodies,
+and the weights are summed by ASPECT_NATURE into harmony, tension and
+intensity. score = 100 * (harmony + intensity / 2) / total, or 50 for no
+aspects.
+
+Usage (offline cohort; NDJSON or CSV birth records as for --batch):
+  python3 synastry.py --input cohort.ndjson --top 5 > matches.ndjson
+  python3 synastry.py --input friends.csv --pairs > group.ndjson
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+
+import numpy as np
+
+from aspect_matrix import ASPECT_NAMES, NEAREST_ONLY, longitude_matrix, nearest_aspects
+from natal_chart import ASPECT_BODIES, ASPECT_DEFS, LUMINARIES, LUMINARY_BONUS
+
+ASPECT_NATURE = {
+    "conjunction": "intensity",
+    "sextile": "harmony",
+    "trine": "harmony",
+    "square": "tension",
+    "quincunx": "tension",
+    "opposition": "tension",
+}
+
+BODY_WEIGHTS = {
+    "Sun": 3.0, "Moon": 3.0, "Venus": 2.0, "Mars": 2.0, "Ascendant": 2.0,
+    "Mercury": 1.5, "MC": 1.0, "Jupiter": 1.0, "Saturn": 1.0,
+    "Uranus": 0.5, "Neptune": 0.5, "Pluto": 0.5, "Chiron": 0.5,
+}
+
+# Cross-chart pairs within a block; bounds the (pairs x 13 x 13) temporaries
+BLOCK_PAIRS = 1024
+
+_NB = len(ASPECT_BODIES)
+_ANGLES = np.array([angle for angle, _ in ASPECT_DEFS.values()], dtype=float)
+# Small whole and half numbers, exact in float32, so they keep float32 blocks
+# in float32 without rounding float64 ones
+_BASE_ORBS = np.array([orb for _, orb in ASPECT_DEFS.values()], dtype=np.float32)
+_IS_LUM = np.array([b in LUMINARIES for b in ASPECT_BODIES])
+# Body pairs flattened to 169 columns: (body of A, body of B)
+_BODY_A, _BODY_B = (ix.ravel() for ix in np.indices((_NB, _NB)))
+_BONUS = np.where(_IS_LUM[_BODY_A] | _IS_LUM[_BODY_B], LUMINARY_BONUS, 0).astype(np.float32)
+_WEIGHTS = np.array([BODY_WEIGHTS.get(b, 1.0) for b in ASPECT_BODIES], dtype=np.float32)
+_PAIR_WEIGHTS = (_WEIGHTS[_BODY_A] + _WEIGHTS[_BODY_B]) / 2
+_NATURES = ("harmony", "tension", "intensity")
+_NATURE_OF = np.array([_NATURES.index(ASPECT_NATURE[name]) for name in ASPECT_NAMES])
+
+
+def _cross(norm_a: np.ndarray, norm_b: np.ndarray):
+    """
+    Cross aspects for aligned rows of two (pairs x bodies) matrices of
+    longitudes in [0, 360). Returns (hit mask, aspect index, orb, allowed
+    orb), each (pairs x 169) over the flattened body pairs; NaN longitudes
+    never match.
+    """
+    d = np.subtract(norm_a[:, :, None], norm_b[:, None, :]).reshape(len(norm_a), -1)
+    np.abs(d, out=d)
+    d -= 180.0
+    sep = np.abs(d, out=d)
+    np.subtract(180.0, sep, out=sep)
+    if NEAREST_ONLY:
+        aspect, orb = nearest_aspects(sep)
+    else:
+        orbs = np.abs(sep[..., None] - _ANGLES)
+        orbs = np.where(orbs <= _BASE_ORBS + _BONUS[:, None], orbs, np.inf)
+        aspect = np.argmin(orbs, axis=-1)
+        orb = np.take_along_axis(orbs, aspect[..., None], axis=-1)[..., 0]
+    allowed = _BASE_ORBS[aspect] + _BONUS
+    return orb <= allowed, aspect, orb, allowed
+
+
+def _summaries(hit, aspect, orb, allowed) -> np.ndarray:
+    """(pairs x 4) array: harmony, tension, intensity, aspect count."""
+    weight = np.fmax((1.0 - orb / allowed) * _PAIR_WEIGHTS, 0.0)
+    pairs = hit.shape[0]
+    keys = _NATURE_OF[aspect] + 3 * np.arange(pairs)[:, None]
+    out = np.empty((pairs, 4))
+    out[:, :3] = np.bincount(keys.ravel(), weight.ravel(), minlength=3 * pairs).reshape(pairs, 3)
+    out[:, 3] = hit.sum(axis=1)
+    return out
+
+
+def compatibility_score(harmony, tension, intensity):
+    """0-100; 50 when the pair has no aspects at all. Works on arrays too."""
+    total = harmony + tension + intensity
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = 100.0 * (harmony + intensity / 2) / total
+    return np.where(total > 0, score, 50.0)
+
+
+def _pair_blocks(n: int, block: int):
+    """Every (a, b) with a < b, row-major, as index arrays of about block pairs."""
+    a_parts, b_parts, size = [], [], 0
+    for a in range(n - 1):
+        for b0 in range(a + 1, n, block):
+            cols = np.arange(b0, min(b0 + block, n))
+            a_parts.append(np.full(len(cols), a))
+            b_parts.append(cols)
+            size += len(cols)
+            if size >= block:
+                yield np.concatenate(a_parts), np.concatenate(b_parts)
+                a_parts, b_parts, size = [], [], 0
+    if size:
+        yield np.concatenate(a_parts), np.concatenate(b_parts)
+
+
+def iter_pair_scores(lons: np.ndarray, block: int = BLOCK_PAIRS):
+    """
+    Stream summaries for every chart pair a < b of a (charts x ASPECT_BODIES)
+    longitude matrix. Yields (a, b, summary) per block, where summary is a
+    (pairs x 5) array of harmony, tension, intensity, aspect count, score.
+    Separations are computed in float32, which is ample for orbs and nearly
+    halves the time per pair; sums agree with synastry() to ~0.001.
+    """
+    norm = np.mod(np.asarray(lons, dtype=float), 360.0).astype(np.float32)
+    for a, b in _pair_blocks(len(norm), block):
+        s = _summaries(*_cross(norm[a], norm[b]))
+        yield a, b, np.column_stack((s, compatibility_score(s[:, 0], s[:, 1], s[:, 2])))
+
+
+def top_matches(lons: np.ndarray, k: int = 5, block: int = BLOCK_PAIRS):
+    """
+    Best k partners per chart by compatibility score, in O(charts * k)
+    memory. Returns (indices, scores), both (charts x k), best first; rows
+    with fewer than k partners are padded with -1 / NaN.
+    """
+    n = len(lons)
+    best_idx = np.full((n, k), -1, dtype=np.int64)
+    best_score = np.full((n, k), -np.inf)
+
+    for a, b, s in iter_pair_scores(lons, block):
+        # Each pair is a candidate for both of its charts
+        nodes = np.concatenate((a, b))
+        partners = np.concatenate((b, a))
+        scores = np.concatenate((s[:, 4], s[:, 4]))
+        order = np.lexsort((-scores, nodes))
+        nodes, partners, scores = nodes[order], partners[order], scores[order]
+
+        # Up to k best candidates per chart, as (charts in block x k) arrays
+        uniq, first = np.unique(nodes, return_index=True)
+        rank = np.arange(len(nodes)) - np.repeat(first, np.diff(np.append(first, len(nodes))))
+        keep = rank < k
+        row = np.searchsorted(uniq, nodes[keep])
+        cand_idx = np.full((len(uniq), k), -1, dtype=np.int64)
+        cand_score = np.full((len(uniq), k), -np.inf)
+        cand_idx[row, rank[keep]] = partners[keep]
+        cand_score[row, rank[keep]] = scores[keep]
+
+        idx = np.concatenate((best_idx[uniq], cand_idx), axis=1)
+        score = np.concatenate((best_score[uniq], cand_score), axis=1)
+        top = np.argsort(-score, axis=1, kind="stable")[:, :k]
+        best_idx[uniq] = np.take_along_axis(idx, top, axis=1)
+        best_score[uniq] = np.take_along_axis(score, top, axis=1)
+
+    best_score[best_idx < 0] = np.nan
+    return best_idx, best_score
+
+
+def synastry(charts: list, names: list[str] | None = None) -> dict:
+    """
+    Cross-chart aspects and a compatibility summary for every pair in a
+    group. charts are compute_chart results (or anything with "points").
+    Each pair lists its aspects, tightest first, with p1 from chart a and
+    p2 from chart b.
+    """
+    names = names or [f"Person {i + 1}" for i in range(len(charts))]
+    lons = longitude_matrix([chart["points"] for chart in charts])
+    norm = np.mod(lons, 360.0)
+
+    pairs = []
+    for a, b in _pair_blocks(len(charts), BLOCK_PAIRS):
+        hit, aspect, orb, allowed = _cross(norm[a], norm[b])
+        summary = _summaries(hit, aspect, orb, allowed)
+        scores = compatibility_score(summary[:, 0], summary[:, 1], summary[:, 2])
+
+        p, c = np.nonzero(hit)
+        rounded = [round(x, 2) for x in orb[p, c].tolist()]
+        per_pair: list[list[dict]] = [[] for _ in range(len(a))]
+        for row, col, asp, o in zip(p.tolist(), c.tolist(), aspect[p, c].tolist(), rounded):
+            per_pair[row].append({
+                "p1": ASPECT_BODIES[_BODY_A[col]], "p2": ASPECT_BODIES[_BODY_B[col]],
+                "aspect": ASPECT_NAMES[asp], "orb": o,
+            })
+
+        for row, (ai, bi) in enumerate(zip(a.tolist(), b.tolist())):
+            aspects = sorted(per_pair[row], key=lambda x: x["orb"])
+            harmony, tension, intensity, count = summary[row].tolist()
+            pairs.append({
+                "a": names[ai],
+                "b": names[bi],
+                "summary": {
+                    "score": round(float(scores[row]), 1),
+                    "harmony": round(harmony, 2),
+                    "tension": round(tension, 2),
+                    "intensity": round(intensity, 2),
+                    "aspects": int(count),
+                    "tightest": aspects[:3],
+                },
+                "aspects": aspects,
+            })
+
+    return {"members": names, "pairs": pairs}
+
+
+def main() -> int:
+    import argparse
+
+    from natal_chart import (
+        _cli_record, compute_chart, iter_birth_records, record_time_known, with_location,
+    )
+
+    ap = argparse.ArgumentParser(description="Synastry for a group or cohort")
+    ap.add_argument("--input", required=True, help="CSV or NDJSON birth records ('-' for stdin)")
+    ap.add_argument("--top", type=int, default=5, help="Best matches per person (cohort mode)")
+    ap.add_argument("--pairs", action="store_true",
+                    help="Write every pair with its full aspect list instead (small groups)")
+    args = ap.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    t0 = time.perf_counter()
+    names, charts = [], []
+    with source:
+        for i, rec in enumerate(iter_birth_records(source)):
+            rec = _cli_record(rec)
+            try:
+                rec = with_location(rec)
+                charts.append(compute_chart(
+                    int(rec["year"]), int(rec["month"]), int(rec["day"]), int(rec["hour"]),
+                    int(rec["minute"]), float(rec["lat"]), float(rec["lon"]), str(rec["tz"]),
+                    "P", record_time_known(rec),
+                ))
+                names.append(str(rec.get("name", f"Person {i + 1}")))
+            except Exception as e:
+                print(f"record {i}: skipped: {e}", file=sys.stderr)
+    t_charts = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if args.pairs:
+        for pair in synastry(charts, names)["pairs"]:
+            print(json.dumps(pair))
+    else:
+        lons = longitude_matrix([chart["points"] for chart in charts])
+        idx, scores = top_matches(lons, args.top)
+        for i, name in enumerate(names):
+            matches = [{"name": names[j], "score": round(float(s), 1)}
+                       for j, s in zip(idx[i].tolist(), scores[i].tolist()) if j >= 0]
+            print(json.dumps({"name": name, "matches": matches}))
+    n = len(charts)
+    print(f"{n} charts in {t_charts:.1f}s, {n * (n - 1) // 2} pairs in "
+          f"{time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Transit Search — when transiting planets aspect a natal chart
+
+Finds every transit aspect (ASPECT_DEFS, with the same orbs and luminary
+bonus as compute_aspects) between moving bodies and the points of a natal
+chart over a date range, with its entry, exact and exit times.
+
+Each body is sampled once over the range with a step sized to its current
+speed (about STEP_DEG of motion, capped at MAX_STEP_DAYS so stations are
+not stepped over), and every natal target is checked against those samples
+at once. Crossings are then solved on a cubic Hermite interpolant of the
+sampled longitudes and speeds, and exact hits are polished with Newton
+steps on the ephemeris itself. A transit is one continuous stretch inside
+the orb; a retrograde loop gives one transit with up to three exact hits.
+
+Usage:
+  python3 transits.py --city wellington --year 1994 --month 1 --day 21 \
+    --hour 13 --from 2026-01-01 --days 365
+
+--city goes through natal_chart's geocoder like the other CLIs; the place
+it resolved to is printed to stderr. With --lat/--lon, --tz may be left out
+when a timezone index is deployed (tz_index.py).
+
+  python3 transits.py ... --bodies Saturn Pluto --json
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import swisseph as swe
+
+import natal_chart
+from natal_chart import (
+    ASPECT_BODIES, ASPECT_DEFS, LUMINARIES, LUMINARY_BONUS, PLANET_IDS, UTC,
+    ang_diff, init_ephemeris, julday_ut,
+)
+
+# Moving bodies searched by default (Chiron needs Swiss Ephemeris files)
+TRANSIT_BODIES = [
+    "Sun", "Moon", "Mercury", "Venus", "Mars",
+    "Jupiter", "Saturn", "Uranus", "Neptune", "Pluto",
+]
+
+STEP_DEG = 2.0        # target motion per sample; must stay well under 2 * smallest orb
+MIN_STEP_DAYS = 1 / 24
+MAX_STEP_DAYS = 5.0
+EXACT_TOL_DEG = 1e-7  # Newton polish stops once the hit is this close (~0.0004")
+
+
+def _position(pid: int, jd: float) -> tuple[float, float]:
+    tables = natal_chart.EPHEMERIS_TABLES
+    pos = tables.lon_speed(pid, jd) if tables else None
+    if pos is None:
+        xx, _ = swe.calc_ut(jd, pid, natal_chart.EPHE_FLAG | swe.FLG_SPEED)
+        pos = xx[0], xx[3]
+    return pos
+
+
+def _sample(pid: int, jd_start: float, jd_end: float):
+    """
+    Times, unwrapped longitudes and speeds with adaptive steps. Every station
+    found between two samples is inserted as a sample of its own, so the
+    longitude is monotonic within each step and a step can hold at most one
+    crossing of any level.
+    """
+    ts, us, vs = [], [], []
+    t = jd_start
+    lon, speed = _position(pid, t)
+    u = lon
+    while True:
+        ts.append(t)
+        us.append(u)
+        vs.append(speed)
+        if t >= jd_end:
+            break
+        step = min(max(STEP_DEG / max(abs(speed), 1e-9), MIN_STEP_DAYS), MAX_STEP_DAYS)
+        t = min(t + step, jd_end)
+        new_lon, speed = _position(pid, t)
+        new_u = u + ang_diff(new_lon, lon)
+        if (speed < 0) != (vs[-1] < 0):
+            s = _station(ts[-1], t, us[-1], new_u, vs[-1], speed)
+            t_s = ts[-1] + s * (t - ts[-1])
+            if ts[-1] < t_s < t:
+                lon_s, speed_s = _position(pid, t_s)
+                ts.append(t_s)
+                us.append(u + ang_diff(lon_s, lon))
+                vs.append(speed_s)
+        u, lon = new_u, new_lon
+    return np.array(ts), np.array(us), np.array(vs)
+
+
+def _station(t0, t1, u0, u1, v0, v1) -> float:
+    """Fraction of the step where the Hermite interpolant's speed is zero."""
+    h = t1 - t0
+    a = 6 * u0 + 3 * h * v0 - 6 * u1 + 3 * h * v1
+    b = -6 * u0 - 4 * h * v0 + 6 * u1 - 2 * h * v1
+    c = h * v0
+    if abs(a) < 1e-15:
+        return -c / b if b else 0.5
+    disc = math.sqrt(max(b * b - 4 * a * c, 0.0))
+    roots = [r for r in ((-b - disc) / (2 * a), (-b + disc) / (2 * a)) if 0.0 < r < 1.0]
+    return roots[0] if roots else v0 / (v0 - v1)
+
+
+def _hermite(t0, t1, u0, u1, v0, v1, s: float) -> tuple[float, float]:
+    """Interpolated unwrapped longitude and its time derivative at fraction s."""
+    h = t1 - t0
+    s2, s3 = s * s, s * s * s
+    value = ((2 * s3 - 3 * s2 + 1) * u0 + (s3 - 2 * s2 + s) * h * v0
+             + (-2 * s3 + 3 * s2) * u1 + (s3 - s2) * h * v1)
+    deriv = ((6 * s2 - 6 * s) * u0 + (3 * s2 - 4 * s + 1) * h * v0
+             + (-6 * s2 + 6 * s) * u1 + (3 * s2 - 2 * s) * h * v1) / h
+    return value, deriv
+
+
+def _solve_step(ts, us, vs, k: int, level: float) -> float:
+    """Time in [ts[k], ts[k+1]] where the interpolated longitude equals level."""
+    t0, t1 = ts[k], ts[k + 1]
+    args = (t0, t1, us[k], us[k + 1], vs[k], vs[k + 1])
+    lo, hi = 0.0, 1.0
+    g_lo = us[k] - level
+    s = (level - us[k]) / (us[k + 1] - us[k]) if us[k + 1] != us[k] else 0.5
+    s = min(max(s, 0.0), 1.0)
+    for _ in range(40):
+        value, deriv = _hermite(*args, s)
+        g = value - level
+        if abs(g) < 1e-10:
+            break
+        if (g < 0) == (g_lo < 0):
+            lo, g_lo = s, g
+        else:
+            hi = s
+        step = g / (deriv * (t1 - t0)) if deriv else 0.0
+        s_new = s - step
+        s = s_new if lo < s_new < hi else (lo + hi) / 2
+        if hi - lo < 1e-12:
+            break
+    return t0 + s * (t1 - t0)
+
+
+def _polish(pid: int, jd: float, target: float) -> tuple[float, float]:
+    """
+    Newton steps on the real ephemeris towards longitude == target; returns
+    the time and speed. The interpolated start is already close, so the
+    first correction is usually tiny and the error after it (roughly its
+    square) is negligible without another ephemeris call.
+    """
+    for _ in range(4):
+        lon, speed = _position(pid, jd)
+        d = ang_diff(lon, target)
+        if abs(d) < EXACT_TOL_DEG or abs(speed) < 1e-6:
+            break
+        jd -= d / speed
+        if abs(d / speed) < 1e-4:
+            break
+    return jd, speed
+
+
+def _jd_to_datetime(jd: float) -> datetime:
+    y, m, d, hours = swe.revjul(jd, swe.GREG_CAL)
+    return datetime(y, m, d, tzinfo=UTC) + timedelta(seconds=round(hours * 3600))
+
+
+def _targets(chart, body: str, natal_points: list[str]):
+    """(natal point, aspect, target longitude, orb) for every aspect side."""
+    points = chart["points"]
+    out = []
+    for pname in natal_points:
+        p = points.get(pname)
+        if p is None or p.get("lon") is None:
+            continue
+        bonus = LUMINARY_BONUS if body in LUMINARIES or pname in LUMINARIES else 0
+        for asp_name, (angle, orb) in ASPECT_DEFS.items():
+            sides = {angle % 360, -angle % 360}
+            for side in sorted(sides):
+                out.append((pname, asp_name, (p["lon"] + side) % 360.0, orb + bonus))
+    return out
+
+
+def _body_transits(chart, body: str, natal_points: list[str],
+                   jd_start: float, jd_end: float) -> list[dict]:
+    pid = PLANET_IDS[body]
+    targets = _targets(chart, body, natal_points)
+    if not targets:
+        return []
+    ts, us, vs = _sample(pid, jd_start, jd_end)
+    lons = np.array([t[2] for t in targets])
+    orbs = np.array([t[3] for t in targets])
+
+    # Signed distance of every sample from every target, in (-180, 180]
+    d = (us[:, None] - lons[None, :] + 180.0) % 360.0 - 180.0
+    inside = np.abs(d) <= orbs[None, :]
+    n = len(ts)
+    found = []
+
+    for j in np.nonzero(inside.any(axis=0))[0]:
+        pname, asp_name, target, orb = targets[j]
+        col = d[:, j]
+        flags = np.concatenate(([False], inside[:, j], [False])).astype(np.int8)
+        edges = np.diff(flags)
+        starts = np.nonzero(edges == 1)[0]
+        ends = np.nonzero(edges == -1)[0] - 1
+
+        for k0, k1 in zip(starts, ends):
+            def level(k, offset):
+                # Target longitude on the same unwrapped branch as sample k
+                return us[k] - col[k] + offset
+
+            entry = exit_ = None
+            if k0 > 0:
+                entry = _solve_step(ts, us, vs, k0 - 1, level(k0 - 1, math.copysign(orb, col[k0 - 1])))
+            if k1 < n - 1:
+                exit_ = _solve_step(ts, us, vs, k1, level(k1, math.copysign(orb, col[k1 + 1])))
+
+            exact = []
+            for k in range(max(k0 - 1, 0), min(k1, n - 2) + 1):
+                if col[k] == 0.0 or (col[k] < 0) != (col[k + 1] < 0) and abs(col[k]) < 90:
+                    jd = _solve_step(ts, us, vs, k, level(k, 0.0))
+                    exact.append(_polish(pid, jd, target))
+
+            if exact:
+                (peak, peak_speed), peak_orb = exact[0], 0.0
+            else:
+                # Closest approach is a station or the edge of the range,
+                # both of which are samples
+                k = k0 + int(np.argmin(np.abs(col[k0:k1 + 1])))
+                peak, peak_speed, peak_orb = ts[k], vs[k], abs(col[k])
+
+            found.append({
+                "transiting": body,
+                "aspect": asp_name,
+                "natal": pname,
+                "entry": _jd_to_datetime(entry) if entry is not None else None,
+                "exact": [_jd_to_datetime(jd) for jd, _ in exact],
+                "peak": _jd_to_datetime(peak),
+                "exit": _jd_to_datetime(exit_) if exit_ is not None else None,
+                "orb": round(peak_orb, 2),
+                "retrograde": bool(peak_speed < 0),
+            })
+    return found
+
+
+def find_transits(chart, start: datetime, end: datetime,
+                  bodies: list[str] | None = None,
+                  natal_points: list[str] | None = None) -> list[dict]:
+    """
+    Every transit aspect from bodies (default TRANSIT_BODIES) to the chart's
+    natal_points (default ASPECT_BODIES) between start and end, ordered by
+    peak. Each transit has "entry" and "exit" (None where the range cuts the
+    transit off), the "exact" hits, the "peak" (first exact hit, or closest
+    approach) and the "orb" at the peak. Times are UTC datetimes; naive
+    start/end are taken as UTC.
+    """
+    init_ephemeris()
+    jd_start = julday_ut(_as_utc(start))
+    jd_end = julday_ut(_as_utc(end))
+    found = []
+    for body in bodies or TRANSIT_BODIES:
+        found.extend(_body_transits(chart, body, natal_points or ASPECT_BODIES, jd_start, jd_end))
+    found.sort(key=lambda t: t["peak"])
+    return found
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=UTC) if dt.tzinfo is None else dt.astimezone(UTC)
+
+
+def main() -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Transit search against a natal chart")
+    ap.add_argument("--year", type=int, required=True)
+    ap.add_argument("--month", type=int, required=True)
+    ap.add_argument("--day", type=int, required=True)
+    ap.add_argument("--hour", type=int, default=None, help="Birth hour (24h). Omit if unknown.")
+    ap.add_argument("--minute", type=int, default=0)
+    ap.add_argument("--city", default=None)
+    ap.add_argument("--lat", type=float, default=None)
+    ap.add_argument("--lon", type=float, default=None)
+    ap.add_argument("--tz", default=None)
+    ap.add_argument("--from", dest="start", default=None, help="Start date YYYY-MM-DD (default: today)")
+    ap.add_argument("--days", type=float, default=365)
+    ap.add_argument("--bodies", nargs="+", default=TRANSIT_BODIES, choices=list(PLANET_IDS))
+    ap.add_argument("--json", action="store_true", help="One JSON transit per line")
+    args = ap.parse_args()
+
+    rec = {k: v for k, v in (("city", args.city), ("lat", args.lat), ("lon", args.lon),
+                             ("tz", args.tz)) if v is not None}
+    try:
+        rec = natal_chart.with_location(rec)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if "lat" in rec and "lon" in rec and "tz" not in rec:
+        print("Error: No timezone index to look up --tz from; pass --tz or build one with "
+              "tz_index.py", file=sys.stderr)
+        return 1
+    if not all(k in rec for k in ("lat", "lon", "tz")):
+        print("Error: Provide --city or (--lat, --lon[, --tz])", file=sys.stderr)
+        return 1
+    place = rec.get("resolved_city")
+    if place:
+        print(f"Place: {place['name']}{', ' + place['country'] if place['country'] else ''} "
+              f"({place['lat']}, {place['lon']}, {place['tz']})", file=sys.stderr)
+    lat, lon, tz_str = float(rec["lat"]), float(rec["lon"]), str(rec["tz"])
+
+    time_known = args.hour is not None
+    chart = natal_chart.compute_chart(
+        args.year, args.month, args.day, args.hour if time_known else 12,
+        args.minute if time_known else 0, lat, lon, tz_str, "P", time_known,
+    )
+    start = (datetime.fromisoformat(args.start) if args.start
+             else datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0))
+    start = _as_utc(start)
+    transits = find_transits(chart, start, start + timedelta(days=args.days), args.bodies)
+
+    def fmt(dt):
+        return dt.strftime("%Y-%m-%d %H:%M") if dt else "      ...       "
+
+    for t in transits:
+        if args.json:
+            print(json.dumps(t, default=str))
+            continue
+        rx = " Rx" if t["retrograde"] else ""
+        hits = len(t["exact"])
+        print(f"{t['transiting']:<8s} {t['aspect']:<12s} {t['natal']:<10s} "
+              f"{fmt(t['entry'])}  {fmt(t['peak'])}  {fmt(t['exit'])}  "
+              f"orb {t['orb']:.2f}{rx}{f'  ({hits} passes)' if hits > 1 else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
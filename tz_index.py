@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Timezone Index — (lat, lon) -> IANA timezone from a binary grid index
+
+Builds a memory-mapped grid index over timezone polygons (the GeoJSON
+releases of timezone-boundary-builder) and resolves coordinates with no
+network call and no geometry library. Vertices are snapped to a fixed
+precision (default 0.005°, ~500 m) and collinear runs dropped, which
+simplifies neighbouring zones identically, so shared borders stay gap- and
+overlap-free.
+
+Each grid cell (default 0.25°) is either whole — one zone covers it, a
+single array read — or mixed, in which case the file holds the polygons
+containing the cell's south-west corner plus every polygon edge touching
+the cell. A mixed lookup walks from that corner to the point, up the west
+side and then east, toggling membership at each edge it crosses, so it
+only ever looks at the few dozen edges in one cell.
+
+Points no polygon covers (open sea in the land-only release) get the
+nautical zone for their longitude (Etc/GMT±N).
+
+Usage:
+  curl -LO https://github.com/evansiroky/timezone-boundary-builder/releases/latest/download/timezones-with-oceans-now.geojson.zip
+  unzip timezones-with-oceans-now.geojson.zip
+  python3 tz_index.py build --geojson combined-with-oceans-now.json --out data/timezones.bin
+  python3 tz_index.py lookup --index data/timezones.bin -41.2866 174.7762
+
+natal_chart reads the index from TZ_INDEX (default data/timezones.bin).
+
+File layout (little-endian):
+  header   8s magic, u32 columns, u32 rows, i32 cell size (1e-7°), u32 zones,
+           u32 polygons, u32 meta bytes, u64 offsets of grid, cells, polygon zones
+  meta     JSON list of zone names
+  grid     u32 per cell, rows south to north from -90°, columns east from -180°:
+           zone index + 1 (0 = none), or 0x80000000 | word offset into cells
+  cells    i32 words per mixed cell: corner polygon count, edge count, corner
+           polygon ids, then per edge polygon id, x1, y1, x2, y2 (1e-7°)
+  zones    u16 zone index per polygon
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+
+MAGIC = b"NCTZIDX1"
+_HEADER = struct.Struct("<8sIIiIIIQQQ")
+MIXED = 0x80000000
+SCALE = 10_000_000      # stored coordinates are integer 1e-7 degrees
+
+DEFAULT_INDEX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "timezones.bin")
+DEFAULT_CELL = 0.25
+DEFAULT_PRECISION = 0.005
+
+
+def nautical_zone(lon: float) -> str:
+    """Etc/GMT zone of the 15° nautical band containing lon (note POSIX sign)."""
+    offset = round(((lon + 180.0) % 360.0 - 180.0) / 15.0)
+    return f"Etc/GMT{-offset:+d}" if offset else "Etc/GMT"
+
+
+class TimezoneIndex:
+    """Read-only view of an index; zone_at() is the hot path."""
+
+    def __init__(self, path: str | None = None, data: bytes | None = None):
+        self.path = path
+        self._mm = None
+        if data is None:
+            with open(path, "rb") as f:
+                self._mm = data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.cols, self.rows, self._cell, nzones, npolys, meta_len,
+         grid_off, cells_off, zones_off) = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a timezone index")
+        self.cell = self._cell / SCALE
+        self.zones: list[str] = json.loads(bytes(data[_HEADER.size:_HEADER.size + meta_len]))
+        view = memoryview(data)
+        self._grid = view[grid_off:grid_off + 4 * self.cols * self.rows].cast("I")
+        self._cells = view[cells_off:zones_off].cast("i")
+        self._poly_zone = view[zones_off:zones_off + 2 * npolys].cast("H")
+
+    def _polygons_at(self, qx: int, qy: int, col: int, row: int, word: int) -> set[int]:
+        """Polygons containing (qx, qy), which lies in the mixed cell (col, row)."""
+        cells = self._cells
+        ncorner, nedges = cells[word], cells[word + 1]
+        inside = set(cells[word + 2:word + 2 + ncorner])
+        x0 = -180 * SCALE + col * self._cell
+        y0 = -90 * SCALE + row * self._cell
+        start = word + 2 + ncorner
+        edges = cells[start:start + 5 * nedges].tolist()
+        # The corner's label counts crossings strictly west of it along a row
+        # line whose own vertices count as south, i.e. it holds just north-west
+        # of the corner; both legs use the same half-open rules
+        for i in range(0, len(edges), 5):
+            poly, ax, ay, bx, by = edges[i:i + 5]
+            # Up the west side, from the corner to the point's latitude
+            if (ax >= x0) != (bx >= x0):
+                y = ay + (x0 - ax) * (by - ay) / (bx - ax)
+                if y0 < y <= qy:
+                    inside ^= {poly}
+            # Then east along the point's latitude
+            if (ay > qy) != (by > qy):
+                x = ax + (qy - ay) * (bx - ax) / (by - ay)
+                if x0 <= x < qx:
+                    inside ^= {poly}
+        return inside
+
+    def zone_at(self, lat: float, lon: float) -> str:
+        """IANA zone at (lat, lon); the nautical Etc/GMT zone where no polygon applies."""
+        lon = (lon + 180.0) % 360.0 - 180.0
+        qx, qy = round(lon * SCALE), round(max(-90.0, min(90.0, lat)) * SCALE)
+        col = min((qx + 180 * SCALE) // self._cell, self.cols - 1)
+        row = min((qy + 90 * SCALE) // self._cell, self.rows - 1)
+        value = self._grid[row * self.cols + col]
+        if value & MIXED:
+            polys = self._polygons_at(qx, qy, col, row, value & ~MIXED)
+            value = self._poly_zone[min(polys)] + 1 if polys else 0
+        return self.zones[value - 1] if value else nautical_zone(lon)
+
+    def close(self) -> None:
+        for view in (self._grid, self._cells, self._poly_zone):
+            view.release()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+
+# ─── Build ────────────────────────────────────────────────────────────────────
+
+def _snap_ring(ring, precision: float) -> list[tuple[int, int]]:
+    """Ring vertices on the precision grid, without repeats or collinear points."""
+    import numpy as np
+
+    step = round(precision * SCALE)
+    pts = np.rint(np.asarray(ring, dtype=float)[:, :2] * SCALE / step).astype(np.int64) * step
+    if len(pts) > 1 and (pts[0] == pts[-1]).all():
+        pts = pts[:-1]
+    if len(pts) > 1:
+        pts = pts[(pts != np.roll(pts, 1, axis=0)).any(axis=1)]
+    if len(pts) < 3:
+        return []
+    prev, nxt = np.roll(pts, 1, axis=0), np.roll(pts, -1, axis=0)
+    cross = (pts[:, 0] - prev[:, 0]) * (nxt[:, 1] - pts[:, 1]) - (pts[:, 1] - prev[:, 1]) * (nxt[:, 0] - pts[:, 0])
+    pts = pts[cross != 0]
+    return [tuple(p) for p in pts.tolist()] if len(pts) >= 3 else []
+
+
+def _area(pts: list[tuple[int, int]]) -> float:
+    """Unsigned shoelace area of a ring, in square stored units."""
+    return abs(sum(ax * by - bx * ay for (ax, ay), (bx, by) in zip(pts, pts[1:] + pts[:1]))) / 2
+
+
+def _segment_hits_box(ax, ay, bx, by, x0, y0, x1, y1) -> bool:
+    """Does segment a-b touch the closed box [x0, x1] x [y0, y1]? (Liang-Barsky)"""
+    t0, t1 = 0.0, 1.0
+    dx, dy = bx - ax, by - ay
+    for p, q in ((-dx, ax - x0), (dx, x1 - ax), (-dy, ay - y0), (dy, y1 - ay)):
+        if p == 0:
+            if q < 0:
+                return False
+        else:
+            t = q / p
+            if p < 0:
+                t0 = max(t0, t)
+            else:
+                t1 = min(t1, t)
+            if t0 > t1:
+                return False
+    return True
+
+
+def build_index(zones, cell: float = DEFAULT_CELL, precision: float = DEFAULT_PRECISION) -> bytes:
+    """
+    Index bytes for zones: an iterable of (IANA name, polygons), each polygon
+    a list of rings (exterior first, then holes) of (lon, lat) pairs.
+    """
+    step = round(cell * SCALE)
+    cols, rows = math.ceil(360 * SCALE / step), math.ceil(180 * SCALE / step)
+    x_base, y_base = -180 * SCALE, -90 * SCALE
+
+    names: list[str] = []
+    snapped = []
+    for name, polygons in zones:
+        for rings in polygons:
+            rings = [pts for pts in (_snap_ring(ring, precision) for ring in rings) if pts]
+            if rings:
+                snapped.append((_area(rings[0]), len(names), rings))
+        names.append(name)
+    # Where zones overlap (enclaves drawn over their surroundings), the
+    # smallest polygon is the specific one; zone_at prefers the lowest id
+    snapped.sort(key=lambda p: p[0])
+    poly_zone = [zone for _, zone, _ in snapped]
+
+    cell_edges: dict[int, list] = {}
+    row_crossings: dict[int, list] = {}
+    for poly, (_, _, rings) in enumerate(snapped):
+        for pts in rings:
+            for (ax, ay), (bx, by) in zip(pts, pts[1:] + pts[:1]):
+                # Cells whose closed box the edge touches, incl. on a shared side
+                c0 = max((min(ax, bx) - x_base - 1) // step, 0)
+                c1 = min((max(ax, bx) - x_base) // step, cols - 1)
+                r0 = max((min(ay, by) - y_base - 1) // step, 0)
+                r1 = min((max(ay, by) - y_base) // step, rows - 1)
+                single = c0 == c1 and r0 == r1
+                for r in range(r0, r1 + 1):
+                    ya = y_base + r * step
+                    for c in range(c0, c1 + 1):
+                        xa = x_base + c * step
+                        if single or _segment_hits_box(ax, ay, bx, by, xa, ya, xa + step, ya + step):
+                            cell_edges.setdefault(r * cols + c, []).append((poly, ax, ay, bx, by))
+                # Where the edge crosses each row's southern line (same rule as zone_at)
+                lo, hi = min(ay, by), max(ay, by)
+                for r in range(max((lo - y_base) // step, 0), min((hi - y_base) // step, rows - 1) + 1):
+                    y0 = y_base + r * step
+                    if (ay > y0) != (by > y0):
+                        row_crossings.setdefault(r, []).append((poly, ax + (y0 - ay) * (bx - ax) / (by - ay)))
+
+    # Polygons containing each cell's south-west corner: odd crossings to its west
+    corners: dict[int, list[int]] = {}
+    for r, crossings in row_crossings.items():
+        by_poly: dict[int, list[float]] = {}
+        for poly, x in crossings:
+            by_poly.setdefault(poly, []).append(x)
+        for poly, xs in by_poly.items():
+            xs.sort()
+            for xa, xb in zip(xs[::2], xs[1::2]):
+                # corner x0 inside iff xa < x0 <= xb
+                c = max(math.floor((xa - x_base) / step), 0)
+                while c < cols and x_base + c * step <= xb:
+                    if x_base + c * step > xa:
+                        corners.setdefault(r * cols + c, []).append(poly)
+                    c += 1
+
+    grid = [0] * (cols * rows)
+    for i, polys in corners.items():
+        grid[i] = poly_zone[min(polys)] + 1
+    words: list[int] = []
+    for i in sorted(cell_edges):
+        polys = sorted(corners.get(i, ()))
+        grid[i] = MIXED | len(words)
+        words += [len(polys), len(cell_edges[i]), *polys]
+        for edge in cell_edges[i]:
+            words.extend(edge)
+
+    meta = json.dumps(names).encode()
+    grid_off = _HEADER.size + len(meta)
+    grid_off += -grid_off % 4
+    cells_off = grid_off + 4 * len(grid)
+    zones_off = cells_off + 4 * len(words)
+    header = _HEADER.pack(MAGIC, cols, rows, step, len(names), len(poly_zone), len(meta),
+                          grid_off, cells_off, zones_off)
+    return b"".join((
+        header, meta, b"\0" * (grid_off - _HEADER.size - len(meta)),
+        struct.pack(f"<{len(grid)}I", *grid),
+        struct.pack(f"<{len(words)}i", *words),
+        struct.pack(f"<{len(poly_zone)}H", *poly_zone),
+    ))
+
+
+def read_geojson(path: str):
+    """(tzid, polygons) per feature of a timezone-boundary-builder GeoJSON file."""
+    with open(path, encoding="utf-8") as f:
+        collection = json.load(f)
+    for feature in collection["features"]:
+        geom = feature["geometry"]
+        polygons = [geom["coordinates"]] if geom["type"] == "Polygon" else geom["coordinates"]
+        yield feature["properties"]["tzid"], polygons
+
+
+def open_tz_index(path: str | None = None) -> TimezoneIndex | None:
+    """Index at path (default TZ_INDEX or data/timezones.bin), or None if there is none."""
+    path = path or os.getenv("TZ_INDEX") or DEFAULT_INDEX
+    return TimezoneIndex(path) if os.path.exists(path) else None
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Build or query the timezone index")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Index timezone-boundary-builder GeoJSON")
+    b.add_argument("--geojson", required=True)
+    b.add_argument("--out", required=True)
+    b.add_argument("--cell", type=float, default=DEFAULT_CELL, help="Grid cell size in degrees")
+    b.add_argument("--precision", type=float, default=DEFAULT_PRECISION,
+                   help="Vertex snapping grid in degrees (simplification)")
+    q = sub.add_parser("lookup", help="Zone at a coordinate")
+    q.add_argument("lat", type=float)
+    q.add_argument("lon", type=float)
+    q.add_argument("--index", default=None)
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        data = build_index(read_geojson(args.geojson), args.cell, args.precision)
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "wb") as f:
+            f.write(data)
+        index = TimezoneIndex(data=data)
+        print(f"Wrote {args.out} ({len(data) / 1024 / 1024:.1f} MiB, {len(index.zones)} zones, "
+              f"{index.cols}x{index.rows} cells) in {time.perf_counter() - t0:.1f}s")
+        return 0
+
+    index = open_tz_index(args.index)
+    if index is None:
+        print("No timezone index; build one with `tz_index.py build`", file=sys.stderr)
+        return 1
+    t0 = time.perf_counter()
+    zone = index.zone_at(args.lat, args.lon)
+    print(f"{zone} ({(time.perf_counter() - t0) * 1e6:.0f} us)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())